@@ -0,0 +1,234 @@
+"""Bulk Patient / Patient Encounter endpoints.
+
+    POST /api/method/sriaas_booking.api.bulk.create_patients      {"records": [...]}
+    POST /api/method/sriaas_booking.api.bulk.upsert_patients      {"records": [...], "key": "sr_patient_id"}
+    POST /api/method/sriaas_booking.api.bulk.create_encounters    {"records": [...]}
+    GET  /api/method/sriaas_booking.api.bulk.get_patients         ?ids=[...]&key=sr_practo_id
+    GET  /api/method/sriaas_booking.api.bulk.get_encounters       ?patients=[...]
+
+Every write returns one result per input record, in input order:
+    {"index": 0, "status": "created" | "updated" | "error", "name": ..., "error": ...}
+Links are validated for the whole batch up front (one query per linked doctype);
+records are written with a savepoint each and committed every CHUNK_SIZE records.
+"""
+
+import frappe
+from frappe import _
+
+from sriaas_booking import encounter_header
+
+MAX_RECORDS = 500
+CHUNK_SIZE = 100
+UPSERT_KEYS = ("sr_patient_id", "sr_practo_id")
+
+PATIENT_FIELDS = [
+	"name",
+	"patient_name",
+	"first_name",
+	"last_name",
+	"sex",
+	"dob",
+	"mobile",
+	"email",
+	"status",
+	"customer",
+	"sr_medical_department",
+	"sr_patient_id",
+	"sr_practo_id",
+	"sr_patient_age",
+	"sr_followup_status",
+	"sr_followup_disable_reason",
+	"sr_followup_day",
+	"sr_followup_id",
+	"sr_last_created_pe",
+]
+ENCOUNTER_FIELDS = [
+	"name",
+	"patient",
+	"patient_name",
+	"practitioner",
+	"encounter_date",
+	"docstatus",
+	"sr_encounter_type",
+	"sr_encounter_place",
+	"sr_encounter_status",
+	"sr_encounter_source",
+	"sr_sales_type",
+	"sr_pe_id",
+	"sr_pe_mobile",
+	"sr_pe_deptt",
+	"sr_pe_age",
+]
+
+# ----------------- endpoints -----------------
+
+
+@frappe.whitelist(methods=["POST"])
+def create_patients(records):
+	records = _parse_records(records)
+	return _write("Patient", records, [None] * len(records))
+
+
+@frappe.whitelist(methods=["POST"])
+def upsert_patients(records, key="sr_patient_id"):
+	"""Update the Patient whose `key` matches, else create it."""
+	if key not in UPSERT_KEYS:
+		frappe.throw(_("key must be one of {0}").format(", ".join(UPSERT_KEYS)))
+	records = _parse_records(records)
+
+	values = [r.get(key) for r in records if r.get(key)]
+	existing = (
+		dict(frappe.get_all("Patient", filters={key: ["in", values]}, fields=[key, "name"], as_list=True))
+		if values
+		else {}
+	)
+	return _write("Patient", records, [existing.get(r.get(key)) for r in records], key=key)
+
+
+@frappe.whitelist(methods=["POST"])
+def create_encounters(records):
+	records = _parse_records(records)
+	encounter_header.prime(records)  # header copies for the whole batch in two queries
+	return _write("Patient Encounter", records, [None] * len(records))
+
+
+@frappe.whitelist()
+def get_patients(ids, key="name"):
+	if key not in ("name", *UPSERT_KEYS):
+		frappe.throw(_("key must be name, sr_patient_id or sr_practo_id"))
+	ids = _parse_records(ids, allow_scalars=True)
+	return frappe.get_list(
+		"Patient", filters={key: ["in", ids]}, fields=PATIENT_FIELDS, limit_page_length=MAX_RECORDS
+	)
+
+
+@frappe.whitelist()
+def get_encounters(patients=None, names=None):
+	filters = {}
+	if patients:
+		filters["patient"] = ["in", _parse_records(patients, allow_scalars=True)]
+	if names:
+		filters["name"] = ["in", _parse_records(names, allow_scalars=True)]
+	if not filters:
+		frappe.throw(_("Pass patients or names"))
+	return frappe.get_list(
+		"Patient Encounter",
+		filters=filters,
+		fields=ENCOUNTER_FIELDS,
+		order_by="creation desc",
+		limit_page_length=MAX_RECORDS,
+	)
+
+
+# ----------------- batch engine -----------------
+
+
+def _parse_records(records, allow_scalars: bool = False) -> list:
+	records = frappe.parse_json(records)
+	if not isinstance(records, list):
+		frappe.throw(_("Expected a JSON list"))
+	if len(records) > MAX_RECORDS:
+		frappe.throw(_("At most {0} records per call").format(MAX_RECORDS))
+	if not allow_scalars and not all(isinstance(r, dict) for r in records):
+		frappe.throw(_("Every record must be a JSON object"))
+	return records
+
+
+def _write(
+	doctype: str, records: list[dict], targets: list[str | None], key: str | None = None
+) -> list[dict]:
+	"""Insert (target None) or update (target = existing name) each record.
+
+	One permission check per action for the batch, one link check per linked
+	doctype for the batch, then a savepoint per record and a commit per chunk.
+	"""
+	if any(t is None for t in targets):
+		frappe.has_permission(doctype, "create", throw=True)
+	if any(targets):
+		frappe.has_permission(doctype, "write", throw=True)
+
+	results = [None] * len(records)
+	errors = _validate_batch(doctype, records, key)
+	for i, msg in errors.items():
+		results[i] = {"index": i, "status": "error", "error": msg}
+
+	pending = [i for i in range(len(records)) if i not in errors]
+	for start in range(0, len(pending), CHUNK_SIZE):
+		for i in pending[start : start + CHUNK_SIZE]:
+			results[i] = _write_one(doctype, i, records[i], targets[i])
+		frappe.db.commit()
+	return results
+
+
+def _write_one(doctype: str, i: int, record: dict, target: str | None) -> dict:
+	savepoint = f"sr_bulk_{i}"
+	frappe.db.savepoint(savepoint)
+	try:
+		if target:
+			doc = frappe.get_doc(doctype, target)
+			doc.update({k: v for k, v in record.items() if k not in ("name", "doctype")})
+		else:
+			doc = frappe.get_doc({**record, "doctype": doctype})
+		doc.flags.ignore_links = True  # already checked for the whole batch
+		if target:
+			doc.save()
+		else:
+			doc.insert()
+		return {"index": i, "status": "updated" if target else "created", "name": doc.name}
+	except Exception as e:
+		frappe.db.rollback(save_point=savepoint)
+		frappe.clear_messages()
+		return {"index": i, "status": "error", "error": str(e) or e.__class__.__name__}
+
+
+def _validate_batch(doctype: str, records: list[dict], key: str | None) -> dict[int, str]:
+	"""{index: message} for records that fail duplicate-key or link checks."""
+	errors = {}
+
+	if key:
+		seen = {}
+		for i, r in enumerate(records):
+			value = r.get(key)
+			if value and value in seen:
+				errors[i] = _("Duplicate {0} {1} in batch (record {2})").format(key, value, seen[value])
+			elif value:
+				seen[value] = i
+
+	# ignore_links is set on write, so every Link / Dynamic Link here, child rows included,
+	# is checked now: (record index, target doctype, value) → one query per target doctype
+	refs = []
+	meta = frappe.get_meta(doctype)
+	for i, r in enumerate(records):
+		refs.extend((i, dt, value) for dt, value in _link_values(meta, r))
+		for tf in meta.get_table_fields():
+			child_meta = frappe.get_meta(tf.options)
+			for row in r.get(tf.fieldname) or []:
+				if isinstance(row, dict):
+					refs.extend((i, dt, value) for dt, value in _link_values(child_meta, row))
+
+	wanted = {}
+	for _i, dt, value in refs:
+		wanted.setdefault(dt, set()).add(value)
+	found = {}
+	for dt, values in wanted.items():
+		if not dt or not frappe.db.exists("DocType", dt):
+			found[dt] = set()
+			continue
+		found[dt] = set(frappe.get_all(dt, filters={"name": ["in", list(values)]}, pluck="name"))
+
+	for i, dt, value in refs:
+		if value not in found[dt] and i not in errors:
+			errors[i] = _("{0} {1} not found").format(dt, value)
+	return errors
+
+
+def _link_values(meta, row: dict) -> list[tuple[str, str]]:
+	"""(doctype, value) for each filled Link and Dynamic Link of `row`."""
+	out = []
+	for df in meta.get_link_fields() + meta.get_dynamic_link_fields():
+		value = row.get(df.fieldname)
+		if not value:
+			continue
+		target = df.options if df.fieldtype == "Link" else row.get(df.options)
+		out.append((target or "", value))  # a Dynamic Link without its doctype fails below
+	return out
@@ -0,0 +1,254 @@
+"""Hot/cold archival of old submitted Patient Encounters.
+
+An encounter is moved to the archive once it is submitted and its encounter_date
+is older than `sr_encounter_archive_days` (site config, default
+ARCHIVE_AFTER_DAYS). All of its child rows move with it: the three Drug
+Prescription tables, sr_pe_order_items and every other table field on the
+doctype. Archive tables are plain copies of the hot tables, named
+`_sr_archive_<table>` so that `bench trim-database` leaves them alone. When the
+hot schema gains columns, the archive picks them up before the next move.
+
+Each chunk is copied and deleted in one transaction. A retried chunk is
+harmless, because archive rows are written with REPLACE.
+Archived encounters stay readable through `get_encounter`, and `restore_encounter`
+moves one back. The PE launcher cache (pe_launcher.py) of every affected patient is
+dropped after each move.
+
+An encounter stays hot while anything still links to it (Link or Dynamic Link
+fields on any doctype, custom fields included: Patient.sr_last_created_pe, Sales
+Invoice Item, Patient Medical Record, Vital Signs, order_group, ...), so no
+document is left pointing at a deleted row.
+"""
+
+import frappe
+from frappe import _
+from frappe.model.dynamic_links import get_dynamic_link_map
+from frappe.model.rename_doc import get_link_fields
+from frappe.utils import add_days, cint, getdate
+from pypika.terms import ExistsCriterion
+
+from sriaas_booking import pe_launcher
+
+PE = "Patient Encounter"
+ARCHIVE_AFTER_DAYS = 730
+CHUNK_SIZE = 500
+MAX_CHUNKS_PER_RUN = 200
+
+
+def archive_table(doctype: str) -> str:
+	return "_sr_archive_" + frappe.scrub(doctype)
+
+
+def child_doctypes() -> list[str]:
+	return sorted({df.options for df in frappe.get_meta(PE).get_table_fields()})
+
+
+# ----------------- archive tables -----------------
+
+
+def _columns(table: str) -> dict[str, str]:
+	"""{column: full column definition} in table order."""
+	return {
+		r[0]: r[1]
+		for r in frappe.db.sql(
+			"""SELECT column_name, column_type FROM information_schema.columns
+               WHERE table_schema = DATABASE() AND table_name = %s ORDER BY ordinal_position""",
+			(table,),
+		)
+	}
+
+
+def ensure_archive_tables() -> dict[str, list[str]]:
+	"""Create or widen every archive table; returns {doctype: shared columns} for the copies."""
+	shared = {}
+	for doctype in (PE, *child_doctypes()):
+		hot, cold = f"tab{doctype}", archive_table(doctype)
+		frappe.db.sql_ddl(f"CREATE TABLE IF NOT EXISTS `{cold}` LIKE `{hot}`")
+		hot_cols, cold_cols = _columns(hot), _columns(cold)
+		for column, column_type in hot_cols.items():
+			if column not in cold_cols:
+				frappe.db.sql_ddl(f"ALTER TABLE `{cold}` ADD COLUMN `{column}` {column_type} NULL")
+		shared[doctype] = list(hot_cols)
+	return shared
+
+
+# ----------------- moving -----------------
+
+
+def archive_old_encounters(
+	days: int | None = None, chunk_size: int = CHUNK_SIZE, max_chunks: int = MAX_CHUNKS_PER_RUN
+) -> dict:
+	"""Scheduler entry (daily_long): archive up to max_chunks chunks of eligible encounters."""
+	days = cint(days or frappe.conf.get("sr_encounter_archive_days") or ARCHIVE_AFTER_DAYS)
+	cutoff = add_days(getdate(), -days)
+	columns = ensure_archive_tables()
+	links = _inbound_links()
+
+	moved = 0
+	for _chunk in range(max_chunks):
+		names = _eligible(cutoff, chunk_size, links)
+		if not names:
+			break
+		patients = _patients_of(names, archived=False)
+		_move(names, columns, from_hot=True)
+		frappe.db.commit()
+		pe_launcher.invalidate_patients(patients)
+		moved += len(names)
+
+	stats = {"cutoff": str(cutoff), "archived": moved}
+	frappe.logger("sriaas_booking").info({"encounter_archive": stats})
+	return stats
+
+
+def _inbound_links() -> list[tuple[str, str, str | None, bool]]:
+	"""(doctype, fieldname, doctype field or None, is single) of every field that can link to a PE."""
+	tables = set(frappe.db.get_tables())
+	links = [
+		(df.parent, df.fieldname, None, bool(df.issingle))
+		for df in get_link_fields(PE)
+		if df.issingle or f"tab{df.parent}" in tables
+	]
+	# keyed by the doctypes the dynamic links actually hold
+	links.extend(
+		(df.parent, df.fieldname, df.options, False)
+		for df in get_dynamic_link_map().get(PE, [])
+		if f"tab{df.parent}" in tables
+	)
+	return links
+
+
+def _eligible(cutoff, limit: int, links: list[tuple]) -> list[str]:
+	pe = frappe.qb.DocType(PE)
+	condition = (pe.docstatus == 1) & (pe.encounter_date < cutoff)
+	singles = frappe.qb.DocType("Singles")
+	for doctype, fieldname, type_field, issingle in links:
+		if issingle:
+			ref = (
+				frappe.qb.from_(singles)
+				.select(1)
+				.where(
+					(singles.doctype == doctype) & (singles.field == fieldname) & (singles.value == pe.name)
+				)
+			)
+		else:
+			t = frappe.qb.DocType(doctype)
+			ref = frappe.qb.from_(t).select(1).where(t[fieldname] == pe.name)
+			if type_field:
+				ref = ref.where(t[type_field] == PE)
+		condition &= ~ExistsCriterion(ref)
+	return (
+		frappe.qb.from_(pe)
+		.select(pe.name)
+		.where(condition)
+		.orderby(pe.encounter_date)
+		.orderby(pe.name)
+		.limit(limit)
+		.run(pluck=True)
+	)
+
+
+def _move(names: list[str], columns: dict[str, list[str]], from_hot: bool):
+	"""Copy the encounters and their child rows across, then delete them at the source."""
+	placeholders = ", ".join(["%s"] * len(names))
+	for doctype, cols in columns.items():
+		hot, cold = f"`tab{doctype}`", f"`{archive_table(doctype)}`"
+		src, dst = (hot, cold) if from_hot else (cold, hot)
+		where = (
+			f"name IN ({placeholders})"
+			if doctype == PE
+			else f"parenttype = %s AND parent IN ({placeholders})"
+		)
+		params = tuple(names) if doctype == PE else (PE, *names)
+		col_sql = ", ".join(f"`{c}`" for c in cols)
+		frappe.db.sql(f"REPLACE INTO {dst} ({col_sql}) SELECT {col_sql} FROM {src} WHERE {where}", params)
+		frappe.db.sql(f"DELETE FROM {src} WHERE {where}", params)
+
+
+@frappe.whitelist(methods=["POST"])
+def enqueue_archive(days=None):
+	frappe.only_for("System Manager")
+	frappe.enqueue(
+		"sriaas_booking.archive.archive_old_encounters",
+		queue="long",
+		job_id=f"sr_encounter_archive::{frappe.local.site}",
+		deduplicate=True,
+		days=days,
+	)
+
+
+@frappe.whitelist(methods=["POST"])
+def restore_encounter(name: str):
+	"""Move one archived encounter (and its child rows) back into the hot tables."""
+	frappe.only_for("System Manager")
+	row = _archived_row(name)
+	if not row:
+		frappe.throw(_("Patient Encounter {0} is not archived").format(name), frappe.DoesNotExistError)
+	_move([name], ensure_archive_tables(), from_hot=False)
+	frappe.db.commit()
+	pe_launcher.invalidate_patients([row.patient])
+
+
+def _patients_of(names: list[str], archived: bool) -> list[str]:
+	table = f"`{archive_table(PE)}`" if archived else f"`tab{PE}`"
+	placeholders = ", ".join(["%s"] * len(names))
+	return frappe.db.sql_list(
+		f"SELECT DISTINCT patient FROM {table} WHERE name IN ({placeholders})", tuple(names)
+	)
+
+
+# ----------------- reading -----------------
+
+
+def _archived_row(name: str) -> dict | None:
+	if not frappe.db.sql("SHOW TABLES LIKE %s", (archive_table(PE),)):
+		return None
+	rows = frappe.db.sql(f"SELECT * FROM `{archive_table(PE)}` WHERE name = %s", (name,), as_dict=True)
+	return rows[0] if rows else None
+
+
+@frappe.whitelist()
+def get_encounter(name: str) -> dict:
+	"""The encounter as a dict with its child tables, from the hot tables or the archive."""
+	if frappe.db.exists(PE, name):
+		doc = frappe.get_doc(PE, name)
+		doc.check_permission("read")
+		return doc.as_dict()
+
+	row = _archived_row(name)
+	if not row:
+		frappe.throw(_("Patient Encounter {0} not found").format(name), frappe.DoesNotExistError)
+	frappe.has_permission(PE, "read", throw=True)
+	frappe.has_permission("Patient", "read", row.patient, throw=True)
+
+	row.update({"doctype": PE, "sr_archived": 1})
+	table_fields = frappe.get_meta(PE).get_table_fields()
+	for df in table_fields:
+		row[df.fieldname] = []
+	for doctype in {df.options for df in table_fields}:
+		for child in frappe.db.sql(
+			f"SELECT * FROM `{archive_table(doctype)}` WHERE parenttype = %s AND parent = %s ORDER BY parentfield, idx",
+			(PE, name),
+			as_dict=True,
+		):
+			row.setdefault(child.parentfield, []).append(child)
+	return row
+
+
+@frappe.whitelist()
+def get_archived_encounters(patient: str, limit: int = 20, before: str | None = None) -> list[dict]:
+	"""Archived encounters of `patient`, newest first; pass "<encounter_date>|<name>" of the last row as `before` to page."""
+	frappe.has_permission(PE, "read", throw=True)
+	frappe.has_permission("Patient", "read", patient, throw=True)
+	if not frappe.db.sql("SHOW TABLES LIKE %s", (archive_table(PE),)):
+		return []
+	condition, params = "", [patient]
+	if before:
+		date, name = before.split("|", 1)
+		condition, params = "AND (encounter_date, name) < (%s, %s)", [patient, getdate(date), name]
+	return frappe.db.sql(
+		f"""SELECT name, encounter_date, practitioner_name, sr_encounter_type, sr_encounter_status
+            FROM `{archive_table(PE)}` WHERE patient = %s {condition}
+            ORDER BY encounter_date DESC, name DESC LIMIT %s""",
+		(*params, min(cint(limit) or 20, 100)),
+		as_dict=True,
+	)
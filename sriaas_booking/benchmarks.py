@@ -0,0 +1,210 @@
+"""Benchmark harness for schema setup, uninstall and the Patient / Encounter write paths.
+
+Destructive (it uninstalls and reinstalls the app's schema), so it only runs on a
+throwaway bench site with `allow_tests` enabled:
+
+    bench --site bench.localhost set-config allow_tests true
+    bench --site bench.localhost execute sriaas_booking.benchmarks.run \\
+        --kwargs "{'output': 'bench_output.json', 'baseline': 'baseline.json', 'threshold': 0.2}"
+
+Every case runs `repeat` times and reports the median wall time plus SQL queries,
+rows written and cache clears (via profiling.StepProfiler). With `baseline`, any
+case whose time or query count grew by more than `threshold` fails the run.
+Setup runs are tagged "benchmark:<case>" and kept out of the per-site migrate
+history, so real migrate summaries (profiling.get_history) survive a run.
+"""
+
+import json
+import statistics
+import sys
+
+import frappe
+from frappe.utils import add_years, nowdate
+
+import sriaas_booking
+from sriaas_booking import install, uninstall
+from sriaas_booking.profiling import StepProfiler
+
+BENCH_PREFIX = "SRBENCH"
+METRICS = ("seconds", "queries", "rows_written", "cache_clears")
+GATED_METRICS = ("seconds", "queries")
+
+
+def run(
+	output: str | None = None,
+	baseline: str | None = None,
+	threshold: float = 0.2,
+	repeat: int = 3,
+	patients: int = 200,
+	encounters: int = 200,
+):
+	if not frappe.conf.allow_tests:
+		frappe.throw("Benchmarks modify the schema; enable allow_tests on a throwaway site first")
+
+	cases = {
+		"after_install_cold": (_uninstall_quietly, lambda: _setup("after_install_cold", force=True)),
+		"after_migrate_cold": (_forget_schema_hash, lambda: _setup("after_migrate_cold")),
+		"after_migrate_warm": (lambda: _setup("after_migrate_warm"), lambda: _setup("after_migrate_warm")),
+		"before_uninstall": (None, lambda: uninstall.before_uninstall()),
+		"insert_patients": (None, lambda: _insert_patients(patients)),
+		"insert_encounters": (_ensure_fixtures, lambda: _insert_encounters(encounters)),
+	}
+
+	results = {}
+	for name, (setup, case) in cases.items():
+		samples = []
+		for _i in range(repeat):
+			if setup:
+				setup()
+			profiler = StepProfiler("benchmark")
+			with profiler.step(name):
+				case()
+			samples.append(profiler.steps[0])
+			_reset_after(name)
+		results[name] = {m: statistics.median(s[m] for s in samples) for m in METRICS}
+
+	report = {
+		"app_version": sriaas_booking.__version__,
+		"site": frappe.local.site,
+		"repeat": repeat,
+		"sizes": {"patients": patients, "encounters": encounters},
+		"cases": results,
+	}
+	if baseline:
+		report["regressions"] = compare(results, _load(baseline)["cases"], threshold)
+
+	text = json.dumps(report, indent=2, default=str)
+	if output:
+		with open(output, "w") as f:
+			f.write(text)
+	print(text)
+
+	if report.get("regressions"):
+		sys.exit(1)
+	return report
+
+
+def compare(current: dict, base: dict, threshold: float) -> list[dict]:
+	"""Cases/metrics that grew by more than `threshold` (0.2 = 20%) over the baseline."""
+	out = []
+	for name, metrics in current.items():
+		for m in GATED_METRICS:
+			before, after = (base.get(name) or {}).get(m), metrics[m]
+			if before and after > before * (1 + threshold):
+				out.append(
+					{
+						"case": name,
+						"metric": m,
+						"baseline": before,
+						"current": after,
+						"change": round(after / before - 1, 3),
+					}
+				)
+	return out
+
+
+def _load(path: str) -> dict:
+	with open(path) as f:
+		return json.load(f)
+
+
+# ----------------- setup / teardown -----------------
+
+
+def _setup(case: str, force: bool = False) -> dict:
+	"""install._setup_everything without touching the stored migrate history."""
+	return install._setup_everything(force=force, hook=f"benchmark:{case}", keep_history=False)
+
+
+def _uninstall_quietly():
+	uninstall.before_uninstall()
+	frappe.db.commit()
+
+
+def _forget_schema_hash():
+	frappe.db.set_global(install.SCHEMA_HASH_KEY, "")
+
+
+def _reset_after(case: str):
+	if case == "before_uninstall":
+		_setup(case, force=True)
+	if case.startswith("insert_"):
+		frappe.db.rollback()
+	else:
+		frappe.db.commit()
+
+
+def _ensure_fixtures():
+	"""Masters the benchmark encounters link to (committed, reused between runs)."""
+	for doctype, name, values in (
+		("Medical Department", BENCH_PREFIX, {"department": BENCH_PREFIX}),
+		("SR Encounter Status", BENCH_PREFIX, {"sr_status_name": BENCH_PREFIX}),
+		("SR Sales Type", BENCH_PREFIX, {"sr_sales_type_name": BENCH_PREFIX}),
+		("SR Delivery Type", BENCH_PREFIX, {"sr_delivery_type_name": BENCH_PREFIX}),
+		(_lead_source_dt(), BENCH_PREFIX, {"source_name": BENCH_PREFIX}),
+	):
+		if not frappe.db.exists(doctype, name):
+			frappe.get_doc({"doctype": doctype, **values}).insert(ignore_permissions=True)
+
+	if not frappe.db.exists("Healthcare Practitioner", {"first_name": BENCH_PREFIX}):
+		frappe.get_doc(
+			{
+				"doctype": "Healthcare Practitioner",
+				"first_name": BENCH_PREFIX,
+				"sr_qualification": "BAMS",
+				"sr_pathy": "Ayurveda",
+				"department": BENCH_PREFIX,
+			}
+		).insert(ignore_permissions=True)
+	frappe.db.commit()
+
+
+def _lead_source_dt() -> str:
+	return "CRM Lead Source" if frappe.db.exists("DocType", "CRM Lead Source") else "Lead Source"
+
+
+# ----------------- write paths -----------------
+
+
+def _patient(i: int) -> dict:
+	return {
+		"doctype": "Patient",
+		"first_name": f"{BENCH_PREFIX} {i}",
+		"sex": "Female" if i % 2 else "Male",
+		"dob": add_years(nowdate(), -(20 + i % 50)),
+		"mobile": f"9{i:09d}",
+		"sr_patient_id": f"{BENCH_PREFIX}-{i}",
+		"sr_practo_id": f"P{BENCH_PREFIX}{i}",
+		"sr_patient_age": f"{20 + i % 50} Year(s)",
+		"sr_followup_status": "Pending",
+		"sr_followup_day": ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat")[i % 6],
+		"sr_followup_id": str(i % 10),
+	}
+
+
+def _insert_patients(n: int):
+	for i in range(n):
+		frappe.get_doc(_patient(i)).insert(ignore_permissions=True)
+
+
+def _insert_encounters(n: int):
+	patient = frappe.get_doc(_patient(0)).insert(ignore_permissions=True)
+	practitioner = frappe.db.get_value("Healthcare Practitioner", {"first_name": BENCH_PREFIX})
+	for i in range(n):
+		frappe.get_doc(
+			{
+				"doctype": "Patient Encounter",
+				"patient": patient.name,
+				"practitioner": practitioner,
+				"encounter_date": nowdate(),
+				"sr_encounter_type": "Order" if i % 2 else "Followup",
+				"sr_encounter_place": "OPD" if i % 3 else "Online",
+				"sr_sales_type": BENCH_PREFIX,
+				"sr_delivery_type": BENCH_PREFIX,
+				"sr_encounter_source": BENCH_PREFIX,
+				"sr_encounter_status": BENCH_PREFIX,
+				"sr_ayurvedic_practitioner": practitioner,
+				"sr_complaints": "benchmark",
+				"sr_notes": "benchmark",
+			}
+		).insert(ignore_permissions=True)
@@ -0,0 +1,118 @@
+"""bench commands.
+
+    bench sr-rollout-schema [--processes N] [--force]
+    bench --site a.local --site b.local sr-rollout-schema
+
+Applies the schema manifest (install._setup_everything) to many sites in
+parallel. The manifest is built once, on the first site, and shipped to the
+workers. A worker reuses it on every site whose schema.site_signature matches,
+and builds its own otherwise. Each worker process handles one site at a time on
+its own DB connection. The command prints one line per site (duration, fast path
+or not, error) and exits non-zero when any site failed.
+"""
+
+import multiprocessing
+import os
+import time
+import traceback
+
+import click
+import frappe
+from frappe.commands import pass_context
+
+
+def _with_site(site: str, sites_path: str, fn):
+	frappe.init(site=site, sites_path=sites_path)
+	frappe.connect()
+	try:
+		return fn()
+	finally:
+		frappe.destroy()
+
+
+def _build_plan() -> dict | None:
+	from sriaas_booking import schema
+
+	if "sriaas_booking" not in frappe.get_installed_apps():
+		return None
+	return {"signature": schema.site_signature(), "manifest": schema.build_manifest()}
+
+
+def _apply(args: tuple) -> dict:
+	"""Worker: roll the schema out to one site."""
+	site, sites_path, plan, force = args
+	started = time.perf_counter()
+	result = {
+		"site": site,
+		"ok": False,
+		"skipped": False,
+		"fast_path": False,
+		"shared_plan": False,
+		"error": None,
+	}
+
+	def run():
+		from sriaas_booking import install, schema
+
+		if "sriaas_booking" not in frappe.get_installed_apps():
+			result["skipped"] = True
+			return
+		manifest = None
+		if plan and schema.site_signature() == plan["signature"]:
+			manifest, result["shared_plan"] = plan["manifest"], True
+		summary = install._setup_everything(force=force, hook="sr-rollout-schema", manifest=manifest)
+		frappe.db.commit()
+		result["fast_path"] = bool(summary.get("fast_path"))
+
+	try:
+		_with_site(site, sites_path, run)
+		result["ok"] = True
+	except Exception:
+		result["error"] = traceback.format_exc(limit=3)
+	result["seconds"] = round(time.perf_counter() - started, 3)
+	return result
+
+
+@click.command("sr-rollout-schema")
+@click.option("--processes", type=int, default=None, help="Worker processes (default: CPU count)")
+@click.option("--force", is_flag=True, default=False, help="Skip the unchanged-schema fast path")
+@pass_context
+def rollout_schema(context, processes=None, force=False):
+	"""Apply the sriaas_booking schema to all (or the given) sites in parallel."""
+	sites_path = os.getcwd()
+	sites = list(context.sites) or frappe.utils.get_sites(sites_path)
+	if not sites:
+		click.echo("No sites")
+		return
+
+	started = time.perf_counter()
+	plan = _with_site(sites[0], sites_path, _build_plan)  # None when the app is not on that site
+	processes = max(1, min(processes or os.cpu_count() or 1, len(sites)))
+
+	# spawn: workers start without the parent's DB connection or frappe.local state
+	with multiprocessing.get_context("spawn").Pool(processes) as pool:
+		results = pool.map(_apply, [(s, sites_path, plan, force) for s in sites], chunksize=1)
+
+	failed = [r for r in results if not r["ok"]]
+	for r in sorted(results, key=lambda r: -r["seconds"]):
+		state = (
+			"FAILED"
+			if not r["ok"]
+			else "skipped"
+			if r["skipped"]
+			else "unchanged"
+			if r["fast_path"]
+			else "applied"
+		)
+		plan_note = "shared plan" if r["shared_plan"] else "own plan"
+		click.echo(f"{r['site']:<40} {r['seconds']:>8.3f}s  {state:<9} {plan_note}")
+		if r["error"]:
+			click.echo(r["error"], err=True)
+	click.echo(
+		f"{len(sites)} sites, {processes} processes, {len(failed)} failed, {time.perf_counter() - started:.3f}s"
+	)
+	if failed:
+		raise SystemExit(1)
+
+
+commands = [rollout_schema]
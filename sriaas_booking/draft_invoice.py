@@ -0,0 +1,260 @@
+"""Draft Invoice tab of an Order encounter → pricing, Sales Invoice and advance Payment Entry.
+
+Pricing looks up every row's Item and selling Item Price in one query each, so an
+encounter (or a whole day of encounters in bulk mode) is priced in two reads.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import flt, getdate, nowdate
+
+ITEM_TABLE = "sr_pe_order_items"
+
+# ----------------- pricing -----------------
+
+
+class PriceBook:
+	"""Item UOM/name and selling rates for a set of item codes, loaded once.
+
+	Loads the general Item Prices (no customer, no batch) plus those specific to
+	`customers`; `rate` prefers the invoice customer's own price when it has one.
+	"""
+
+	def __init__(self, item_codes, price_list: str | None = None, date=None, customers=()):
+		codes = list({c for c in item_codes if c})
+		self.price_list = price_list or frappe.db.get_single_value("Selling Settings", "selling_price_list")
+		self.date = getdate(date or nowdate())
+		self.items = (
+			{
+				r.name: r
+				for r in frappe.get_all(
+					"Item",
+					filters={"name": ["in", codes]},
+					fields=["name", "item_name", "stock_uom", "sales_uom", "description"],
+				)
+			}
+			if codes
+			else {}
+		)
+		self.prices = {}
+		customers = list({c for c in customers if c})
+		if codes and self.price_list:
+			for p in frappe.get_all(
+				"Item Price",
+				filters={
+					"item_code": ["in", codes],
+					"price_list": self.price_list,
+					"selling": 1,
+					"batch_no": ["is", "not set"],
+				},
+				or_filters=[["customer", "is", "not set"]]
+				+ ([["customer", "in", customers]] if customers else []),
+				fields=["item_code", "uom", "customer", "price_list_rate", "valid_from", "valid_upto"],
+				order_by="valid_from desc",
+			):
+				if (p.valid_from and getdate(p.valid_from) > self.date) or (
+					p.valid_upto and getdate(p.valid_upto) < self.date
+				):
+					continue
+				self.prices.setdefault(p.item_code, []).append(p)
+
+	def uom(self, item_code):
+		item = self.items.get(item_code) or {}
+		return item.get("sales_uom") or item.get("stock_uom")
+
+	def rate(self, item_code, uom=None, customer=None) -> float:
+		prices = [p for p in self.prices.get(item_code) or [] if not p.customer or p.customer == customer]
+		# customer's own price first, then matching UOM; ties keep the latest valid_from
+		match = min(prices, key=lambda p: (not p.customer, p.uom != uom), default=None)
+		return flt(match.price_list_rate) if match else 0.0
+
+
+def price_rows(rows, book: PriceBook, customer=None) -> float:
+	"""Fill missing name/UOM/rate and set sr_item_amount on each row; returns the total."""
+	total = 0.0
+	for row in rows:
+		item = book.items.get(row.sr_item_code)
+		if item and not row.sr_item_name:
+			row.sr_item_name = item.item_name
+		if not row.sr_item_uom:
+			row.sr_item_uom = book.uom(row.sr_item_code)
+		if not flt(row.sr_item_rate):
+			row.sr_item_rate = book.rate(row.sr_item_code, row.sr_item_uom, customer)
+		row.sr_item_amount = flt(row.sr_item_qty) * flt(row.sr_item_rate)
+		total += row.sr_item_amount
+	return total
+
+
+def on_encounter_validate(doc, method=None):
+	"""Patient Encounter validate: price the Draft Invoice rows of Order encounters."""
+	if doc.get("sr_encounter_type") != "Order" or not doc.get(ITEM_TABLE):
+		return
+	rows = doc.get(ITEM_TABLE)
+	customer = frappe.db.get_value("Patient", doc.patient, "customer") if doc.get("patient") else None
+	book = PriceBook([r.sr_item_code for r in rows], date=doc.get("encounter_date"), customers=[customer])
+	total = price_rows(rows, book, customer)
+	if flt(doc.get("sr_pe_paid_amount")) > total:
+		frappe.msgprint(
+			_("Advance paid ({0}) is more than the order total ({1})").format(doc.sr_pe_paid_amount, total),
+			alert=True,
+		)
+
+
+# ----------------- conversion -----------------
+
+
+def _existing_invoices(encounters: list[str]) -> dict[str, str]:
+	"""{encounter: sales invoice} for encounters already converted (non-cancelled)."""
+	if not encounters:
+		return {}
+	sii = frappe.qb.DocType("Sales Invoice Item")
+	rows = (
+		frappe.qb.from_(sii)
+		.select(sii.reference_dn, sii.parent)
+		.where(
+			(sii.reference_dt == "Patient Encounter")
+			& sii.reference_dn.isin(encounters)
+			& (sii.docstatus < 2)
+		)
+		.run()
+	)
+	return dict(rows)
+
+
+@frappe.whitelist(methods=["POST"])
+def convert_encounter(encounter, submit=1):
+	"""Create the Sales Invoice (and advance Payment Entry) for one Order encounter."""
+	frappe.has_permission("Sales Invoice", "create", throw=True)
+	doc = frappe.get_doc("Patient Encounter", encounter)
+	doc.check_permission("read")
+	existing = _existing_invoices([doc.name]).get(doc.name)
+	if existing:
+		frappe.throw(_("Encounter {0} is already invoiced in {1}").format(doc.name, existing))
+
+	rows = doc.get(ITEM_TABLE)
+	customer = frappe.db.get_value("Patient", doc.patient, "customer")
+	book = PriceBook([r.sr_item_code for r in rows], date=doc.get("encounter_date"), customers=[customer])
+	return _convert(doc, book, int(submit))
+
+
+def _convert(doc, book: PriceBook, submit: int = 1) -> dict:
+	"""Sales Invoice + Payment Entry for `doc` under one savepoint (all or nothing)."""
+	if doc.get("sr_encounter_type") != "Order":
+		frappe.throw(_("Only Order encounters can be invoiced"))
+	rows = doc.get(ITEM_TABLE)
+	if not rows:
+		frappe.throw(_("Encounter {0} has no order items").format(doc.name))
+	customer = frappe.db.get_value("Patient", doc.patient, "customer")
+	if not customer:
+		frappe.throw(_("Patient {0} has no Customer").format(doc.patient))
+
+	price_rows(rows, book, customer)
+	savepoint = "sr_draft_invoice"
+	frappe.db.savepoint(savepoint)
+	try:
+		si = frappe.get_doc(
+			{
+				"doctype": "Sales Invoice",
+				"customer": customer,
+				"patient": doc.patient,
+				"company": doc.get("company") or frappe.defaults.get_user_default("Company"),
+				"posting_date": doc.get("encounter_date") or nowdate(),
+				"set_posting_time": 1,
+				"selling_price_list": book.price_list,
+				"items": [
+					{
+						"item_code": r.sr_item_code,
+						"item_name": r.sr_item_name,
+						"description": r.sr_item_description or r.sr_item_name,
+						"uom": r.sr_item_uom,
+						"qty": r.sr_item_qty,
+						"rate": r.sr_item_rate,
+						"reference_dt": "Patient Encounter",
+						"reference_dn": doc.name,
+					}
+					for r in rows
+				],
+			}
+		)
+		si.set_missing_values()
+		si.insert()
+		if submit:
+			si.submit()
+
+		pe = None
+		if submit and flt(doc.get("sr_pe_paid_amount")) > 0:
+			pe = _advance_payment(doc, si)
+	except Exception:
+		frappe.db.rollback(save_point=savepoint)
+		raise
+
+	return {"encounter": doc.name, "sales_invoice": si.name, "payment_entry": pe and pe.name}
+
+
+def _advance_payment(doc, si):
+	from erpnext.accounts.doctype.payment_entry.payment_entry import get_payment_entry
+	from erpnext.accounts.doctype.sales_invoice.sales_invoice import get_bank_cash_account
+
+	amount = min(flt(doc.sr_pe_paid_amount), flt(si.outstanding_amount))
+	pe = get_payment_entry("Sales Invoice", si.name, party_amount=amount)
+	if doc.get("sr_pe_mode_of_payment"):
+		pe.mode_of_payment = doc.sr_pe_mode_of_payment
+		account = get_bank_cash_account(doc.sr_pe_mode_of_payment, si.company).get("account")
+		if account:
+			pe.paid_to = account
+	pe.reference_no = doc.get("sr_pe_payment_reference_no") or doc.name
+	pe.reference_date = doc.get("sr_pe_payment_reference_date") or si.posting_date
+	pe.insert()
+	pe.submit()
+	return pe
+
+
+# ----------------- bulk mode -----------------
+
+
+@frappe.whitelist(methods=["POST"])
+def enqueue_day_conversion(date=None):
+	"""Convert every not-yet-invoiced Order encounter of `date` in a background job."""
+	frappe.only_for(("Accounts Manager", "System Manager"))
+	date = str(getdate(date or nowdate()))
+	frappe.enqueue(
+		"sriaas_booking.draft_invoice.convert_day",
+		queue="long",
+		job_id=f"sr_draft_invoice::{frappe.local.site}::{date}",
+		deduplicate=True,
+		date=date,
+	)
+	return date
+
+
+def convert_day(date):
+	"""Background job: one PriceBook for the whole day, one commit per encounter."""
+	names = frappe.get_all(
+		"Patient Encounter",
+		filters={"encounter_date": date, "sr_encounter_type": "Order", "docstatus": ["<", 2]},
+		pluck="name",
+	)
+	done = _existing_invoices(names)
+	todo = [frappe.get_doc("Patient Encounter", n) for n in names if n not in done]
+	patients = list({d.patient for d in todo if d.patient})
+	customers = (
+		frappe.get_all("Patient", filters={"name": ["in", patients]}, pluck="customer") if patients else []
+	)
+	book = PriceBook(
+		[r.sr_item_code for d in todo for r in d.get(ITEM_TABLE)], date=date, customers=customers
+	)
+
+	converted, failed = 0, 0
+	for doc in todo:
+		try:
+			_convert(doc, book)
+			frappe.db.commit()
+			converted += 1
+		except Exception:
+			frappe.db.rollback()
+			frappe.log_error(title=f"Draft invoice conversion failed: {doc.name}")
+			failed += 1
+
+	frappe.logger("sriaas_booking").info(
+		{"draft_invoice_day": date, "converted": converted, "failed": failed, "skipped": len(done)}
+	)
@@ -0,0 +1,103 @@
+"""Batched resolution of the Patient Encounter header copies.
+
+`sr_pe_mobile`, `sr_pe_id`, `sr_pe_deptt`, `sr_pe_age` (from Patient) and the three
+`sr_*_practitioner_name` fields (from Healthcare Practitioner) used to be filled by
+`fetch_from`, one link lookup each. They are filled here instead, from one query per
+linked doctype, memoized on `frappe.local` for the rest of the request or job.
+"""
+
+import frappe
+
+from sriaas_booking.schema import practitioner_name_field
+
+# Encounter field → Patient field
+PATIENT_HEADER = {
+	"sr_pe_mobile": "mobile",
+	"sr_pe_id": "sr_patient_id",
+	"sr_pe_deptt": "sr_medical_department",
+	"sr_pe_age": "sr_patient_age",
+}
+
+# Encounter practitioner link → Encounter name field
+PRACTITIONER_HEADER = {
+	"sr_ayurvedic_practitioner": "sr_ayurvedic_practitioner_name",
+	"sr_homeopathy_practitioner": "sr_homeopathy_practitioner_name",
+	"sr_allopathy_practitioner": "sr_allopathy_practitioner_name",
+}
+
+
+def _memo() -> dict:
+	if not hasattr(frappe.local, "sr_encounter_header"):
+		frappe.local.sr_encounter_header = {"Patient": {}, "Healthcare Practitioner": {}}
+	return frappe.local.sr_encounter_header
+
+
+def prime(encounters: list):
+	"""Load every Patient / Practitioner the encounters link to that is not memoized yet.
+
+	Accepts docs or plain dicts, so bulk importers can call it once before inserting.
+	"""
+	memo = _memo()
+
+	patients = {e.get("patient") for e in encounters} - set(memo["Patient"]) - {None, ""}
+	if patients:
+		for r in frappe.get_all(
+			"Patient", filters={"name": ["in", list(patients)]}, fields=["name", *PATIENT_HEADER.values()]
+		):
+			memo["Patient"][r.name] = r
+
+	practitioners = (
+		{e.get(f) for e in encounters for f in PRACTITIONER_HEADER}
+		- set(memo["Healthcare Practitioner"])
+		- {None, ""}
+	)
+	if practitioners:
+		name_field = practitioner_name_field()
+		memo["Healthcare Practitioner"].update(
+			frappe.get_all(
+				"Healthcare Practitioner",
+				filters={"name": ["in", list(practitioners)]},
+				fields=["name", name_field],
+				as_list=True,
+			)
+		)
+
+
+def resolve(encounter) -> dict:
+	"""Header values for one encounter (doc or dict) from the memo."""
+	prime([encounter])
+	memo = _memo()
+	patient = memo["Patient"].get(encounter.get("patient")) or {}
+	out = {target: patient.get(source) for target, source in PATIENT_HEADER.items()}
+	for link, target in PRACTITIONER_HEADER.items():
+		out[target] = memo["Healthcare Practitioner"].get(encounter.get(link))
+	return out
+
+
+def apply_header(doc, method=None):
+	"""Patient Encounter before_validate."""
+	doc.update(resolve(doc))
+
+
+def invalidate(doc, method=None):
+	"""Patient / Healthcare Practitioner on_update: drop the memoized row.
+
+	The memo lives for one request or job, but a job (bulk import, day conversion)
+	can save a Patient and then insert encounters for it; without this those
+	encounters would copy the values read before the save.
+	"""
+	_memo().get(doc.doctype, {}).pop(doc.name, None)
+
+
+@frappe.whitelist()
+def get_header(encounter):
+	"""Header values for an unsaved encounter in one call (public/js/patient_encounter.js, on link change)."""
+	encounter = frappe._dict(frappe.parse_json(encounter))
+	frappe.has_permission("Patient Encounter", "read", throw=True)
+	# the same record-level checks fetch_from's link lookup made
+	if encounter.get("patient"):
+		frappe.has_permission("Patient", "read", encounter.patient, throw=True)
+	for field in PRACTITIONER_HEADER:
+		if encounter.get(field):
+			frappe.has_permission("Healthcare Practitioner", "read", encounter.get(field), throw=True)
+	return resolve(encounter)
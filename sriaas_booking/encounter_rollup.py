@@ -0,0 +1,153 @@
+"""Encounter counts per day x type x place x status x source x sales type.
+
+`SR Encounter Rollup` holds one counter row per combination; its name is the md5
+of the combination, so doc_events apply +1/-1 deltas with a single
+`INSERT ... ON DUPLICATE KEY UPDATE` (MariaDB). Cancelled encounters are not
+counted. Dashboards read the rollup instead of grouping Patient Encounter.
+"""
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.utils import getdate, now
+
+ROLLUP_DT = "SR Encounter Rollup"
+
+# rollup field → Patient Encounter field
+DIMENSIONS = {
+	"sr_date": "encounter_date",
+	"sr_encounter_type": "sr_encounter_type",
+	"sr_encounter_place": "sr_encounter_place",
+	"sr_encounter_status": "sr_encounter_status",
+	"sr_encounter_source": "sr_encounter_source",
+	"sr_sales_type": "sr_sales_type",
+}
+
+
+def _key(doc) -> tuple:
+	values = []
+	for source in DIMENSIONS.values():
+		value = doc.get(source)
+		values.append(str(getdate(value)) if source == "encounter_date" and value else (value or ""))
+	return tuple(values)
+
+
+def _row_name(key: tuple) -> str:
+	# Must match the MD5(CONCAT_WS('|', IFNULL(...))) used by rebuild_rollup
+	return hashlib.md5("|".join(key).encode()).hexdigest()
+
+
+def _apply_deltas(deltas: dict[tuple, int]):
+	ts = now()
+	for key, delta in deltas.items():
+		if not delta:
+			continue
+		frappe.db.sql(
+			f"""
+            INSERT INTO `tab{ROLLUP_DT}`
+                (name, creation, modified, owner, modified_by, {", ".join(DIMENSIONS)}, sr_count)
+            VALUES (%s, %s, %s, 'Administrator', 'Administrator', {", ".join(["%s"] * len(DIMENSIONS))}, %s)
+            ON DUPLICATE KEY UPDATE sr_count = sr_count + VALUES(sr_count), modified = VALUES(modified)
+            """,
+			(_row_name(key), ts, ts, *[v or None for v in key], delta),
+		)
+
+
+# ----------------- doc_events (Patient Encounter) -----------------
+
+
+def on_encounter_insert(doc, method=None):
+	"""after_insert"""
+	_apply_deltas({_key(doc): 1})
+
+
+def on_encounter_update(doc, method=None):
+	"""on_update / on_update_after_submit: move the count when any dimension changed."""
+	before = doc.get_doc_before_save()
+	if not before or doc.docstatus == 2:
+		return
+	old, new = _key(before), _key(doc)
+	if old != new:
+		_apply_deltas({old: -1, new: 1})
+
+
+def on_encounter_cancel(doc, method=None):
+	_apply_deltas({_key(doc): -1})
+
+
+def on_encounter_trash(doc, method=None):
+	if doc.docstatus != 2:  # cancelled ones were already taken out
+		_apply_deltas({_key(doc): -1})
+
+
+# ----------------- rebuild -----------------
+
+
+def rebuild_rollup():
+	"""Recount from scratch with one INSERT ... SELECT ... GROUP BY (single transaction).
+
+	bench --site <site> execute sriaas_booking.encounter_rollup.rebuild_rollup
+	"""
+	from sriaas_booking.archive import PE, archive_table
+
+	pe_cols = list(DIMENSIONS.values())
+	key_sql = ", ".join(f"IFNULL({c}, '')" for c in pe_cols)
+	# archived encounters (see archive.py) still count
+	source = f"SELECT {', '.join(pe_cols)} FROM `tab{PE}` WHERE docstatus < 2"
+	if frappe.db.sql("SHOW TABLES LIKE %s", (archive_table(PE),)):
+		source += f" UNION ALL SELECT {', '.join(pe_cols)} FROM `{archive_table(PE)}` WHERE docstatus < 2"
+	frappe.db.delete(ROLLUP_DT)
+	frappe.db.sql(
+		f"""
+        INSERT INTO `tab{ROLLUP_DT}`
+            (name, creation, modified, owner, modified_by, {", ".join(DIMENSIONS)}, sr_count)
+        SELECT MD5(CONCAT_WS('|', {key_sql})), NOW(), NOW(), 'Administrator', 'Administrator',
+               {", ".join(f"NULLIF(MAX({c}), '')" for c in pe_cols)}, COUNT(*)
+        FROM ({source}) pe
+        GROUP BY {key_sql}
+        """
+	)
+	frappe.db.commit()
+
+
+# ----------------- query API -----------------
+
+
+@frappe.whitelist()
+def get_counts(from_date=None, to_date=None, group_by=None, filters=None) -> list[dict]:
+	"""Summed counts grouped by any of the rollup dimensions.
+
+	`group_by` is a list of rollup fields (e.g. ["sr_date", "sr_encounter_status"]);
+	`filters` is a dict on the same fields.
+	"""
+	frappe.has_permission("Patient Encounter", "read", throw=True)
+	group_by = frappe.parse_json(group_by) or []
+	filters = frappe.parse_json(filters) or {}
+	unknown = (set(group_by) | set(filters)) - set(DIMENSIONS)
+	if unknown:
+		frappe.throw(_("Unknown rollup fields: {0}").format(", ".join(sorted(unknown))))
+
+	r = frappe.qb.DocType(ROLLUP_DT)
+	query = frappe.qb.from_(r).select(
+		*[r[f] for f in group_by], frappe.qb.functions.Sum(r.sr_count).as_("count")
+	)
+	if from_date:
+		query = query.where(r.sr_date >= getdate(from_date))
+	if to_date:
+		query = query.where(r.sr_date <= getdate(to_date))
+	for field, value in filters.items():
+		query = query.where(r[field] == value)
+	if group_by:
+		query = query.groupby(*[r[f] for f in group_by]).orderby(*[r[f] for f in group_by])
+	return query.run(as_dict=True)
+
+
+@frappe.whitelist()
+def encounter_count_card(filters=None):
+	"""Number Card (type Custom) method: encounters matching rollup `filters`, today unless dated."""
+	filters = frappe.parse_json(filters) or {}
+	from_date = filters.pop("from_date", None) or getdate()
+	to_date = filters.pop("to_date", None) or from_date
+	rows = get_counts(from_date, to_date, filters=filters)
+	return {"value": (rows[0].count if rows else 0) or 0, "fieldtype": "Int"}
@@ -0,0 +1,77 @@
+"""Daily follow-up marking, sharded on the Patient follow-up marker.
+
+`sr_followup_day` (Mon-Sat) x `sr_followup_id` (0-9) splits patients into 60
+buckets. Each day only today's day bucket is touched, and its ten ID shards run
+as separate background jobs.
+"""
+
+import time
+
+import frappe
+from frappe.query_builder.functions import IfNull
+from frappe.utils import getdate, now
+
+DAY_CODES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat")  # Sunday has no bucket
+SHARD_IDS = tuple(str(i) for i in range(10))
+TIMING_CACHE_KEY = "sriaas_booking:followup_shard_timing"
+
+
+def enqueue_todays_followups():
+	"""Scheduler entry (daily): fan today's ten shards out to the long queue."""
+	day = _day_code()
+	if not day:
+		return
+	for shard in SHARD_IDS:
+		frappe.enqueue(
+			"sriaas_booking.followup.process_shard",
+			queue="long",
+			job_id=f"sr_followup::{frappe.local.site}::{day}::{shard}",
+			deduplicate=True,
+			day=day,
+			shard=shard,
+		)
+
+
+def process_shard(day: str, shard: str):
+	"""Mark every eligible patient of one (day, shard) bucket as Pending in one UPDATE.
+
+	Patients with a follow-up disable reason, or already Pending, are skipped; a
+	NULL status (the default) counts as not Pending.
+	"""
+	started = time.monotonic()
+	patient = frappe.qb.DocType("Patient")
+	(
+		frappe.qb.update(patient)
+		.set(patient.sr_followup_status, "Pending")
+		.set(patient.modified, now())
+		.where(patient.sr_followup_day == day)
+		.where(patient.sr_followup_id == shard)
+		.where(IfNull(patient.sr_followup_disable_reason, "") == "")
+		.where(IfNull(patient.sr_followup_status, "") != "Pending")
+	).run()
+	count = max(frappe.db._cursor.rowcount or 0, 0)
+	frappe.db.commit()
+
+	_record_timing(day, shard, count, time.monotonic() - started)
+
+
+def _day_code(date=None) -> str | None:
+	weekday = getdate(date).weekday()
+	return DAY_CODES[weekday] if weekday < len(DAY_CODES) else None
+
+
+# ----------------- per-shard timing -----------------
+
+
+def _record_timing(day: str, shard: str, rows: int, seconds: float):
+	stats = {"day": day, "shard": shard, "rows": rows, "seconds": round(seconds, 3), "ran_at": now()}
+	frappe.cache.hset(TIMING_CACHE_KEY, f"{day}:{shard}", stats)
+	frappe.logger("sriaas_booking").info({"followup_shard": stats})
+
+
+@frappe.whitelist()
+def get_shard_report() -> list[dict]:
+	"""Last run per (day, shard), slowest first — use it to rebalance hot shards."""
+	frappe.only_for("System Manager")
+	stats = frappe.cache.hgetall(TIMING_CACHE_KEY) or {}
+	return sorted(stats.values(), key=lambda s: s["seconds"], reverse=True)
@@ -1,5 +1,5 @@
-app_name = "sriaas_booking"          # python package name
-app_title = "Sriaas Booking"         # human label
+app_name = "sriaas_booking"  # python package name
+app_title = "Sriaas Booking"  # human label
 app_publisher = "Jitendra Kumar"
 app_description = "An app to automate sriaas workspace and flows"
 app_email = "webdevelopersriaas@gmail.com"
@@ -10,6 +10,8 @@ after_migrate = "sriaas_booking.install.after_migrate"
 
 before_uninstall = "sriaas_booking.uninstall.before_uninstall"
 
+boot_session = "sriaas_booking.masters.boot_session"
+
 # Apps
 # ------------------
 
@@ -30,11 +32,10 @@ before_uninstall = "sriaas_booking.uninstall.before_uninstall"
 # ------------------
 
 # include js, css files in header of desk.html
-app_include_css = "/assets/sriaas_booking/css/sriaas_booking.css"
-# app_include_js = "/assets/sriaas_booking/js/sriaas_booking.js"
+app_include_css = "sriaas_booking.bundle.css"
+app_include_js = "sriaas_booking.bundle.js"
 
 # include js, css files in header of web template
-web_include_css = "/assets/sriaas_booking/css/sriaas_booking.css"
 # web_include_js = "/assets/sriaas_booking/js/sriaas_booking.js"
 
 # include custom scss in every website theme (without file extension ".scss")
@@ -48,7 +49,10 @@ web_include_css = "/assets/sriaas_booking/css/sriaas_booking.css"
 # page_js = {"page" : "public/js/file.js"}
 
 # include js in doctype views
-# doctype_js = {"doctype" : "public/js/doctype.js"}
+doctype_js = {
+	"Patient": "public/js/patient.js",
+	"Patient Encounter": "public/js/patient_encounter.js",
+}
 # doctype_list_js = {"doctype" : "public/js/doctype_list.js"}
 # doctype_tree_js = {"doctype" : "public/js/doctype_tree.js"}
 # doctype_calendar_js = {"doctype" : "public/js/doctype_calendar.js"}
@@ -150,6 +154,110 @@ web_include_css = "/assets/sriaas_booking/css/sriaas_booking.css"
 # 	}
 # }
 
+doc_events = {
+	"Patient Encounter": {
+		"before_validate": "sriaas_booking.encounter_header.apply_header",
+		"validate": [
+			"sriaas_booking.masters.validate_master_links",
+			"sriaas_booking.draft_invoice.on_encounter_validate",
+		],
+		"after_insert": [
+			"sriaas_booking.encounter_rollup.on_encounter_insert",
+			"sriaas_booking.pe_launcher.on_encounter_insert",
+			"sriaas_booking.pe_launcher.invalidate",
+		],
+		"on_update": [
+			"sriaas_booking.encounter_rollup.on_encounter_update",
+			"sriaas_booking.pe_launcher.invalidate",
+		],
+		"on_update_after_submit": [
+			"sriaas_booking.encounter_rollup.on_encounter_update",
+			"sriaas_booking.pe_launcher.invalidate",
+		],
+		"on_cancel": [
+			"sriaas_booking.encounter_rollup.on_encounter_cancel",
+			"sriaas_booking.pe_launcher.invalidate",
+		],
+		"on_trash": [
+			"sriaas_booking.encounter_rollup.on_encounter_trash",
+			"sriaas_booking.pe_launcher.on_encounter_trash",
+			"sriaas_booking.pe_launcher.invalidate",
+		],
+	},
+	"Patient": {
+		"onload": "sriaas_booking.pe_launcher.on_patient_load",
+		"before_insert": "sriaas_booking.id_allocator.set_patient_id",
+		"on_update": [
+			"sriaas_booking.encounter_header.invalidate",
+			"sriaas_booking.patient_search.on_patient_update",
+		],
+		"on_trash": "sriaas_booking.patient_search.on_patient_trash",
+	},
+	"Customer": {
+		"before_insert": "sriaas_booking.id_allocator.set_customer_id",
+	},
+	"Medical Department": {
+		"after_insert": "sriaas_booking.id_allocator.on_medical_department_insert",
+	},
+	"Healthcare Practitioner": {
+		"on_update": "sriaas_booking.encounter_header.invalidate",
+	},
+	"SR Medication Template": {
+		"on_update": "sriaas_booking.medication_templates.invalidate_template",
+		"on_trash": "sriaas_booking.medication_templates.invalidate_template",
+		"after_rename": "sriaas_booking.medication_templates.invalidate_all",
+	},
+	"SR Instructions": {
+		"on_update": [
+			"sriaas_booking.medication_templates.invalidate_all",
+			"sriaas_booking.masters.invalidate",
+		],
+		"on_trash": "sriaas_booking.masters.invalidate",
+		"after_rename": "sriaas_booking.masters.invalidate",
+	},
+	"SR Sales Type": {
+		"on_update": "sriaas_booking.masters.invalidate",
+		"on_trash": "sriaas_booking.masters.invalidate",
+		"after_rename": "sriaas_booking.masters.invalidate",
+	},
+	"SR Encounter Status": {
+		"on_update": "sriaas_booking.masters.invalidate",
+		"on_trash": "sriaas_booking.masters.invalidate",
+		"after_rename": "sriaas_booking.masters.invalidate",
+	},
+	"SR Delivery Type": {
+		"on_update": "sriaas_booking.masters.invalidate",
+		"on_trash": "sriaas_booking.masters.invalidate",
+		"after_rename": "sriaas_booking.masters.invalidate",
+	},
+	"SR Patient Disable Reason": {
+		"on_update": "sriaas_booking.masters.invalidate",
+		"on_trash": "sriaas_booking.masters.invalidate",
+		"after_rename": "sriaas_booking.masters.invalidate",
+	},
+	"Medication": {
+		"on_update": "sriaas_booking.medication_templates.invalidate_all",
+	},
+	"Item": {
+		"on_update": "sriaas_booking.medication_templates.invalidate_all",
+	},
+	"Sales Invoice": {
+		"on_submit": "sriaas_booking.patient_views.on_sales_invoice_change",
+		"on_cancel": "sriaas_booking.patient_views.on_sales_invoice_change",
+		"on_update_after_submit": "sriaas_booking.patient_views.on_sales_invoice_change",
+	},
+	"Payment Entry": {
+		"on_submit": "sriaas_booking.patient_views.on_payment_entry_change",
+		"on_cancel": "sriaas_booking.patient_views.on_payment_entry_change",
+		"on_update_after_submit": "sriaas_booking.patient_views.on_payment_entry_change",
+	},
+	"Journal Entry": {
+		"on_submit": "sriaas_booking.patient_views.on_journal_entry_change",
+		"on_cancel": "sriaas_booking.patient_views.on_journal_entry_change",
+		"on_update_after_submit": "sriaas_booking.patient_views.on_journal_entry_change",
+	},
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -171,6 +279,20 @@ web_include_css = "/assets/sriaas_booking/css/sriaas_booking.css"
 # 	],
 # }
 
+scheduler_events = {
+	"hourly": [
+		"sriaas_booking.request_profiler.flush_profiles",
+	],
+	"daily": [
+		"sriaas_booking.followup.enqueue_todays_followups",
+	],
+	"daily_long": [
+		"sriaas_booking.patient_views.reconcile_payment_views",
+		"sriaas_booking.patient_age.recompute_patient_ages",
+		"sriaas_booking.archive.archive_old_encounters",
+	],
+}
+
 # Testing
 # -------
 
@@ -201,8 +323,9 @@ web_include_css = "/assets/sriaas_booking/css/sriaas_booking.css"
 
 # Request Events
 # ----------------
-# before_request = ["sriaas_booking.utils.before_request"]
-# after_request = ["sriaas_booking.utils.after_request"]
+# Opt-in SQL profiling of Patient / Patient Encounter form loads and saves (request_profiler.py)
+before_request = ["sriaas_booking.request_profiler.before_request"]
+after_request = ["sriaas_booking.request_profiler.after_request"]
 
 # Job Events
 # ----------
@@ -246,4 +369,3 @@ web_include_css = "/assets/sriaas_booking/css/sriaas_booking.css"
 # default_log_clearing_doctypes = {
 # 	"Logging DocType Name": 30  # days to retain logs
 # }
-
@@ -0,0 +1,169 @@
+"""Block allocation of `sr_patient_id` / `sr_customer_id` per Medical Department.
+
+Each (field, department) series is backed by a database SEQUENCE whose increment
+is BLOCK_SIZE. One NEXTVAL therefore reserves a whole block atomically and outside
+the transaction: sequences are not transactional, so there is no row lock to wait
+on and no MAX()+1 race. A worker hands the block out from memory and calls NEXTVAL
+again when the block runs out. IDs of a block that a restarting worker never
+handed out are skipped, so series have gaps but no duplicates.
+
+Sequences are created on migrate for every department (a missing one also defeats
+the migrate fast path) and by a background job on Medical Department insert, never
+inside a request. A new sequence starts after the highest ID in use with its prefix.
+"""
+
+import hashlib
+import re
+import threading
+
+import frappe
+from frappe import _
+from frappe.database.sequence import create_sequence, get_next_sequence_val
+
+BLOCK_SIZE = 20
+GENERAL = "GEN"  # series used when no department is set
+
+# field → (doctype holding it, ID prefix before the department code)
+SERIES = {
+	"sr_patient_id": ("Patient", "P"),
+	"sr_customer_id": ("Customer", "C"),
+}
+NUMBER_WIDTH = 6
+MAX_CODE = 24  # "sr_sr_customer_id_" + code + "_id_seq" <= 64
+
+_blocks: dict[tuple, list[int]] = {}  # (site, sequence) → [next, end)
+_lock = threading.Lock()
+
+
+def department_code(department: str | None) -> str:
+	"""Stable short code of a department name ("Homeopathy" → "HOMEOPATHY"), GEN when unset.
+
+	Long names are cut to MAX_CODE characters, ending in a hash of the full name, so
+	the sequence name stays within MariaDB's 64-character identifier limit.
+	"""
+	code = re.sub(r"[^0-9A-Z]", "", (department or "").upper()) or GENERAL
+	if len(code) > MAX_CODE:
+		code = code[: MAX_CODE - 6] + hashlib.md5(code.encode()).hexdigest()[:6].upper()
+	return code
+
+
+def _sequence(field: str, code: str) -> str:
+	# create_sequence/get_next_sequence_val scrub this and append "_id_seq"
+	return f"sr {field} {code}"
+
+
+def _prefix(field: str, code: str) -> str:
+	return f"{SERIES[field][1]}{code}-"
+
+
+def allocate(field: str, department: str | None = None) -> str:
+	"""Next ID of the department's series for `field`, served from the worker's reserved block."""
+	code = department_code(department)
+	key = (frappe.local.site, _sequence(field, code))
+	with _lock:
+		block = _blocks.get(key)
+		if not block or block[0] >= block[1]:
+			start = _reserve(field, code)
+			block = _blocks[key] = [start, start + BLOCK_SIZE]
+		number = block[0]
+		block[0] += 1
+	return f"{_prefix(field, code)}{number:0{NUMBER_WIDTH}d}"
+
+
+def _reserve(field: str, code: str) -> int:
+	try:
+		return int(get_next_sequence_val(_sequence(field, code)))
+	except Exception as e:
+		if not frappe.db.is_table_missing(e):
+			raise
+	# Department added moments ago and its enqueued creation has not run yet. CREATE
+	# SEQUENCE is DDL (implicit commit), so it must never run inside this transaction.
+	# not after commit: the throw below rolls this transaction back
+	frappe.enqueue(
+		"sriaas_booking.id_allocator.ensure_sequences",
+		job_id=f"sr_id_sequences::{frappe.local.site}",
+		deduplicate=True,
+	)
+	frappe.throw(
+		_("The {0} series for this department is being set up, please retry in a minute").format(field)
+	)
+
+
+# ----------------- sequences -----------------
+
+
+def ensure_sequence(field: str, code: str):
+	"""Create the series' sequence (DDL, so it commits) starting after the highest ID in use."""
+	doctype = SERIES[field][0]
+	prefix = _prefix(field, code)
+	current = (
+		frappe.db.sql(
+			f"""SELECT MAX(CAST(SUBSTRING(`{field}`, %s) AS UNSIGNED)) FROM `tab{doctype}` WHERE `{field}` LIKE %s""",
+			(len(prefix) + 1, f"{prefix}%"),
+		)[0][0]
+		or 0
+	)
+	create_sequence(
+		_sequence(field, code),
+		check_not_exists=True,
+		cache=0,
+		start_value=int(current) + 1,
+		increment_by=BLOCK_SIZE,
+	)
+
+
+def missing_sequences(departments: list[str] | None = None) -> list[tuple[str, str]]:
+	"""(field, code) of every series without its sequence; two reads, also used by the migrate fast path."""
+	if departments is None:
+		departments = frappe.get_all("Medical Department", pluck="name")
+	codes = {GENERAL} | {department_code(d) for d in departments}
+	existing = set(
+		frappe.db.sql_list(
+			"SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE() AND table_type = 'SEQUENCE'"
+		)
+	)
+	return [
+		(field, code)
+		for field in SERIES
+		for code in sorted(codes)
+		if f"{frappe.scrub(_sequence(field, code))}_id_seq" not in existing
+	]
+
+
+def ensure_sequences(departments: list[str] | None = None):
+	"""Create the missing series sequences (migrate / background job only: DDL commits)."""
+	for field, code in missing_sequences(departments):
+		ensure_sequence(field, code)
+
+
+def drop_sequences():
+	"""Drop every series sequence (uninstall)."""
+	for name in frappe.db.sql_list(
+		"SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE() AND table_type = 'SEQUENCE' AND table_name LIKE %s",
+		("sr\\_sr\\_%",),
+	):
+		frappe.db.sql_ddl(f"DROP SEQUENCE IF EXISTS `{name}`")
+
+
+# ----------------- doc_events -----------------
+
+
+def on_medical_department_insert(doc, method=None):
+	"""Medical Department after_insert: create its sequences once the insert has committed."""
+	frappe.enqueue(
+		"sriaas_booking.id_allocator.ensure_sequences",
+		enqueue_after_commit=True,
+		departments=[doc.name],
+	)
+
+
+def set_patient_id(doc, method=None):
+	"""Patient before_insert: assign sr_patient_id unless the caller supplied one."""
+	if not doc.get("sr_patient_id"):
+		doc.sr_patient_id = allocate("sr_patient_id", doc.get("sr_medical_department"))
+
+
+def set_customer_id(doc, method=None):
+	"""Customer before_insert: assign sr_customer_id; callers may pass the department in flags."""
+	if not doc.get("sr_customer_id"):
+		doc.sr_customer_id = allocate("sr_customer_id", doc.flags.get("sr_medical_department"))
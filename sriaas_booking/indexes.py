@@ -0,0 +1,82 @@
+"""Database indexes for the lookup fields this app adds (declared in schema.INDEXES)."""
+
+import frappe
+
+from sriaas_booking import schema
+
+
+def index_name(columns) -> str:
+	return ("sr_idx_" + "_".join(c.removeprefix("sr_") for c in columns))[:64]
+
+
+def _live_indexes(doctype: str) -> dict[str, tuple]:
+	"""{index name: (col1, col2, ...)} for the doctype's table."""
+	out = {}
+	for r in frappe.db.sql(f"SHOW INDEX FROM `tab{doctype}`", as_dict=True):
+		out.setdefault(r.Key_name, []).append((r.Seq_in_index, r.Column_name))
+	return {name: tuple(c for _seq, c in sorted(cols)) for name, cols in out.items()}
+
+
+def _covered(columns, live: dict[str, tuple]) -> str | None:
+	"""Name of an existing index whose leading columns are `columns`, if any."""
+	columns = tuple(columns)
+	for name, cols in live.items():
+		if cols[: len(columns)] == columns:
+			return name
+	return None
+
+
+def missing_indexes(indexes: dict[str, list[tuple]]) -> dict[str, list[tuple]]:
+	"""Declared indexes not covered by any live index (one SHOW INDEX per doctype)."""
+	out = {}
+	for dt, specs in indexes.items():
+		live = _live_indexes(dt)
+		missing = [tuple(cols) for cols in specs if not _covered(cols, live)]
+		if missing:
+			out[dt] = missing
+	return out
+
+
+def ensure_indexes(indexes: dict[str, list[tuple]]):
+	"""Create declared indexes that are missing; existing/covered ones are left alone."""
+	for dt, specs in missing_indexes(indexes).items():
+		for cols in specs:
+			frappe.db.add_index(dt, list(cols), index_name(cols))
+
+
+@frappe.whitelist()
+def index_report() -> list[dict]:
+	"""Status of every declared index: present/missing, and read counts where MariaDB tracks them.
+
+	Usage counts come from information_schema.INDEX_STATISTICS, which MariaDB only
+	fills with `userstat=1`; otherwise `rows_read` is None and unused indexes cannot be told apart.
+	"""
+	frappe.only_for("System Manager")
+
+	usage = None
+	if frappe.db.sql("SELECT @@userstat")[0][0]:
+		usage = {
+			(r.TABLE_NAME, r.INDEX_NAME): r.ROWS_READ
+			for r in frappe.db.sql(
+				"SELECT TABLE_NAME, INDEX_NAME, ROWS_READ FROM information_schema.INDEX_STATISTICS WHERE TABLE_SCHEMA = %s",
+				frappe.conf.db_name,
+				as_dict=True,
+			)
+		}
+
+	report = []
+	for dt, specs in schema.INDEXES.items():
+		live = _live_indexes(dt)
+		for cols in specs:
+			name = _covered(cols, live)
+			rows_read = None if usage is None or not name else usage.get((f"tab{dt}", name), 0)
+			report.append(
+				{
+					"doctype": dt,
+					"columns": ", ".join(cols),
+					"index": name,
+					"status": "missing" if not name else ("unused" if rows_read == 0 else "present"),
+					"rows_read": rows_read,
+				}
+			)
+	return report
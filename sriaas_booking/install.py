@@ -1,607 +1,290 @@
+import copy
+
 import frappe
 from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
 
-MODULE_DEF_NAME = "Sriaas Booking"   # the Module Def shown in Desk
-APP_PY_MODULE   = "sriaas_booking"   # your app's python package name
+from sriaas_booking import id_allocator, schema
+from sriaas_booking.indexes import ensure_indexes, missing_indexes
+from sriaas_booking.profiling import StepProfiler
+
+MODULE_DEF_NAME = schema.MODULE_DEF_NAME  # the Module Def shown in Desk
+APP_PY_MODULE = "sriaas_booking"  # your app's python package name
+SCHEMA_HASH_KEY = "sriaas_booking_schema_hash"  # global default holding the last applied fingerprint
+
 
 def after_install():
-    _setup_everything()
+	_setup_everything(force=True, hook="after_install")
+
 
 def after_migrate():
-    _setup_everything()
-
-def _setup_everything():
-    # 0) (optional) Only if you actually ship JSON files for these doctypes.
-    # If you’re creating them in code, you can delete this block.
-    _reload_local_json_doctypes([
-        # put JSON-based doctypes here if you ship them from your app:
-        # "sr_patient_disable_reason", "sr_patient_invoice_view", "sr_patient_payment_view",
-    ])
-
-    # 1) Master doctypes first (anything referenced by Link fields)
-    _ensure_sr_patient_disable_reason()
-    _ensure_sr_patient_invoice_view()
-    _ensure_sr_patient_payment_view()
-    _ensure_sr_sales_type()
-    _ensure_sr_encounter_status()
-    _ensure_sr_instructions()
-    _ensure_sr_medication_template_item()
-    _ensure_sr_medication_template()
-    _ensure_sr_delivery_type()
-    _ensure_sr_order_item()
-
-    # 2) Core doctypes: add/adjust custom fields
-    _make_patient_fields()
-    _make_customer_fields()
-    _make_address_fields()
-    _make_practitioner_fields()
-
-    # 3) Patient Encounter: base fields & sections
-    _make_encounter_fields()                # your earlier Encounter fields
-    _make_clinical_notes_fields()           # “Clinical Notes” section + 4 Small Text fields
-    # _tune_sr_sales_type()                 # depends_on / read_only_depends_on for sr_sales_type
-    _setup_ayurvedic_section()              # rename sb_drug_prescription + 3 fields under it
-    _setup_homeopathy_section()
-    _setup_allopathy_section()
-    _setup_instructions_section()
-    _setup_draft_invoice_tab()
-
-    # 4) Housekeeping
-    _apply_encounter_ui_customizations()
-    _hide_encounter_flags()
-    _make_status_editable()
+	_setup_everything()
+
+
+def _setup_everything(
+	force: bool = False, hook: str = "after_migrate", manifest: dict | None = None, keep_history: bool = True
+) -> dict:
+	"""Apply the schema manifest (see schema.py), writing only what differs from the site.
+
+	A migrate where the manifest fingerprint matches the stored one and every
+	expected record still exists returns after a handful of reads. Every step is
+	profiled (see profiling.py) and the summary is stored per site and returned.
+	`manifest` lets a fleet rollout (commands.py) reuse a manifest built once;
+	`keep_history=False` leaves the stored history alone (benchmarks.py).
+	"""
+	profiler = StepProfiler(hook, keep_history=keep_history)
+
+	# 0) (optional) Only if you actually ship JSON files for these doctypes.
+	with profiler.step("reload_json_doctypes"):
+		_reload_local_json_doctypes(
+			[
+				# put JSON-based doctypes here if you ship them from your app:
+				# "sr_patient_disable_reason", "sr_patient_invoice_view", "sr_patient_payment_view",
+			]
+		)
+
+	ctx = schema.SetupContext()
+	with profiler.step("build_manifest"):
+		if manifest is None:
+			manifest = schema.build_manifest(ctx)
+		digest = schema.fingerprint(manifest)
+
+	# Fast path: nothing changed in code and nothing was removed on the site
+	with profiler.step("fast_path_check"):
+		unchanged = (
+			not force and frappe.db.get_global(SCHEMA_HASH_KEY) == digest and _live_state_complete(manifest)
+		)
+	if unchanged:
+		return profiler.finish(fast_path=True)
+
+	# 1) Master doctypes first (anything referenced by Link fields)
+	with profiler.step("doctypes"):
+		_apply_doctypes(manifest["doctypes"])
+
+	# 2) Custom fields on core doctypes + Patient Encounter
+	with profiler.step("custom_fields"):
+		_apply_custom_fields(manifest["custom_fields"])
+	with profiler.step("field_patches"):
+		_apply_field_patches(manifest["field_patches"])
+
+	# 3) Property setters (labels, collapsible sections, hidden flags, defaults) in one batch
+	with profiler.step("property_setters"):
+		upsert_property_setters(manifest["property_setters"], ctx=ctx)
+
+	# 4) Indexes on the lookup fields created above
+	with profiler.step("indexes"):
+		ensure_indexes(manifest["indexes"])
+
+	# 5) ID sequences for every department (see id_allocator.py)
+	with profiler.step("id_sequences"):
+		id_allocator.ensure_sequences()
+
+	# 6) One meta cache clear per doctype whose setters changed
+	with profiler.step("clear_meta_cache"):
+		ctx.flush()
+
+	frappe.db.set_global(SCHEMA_HASH_KEY, digest)
+	return profiler.finish(fast_path=False)
+
 
 # ----------------- utilities -----------------
 
+
 def _reload_local_json_doctypes(names: list[str]):
-    """Use this only if you ship DocType JSON files in your app.
-       module arg MUST be the python package (e.g., 'sriaas_booking'), not the Module Def label.
-    """
-    for dn in names:
-        try:
-            frappe.reload_doc(APP_PY_MODULE, "doctype", dn)
-        except Exception:
-            pass
-
-def _ps(doc_type, fieldname, prop, value, property_type):
-    """Upsert a Property Setter (idempotent)."""
-    name = f"{doc_type}-{fieldname}-{prop}"
-    if frappe.db.exists("Property Setter", name):
-        ps = frappe.get_doc("Property Setter", name)
-        ps.value = value
-        ps.property_type = property_type
-        ps.save(ignore_permissions=True)
-    else:
-        frappe.get_doc({
-            "doctype":"Property Setter",
-            "doctype_or_field":"DocField",
-            "doc_type":doc_type,
-            "field_name":fieldname,
-            "property":prop,
-            "value":value,
-            "property_type":property_type,
-            "name":name,
-        }).insert(ignore_permissions=True)
+	"""Use this only if you ship DocType JSON files in your app.
+	module arg MUST be the python package (e.g., 'sriaas_booking'), not the Module Def label.
+	"""
+	for dn in names:
+		try:
+			frappe.reload_doc(APP_PY_MODULE, "doctype", dn)
+		except Exception:
+			pass
+
+
+def _norm(value) -> str:
+	"""Compare DB values and manifest values on the same footing (None == "", 1 == "1")."""
+	return "" if value is None else str(value)
+
+
+def _ps_name(doc_type, fieldname, prop) -> str:
+	return f"{doc_type}-{fieldname}-{prop}"
+
+
+PS_INSERT_FIELDS = (
+	"name",
+	"creation",
+	"modified",
+	"owner",
+	"modified_by",
+	"doctype_or_field",
+	"doc_type",
+	"field_name",
+	"property",
+	"value",
+	"property_type",
+)
+
+
+def upsert_property_setters(rows: list[tuple], ctx: schema.SetupContext | None = None) -> int:
+	"""Bulk upsert DocField Property Setters.
+
+	`rows` are (doc_type, fieldname, property, value, property_type) tuples; the last
+	entry wins on duplicates. Existing setters are read in one query, unchanged ones are
+	skipped, new ones go in one bulk INSERT and changed ones in one bulk UPDATE. Meta
+	cache is cleared once per affected doctype, or deferred to `ctx.flush()` when a
+	setup context is passed. Returns the number of setters written.
+	"""
+	wanted = {}
+	for doc_type, fieldname, prop, value, property_type in rows:
+		wanted[_ps_name(doc_type, fieldname, prop)] = (doc_type, fieldname, prop, _norm(value), property_type)
+	if not wanted:
+		return 0
+
+	live = {
+		r.name: r
+		for r in frappe.get_all(
+			"Property Setter",
+			filters={"name": ["in", list(wanted)]},
+			fields=["name", "value", "property_type"],
+		)
+	}
+
+	now, user = frappe.utils.now(), frappe.session.user
+	inserts, updates, touched = [], {}, set()
+	for name, (doc_type, fieldname, prop, value, property_type) in wanted.items():
+		row = live.get(name)
+		if row is None:
+			inserts.append(
+				(name, now, now, user, user, "DocField", doc_type, fieldname, prop, value, property_type)
+			)
+		elif _norm(row.value) != value or row.property_type != property_type:
+			updates[name] = {"value": value, "property_type": property_type}
+		else:
+			continue
+		touched.add(doc_type)
+
+	if inserts:
+		frappe.db.bulk_insert("Property Setter", fields=PS_INSERT_FIELDS, values=inserts)
+	if updates:
+		frappe.db.bulk_update("Property Setter", updates)
+	if ctx:
+		ctx.touched.update(touched)
+	else:
+		for dt in sorted(touched):
+			frappe.clear_cache(doctype=dt)
+
+	return len(inserts) + len(updates)
+
 
 def collapse_field(dt: str, fieldname: str, collapse: bool = True):
-    """
-    Make a Section Break collapsible/uncollapsible.
-    (No-op if the field is missing.)
-    """
-    df = frappe.get_meta(dt).get_field(fieldname)
-    if not df:
-        return
-    # Works best for Section Breaks; harmless otherwise.
-    _ps(dt, fieldname, "collapsible", "1" if collapse else "0", "Check")
+	"""
+	Make a Section Break collapsible/uncollapsible.
+	(No-op if the field is missing.)
+	"""
+	df = frappe.get_meta(dt).get_field(fieldname)
+	if not df:
+		return
+	# Works best for Section Breaks; harmless otherwise.
+	upsert_property_setters([(dt, fieldname, "collapsible", "1" if collapse else "0", "Check")])
+
 
 def set_field_label(dt: str, fieldname: str, new_label: str):
-    """
-    Change a field's label via Property Setter.
-    (No-op if the field is missing.)
-    """
-    if not frappe.get_meta(dt).get_field(fieldname):
-        return
-    _ps(dt, fieldname, "label", new_label, "Data")
-
-def _upsert_property_setter(doctype, fieldname, prop, value, property_type):
-    name = f"{doctype}-{fieldname}-{prop}"
-    if frappe.db.exists("Property Setter", name):
-        ps = frappe.get_doc("Property Setter", name)
-        ps.value = value
-        ps.property_type = property_type
-        ps.save(ignore_permissions=True)
-    else:
-        frappe.get_doc({
-            "doctype": "Property Setter",
-            "doctype_or_field": "DocField",
-            "doc_type": doctype,
-            "field_name": fieldname,
-            "property": prop,
-            "value": value,
-            "property_type": property_type,
-            "name": name,
-        }).insert(ignore_permissions=True)
-
-def _ensure_sr_patient_disable_reason():
-    """Create SR Patient Disable Reason (master) if missing."""
-    if frappe.db.exists("DocType", "SR Patient Disable Reason"):
-        return
-
-    frappe.get_doc({
-        "doctype": "DocType","name": "SR Patient Disable Reason","module": MODULE_DEF_NAME,
-        "custom": 0,"istable": 0,"issingle": 0,"editable_grid": 0,"track_changes": 1,"allow_rename": 0,"allow_import": 1,
-        "naming_rule": "By fieldname","autoname": "field:sr_reason_name","title_field": "sr_reason_name",
-        "field_order": ["sr_reason_name", "is_active", "description"],
-        "fields": [
-            {"fieldname": "sr_reason_name","label": "Reason Name","fieldtype": "Data","reqd": 1,"in_list_view": 1,"in_standard_filter": 1,"unique": 1,},
-            {"fieldname": "is_active","label": "Is Active","fieldtype": "Check","default": "1",},
-            {"fieldname": "description","label": "Description","fieldtype": "Small Text",},
-        ],
-        "permissions": [
-            {"role": "System Manager","read": 1, "write": 1, "create": 1, "delete": 1,"print": 1, "email": 1, "export": 1,},
-            {"role": "Healthcare Administrator","read": 1, "write": 1, "create": 1, "delete": 1,},
-        ],
-    }).insert(ignore_permissions=True)
-
-def _ensure_sr_patient_invoice_view():
-    """Create SR Patient Invoice View (child table) if missing."""
-    if frappe.db.exists("DocType", "SR Patient Invoice View"):
-        return
-
-    frappe.get_doc({
-        "doctype": "DocType","name": "SR Patient Invoice View","module": MODULE_DEF_NAME,
-        "custom": 0,"istable": 1,"editable_grid": 1,"issingle": 0,"track_changes": 0,
-        "field_order": ["sr_invoice_no","sr_posting_date","sr_grand_total", "sr_outstanding",],
-        "fields": [
-            {"fieldname": "sr_invoice_no","label": "Sales Invoice","fieldtype": "Link","options": "Sales Invoice","in_list_view": 1,"reqd": 0,},
-            {"fieldname": "sr_posting_date","label": "Posting Date","fieldtype": "Datetime","in_list_view": 1,},
-            {"fieldname": "sr_grand_total","label": "Grand Total","fieldtype": "Currency","in_list_view": 1,},
-            {"fieldname": "sr_outstanding","label": "Outstanding","fieldtype": "Currency","in_list_view": 1,},
-        ],
-        "permissions": [],
-    }).insert(ignore_permissions=True)
-
-def _ensure_sr_patient_payment_view():
-    """Create SR Patient Payment View (child table) if missing."""
-    if frappe.db.exists("DocType", "SR Patient Payment View"):
-        return
-
-    frappe.get_doc({
-        "doctype": "DocType","name": "SR Patient Payment View","module": MODULE_DEF_NAME,
-        "custom": 0,"istable": 1,"editable_grid": 1,"issingle": 0,"track_changes": 0,
-        "field_order": ["sr_payment_entry","sr_posting_date","sr_paid_amount","sr_mode_of_payment",],
-        "fields": [
-            {"fieldname": "sr_payment_entry","label": "Payment Entry","fieldtype": "Link","options": "Payment Entry","in_list_view": 1,},
-            {"fieldname": "sr_posting_date","label": "Posting Date","fieldtype": "Datetime","in_list_view": 1,},
-            {"fieldname": "sr_paid_amount","label": "Paid Amount","fieldtype": "Currency","in_list_view": 1,},
-            {"fieldname": "sr_mode_of_payment","label": "Mode of Payment","fieldtype": "Data","in_list_view": 1,},
-        ],
-        "permissions": [],
-    }).insert(ignore_permissions=True)
-
-def _ensure_sr_sales_type():
-    if not frappe.db.exists("DocType", "SR Sales Type"):
-        frappe.get_doc({
-            "doctype":"DocType","name":"SR Sales Type","module":MODULE_DEF_NAME,
-            "naming_rule":"By fieldname","autoname":"field:sr_sales_type_name","title_field":"sr_sales_type_name",
-            "field_order":["sr_sales_type_name"],
-            "fields":[{"fieldname":"sr_sales_type_name","label":"Sales Type","fieldtype":"Data","reqd":1,"in_list_view":1,"unique":1}],
-            "permissions":[{"role":"System Manager","read":1,"write":1,"create":1,"delete":1,"print":1,"email":1,"export":1}],
-        }).insert(ignore_permissions=True)
-
-def _ensure_sr_encounter_status():
-    if not frappe.db.exists("DocType", "SR Encounter Status"):
-        frappe.get_doc({
-            "doctype":"DocType","name":"SR Encounter Status","module":MODULE_DEF_NAME,
-            "naming_rule":"By fieldname","autoname":"field:sr_status_name","title_field":"sr_status_name",
-            "field_order":["sr_status_name"],
-            "fields":[{"fieldname":"sr_status_name","label":"Status Name","fieldtype":"Data","unique":1}],
-            "permissions":[{"role":"System Manager","read":1,"write":1,"create":1,"delete":1,"print":1,"email":1,"export":1}],
-        }).insert(ignore_permissions=True)
-
-def _ensure_sr_instructions():
-    if not frappe.db.exists("DocType", "SR Instructions"):
-        frappe.get_doc({
-            "doctype":"DocType","name":"SR Instructions","module":MODULE_DEF_NAME,
-            "naming_rule":"By fieldname","autoname":"field:sr_title","title_field":"sr_title","track_changes":1,
-            "field_order":["sr_title","sr_description"],
-            "fields":[
-                {"fieldname":"sr_title","label":"Title","fieldtype":"Data","reqd":1,"in_list_view":1,"unique":1},
-                {"fieldname":"sr_description","label":"Description","fieldtype":"Small Text"},
-            ],
-            "permissions":[{"role":"System Manager","read":1,"write":1,"create":1,"delete":1,"print":1,"email":1,"export":1}],
-        }).insert(ignore_permissions=True)
-
-def _ensure_sr_medication_template_item():
-    if not frappe.db.exists("DocType", "SR Medication Template Item"):
-        frappe.get_doc({
-            "doctype":"DocType","name":"SR Medication Template Item","module":MODULE_DEF_NAME,"istable":1,"track_changes":1,
-            "field_order":["sr_medication","sr_drug_code","sr_dosage","sr_period","sr_dosage_form","sr_instruction"],
-            "fields":[
-                {"fieldname":"sr_medication","label":"Medication","fieldtype":"Link","options":"Medication","reqd":1,"in_list_view":1},
-                {"fieldname":"sr_drug_code","label":"Drug Code","fieldtype":"Link","options":"Item"},
-                {"fieldname":"sr_dosage","label":"Dosage","fieldtype":"Link","options":"Prescription Dosage","reqd":1,"in_list_view":1},
-                {"fieldname":"sr_period","label":"Period","fieldtype":"Link","options":"Prescription Duration","reqd":1,"in_list_view":1},
-                {"fieldname":"sr_dosage_form","label":"Dosage Form","fieldtype":"Link","options":"Dosage Form","reqd":1,"in_list_view":1},
-                {"fieldname":"sr_instruction","label":"Instruction","fieldtype":"Link","options":"SR Instructions","reqd":1,"in_list_view":1},
-            ],
-        }).insert(ignore_permissions=True)
-
-def _ensure_sr_medication_template():
-    if not frappe.db.exists("DocType", "SR Medication Template"):
-        frappe.get_doc({
-            "doctype":"DocType","name":"SR Medication Template","module":MODULE_DEF_NAME,
-            "naming_rule":"By fieldname","autoname":"field:sr_template_name","title_field":"sr_template_name","track_changes":1,
-            "field_order":["sr_template_name","sr_instructions","sr_medications"],
-            "fields":[
-                {"fieldname":"sr_template_name","label":"Template Name","fieldtype":"Data","reqd":1,"in_list_view":1,"unique":1},
-                {"fieldname":"sr_instructions","label":"Instructions","fieldtype":"Small Text"},
-                {"fieldname":"sr_medications","label":"Medications","fieldtype":"Table","options":"SR Medication Template Item"},
-            ],
-            "permissions":[{"role":"System Manager","read":1,"write":1,"create":1,"delete":1,"print":1,"email":1,"export":1}],
-        }).insert(ignore_permissions=True)
-
-def _ensure_sr_delivery_type():
-    """Master used by sr_delivery_type Link."""
-    if frappe.db.exists("DocType", "SR Delivery Type"):
-        return
-
-    frappe.get_doc({
-        "doctype": "DocType","name": "SR Delivery Type","module": MODULE_DEF_NAME,
-        "naming_rule": "By fieldname","autoname": "field:sr_delivery_type_name",
-        "title_field": "sr_delivery_type_name","track_changes": 1,
-        "field_order": ["sr_delivery_type_name"],
-        "fields": [
-            {"fieldname": "sr_delivery_type_name", "label": "Delivery / Service Type","fieldtype": "Data", "reqd": 1, "unique": 1, "in_list_view": 1},
-        ],
-        "permissions": [
-            {"role": "System Manager", "read": 1, "write": 1, "create": 1,"delete": 1, "print": 1, "email": 1, "export": 1}
-        ],
-    }).insert(ignore_permissions=True)
-
-def _ensure_sr_order_item():
-    """Child table used by Draft Invoice → Items List."""
-    if frappe.db.exists("DocType", "SR Order Item"):
-        return
-
-    frappe.get_doc({
-        "doctype": "DocType","name": "SR Order Item","module": MODULE_DEF_NAME,
-        "custom": 0,"istable": 1,"editable_grid": 1,"issingle": 0,"track_changes": 1,
-        "field_order": [
-            "sr_item_code", "sr_item_name", "sr_item_description",
-            "sr_item_uom", "sr_item_qty", "sr_item_rate", "sr_item_amount"
-        ],
-        "fields": [
-            {"fieldname": "sr_item_code", "label": "Item","fieldtype": "Link", "options": "Item", "reqd": 1, "in_list_view": 1},
-            {"fieldname": "sr_item_name", "label": "Item Name","fieldtype": "Data", "read_only": 1, "fetch_from": "sr_item_code.item_name"},
-            {"fieldname": "sr_item_description", "label": "Description","fieldtype": "Small Text"},
-            {"fieldname": "sr_item_uom", "label": "UOM","fieldtype": "Link", "options": "UOM", "in_list_view": 1},
-            {"fieldname": "sr_item_qty", "label": "Qty","fieldtype": "Float", "in_list_view": 1, "default": 1},
-            {"fieldname": "sr_item_rate", "label": "Rate","fieldtype": "Currency", "in_list_view": 1},
-            {"fieldname": "sr_item_amount", "label": "Amount","fieldtype": "Currency", "in_list_view": 1, "read_only": 1},
-        ],
-        "permissions": [],
-    }).insert(ignore_permissions=True)
+	"""
+	Change a field's label via Property Setter.
+	(No-op if the field is missing.)
+	"""
+	if not frappe.get_meta(dt).get_field(fieldname):
+		return
+	upsert_property_setters([(dt, fieldname, "label", new_label, "Data")])
+
+
+# ----------------- manifest apply (diff against live state) -----------------
+
+
+def _live_state_complete(manifest: dict) -> bool:
+	"""Cheap existence check used on the fast path: three COUNTs, one SHOW INDEX per doctype, two sequence reads."""
+	dt_names = [d["name"] for d in manifest["doctypes"]]
+	if frappe.db.count("DocType", {"name": ["in", dt_names]}) != len(dt_names):
+		return False
+
+	cf_names = [
+		f"{dt}-{df['fieldname']}" for dt, fields in manifest["custom_fields"].items() for df in fields
+	]
+	if frappe.db.count("Custom Field", {"name": ["in", cf_names]}) != len(cf_names):
+		return False
+
+	ps_names = {_ps_name(*ps[:3]) for ps in manifest["property_setters"]}
+	if frappe.db.count("Property Setter", {"name": ["in", list(ps_names)]}) != len(ps_names):
+		return False
+
+	return not missing_indexes(manifest["indexes"]) and not id_allocator.missing_sequences()
+
+
+def _apply_doctypes(doctypes: list[dict]):
+	"""Create SR doctypes that are missing (existing ones are left untouched, as before)."""
+	existing = set(
+		frappe.get_all("DocType", filters={"name": ["in", [d["name"] for d in doctypes]]}, pluck="name")
+	)
+	for d in doctypes:
+		if d["name"] not in existing:
+			# get_doc mutates child dicts (adds "doctype"); keep the manifest pristine
+			frappe.get_doc(copy.deepcopy(d)).insert(ignore_permissions=True)
+
+
+def _apply_custom_fields(custom_fields: dict[str, list[dict]]):
+	"""Create/update only the Custom Fields whose definition differs from the live row."""
+	keys = sorted({k for fields in custom_fields.values() for df in fields for k in df} - {"dt"})
+	live = {
+		(r.dt, r.fieldname): r
+		for r in frappe.get_all(
+			"Custom Field", filters={"dt": ["in", list(custom_fields)]}, fields=["dt", *keys]
+		)
+	}
+
+	changed = {}
+	for dt, fields in custom_fields.items():
+		for df in fields:
+			row = live.get((dt, df["fieldname"]))
+			if not row or any(_norm(row.get(k)) != _norm(v) for k, v in df.items()):
+				changed.setdefault(dt, []).append(df)
+
+	if changed:
+		create_custom_fields(changed, ignore_validate=True)
+
+
+def _apply_field_patches(patches: list[tuple]):
+	"""Set properties on existing Custom Fields (e.g. core Encounter flags someone re-created)."""
+	if not patches:
+		return
+
+	keys = sorted({k for _dt, _f, props in patches for k in props})
+	live = {
+		(r.dt, r.fieldname): r
+		for r in frappe.get_all(
+			"Custom Field",
+			filters={
+				"dt": ["in", list({p[0] for p in patches})],
+				"fieldname": ["in", [p[1] for p in patches]],
+			},
+			fields=["name", "dt", "fieldname", *keys],
+		)
+	}
+	for dt, fieldname, props in patches:
+		row = live.get((dt, fieldname))
+		if not row or all(_norm(row.get(k)) == _norm(v) for k, v in props.items()):
+			continue
+		cf = frappe.get_doc("Custom Field", row.name)
+		cf.update(props)
+		cf.save(ignore_permissions=True)
+
+
+# ----------------- slices used by patches -----------------
+
 
 def _make_patient_fields():
-    """Adds custom fields & tabs to Patient DocType.
-    NOTE:
-      - Ensure the following DocTypes exist in your system:
-          • Medical Department (standard in Healthcare)
-          • SR Patient Disable Reason (Disable Reason DocType)
-          • SR Patient Invoice View (Child Table DocType)
-          • SR Patient Payment View (Child Table DocType)
-      - 'Patient Encounter' is standard in Healthcare.
-    """
-    patient_custom_fields = {
-        "Patient": [
-            # --- DETAILS TAB ---
-            {"fieldname": "sr_medical_department","label": "Department","fieldtype": "Link","options": "Medical Department","insert_after": "patient_name"},
-            {"fieldname": "sr_patient_id","label": "Patient ID","fieldtype": "Data","insert_after": "sr_medical_department"},
-            {"fieldname": "sr_practo_id","label": "Practo ID","fieldtype": "Data","insert_after": "sr_patient_id"},
-            {"fieldname": "sr_patient_age","label": "Patient Age","fieldtype": "Data","insert_after": "age_html"},
-            {"fieldname": "sr_followup_disable_reason","label": "Followup Disable Reason","fieldtype": "Link","options": "SR Patient Disable Reason","insert_after": "status"},
-            {"fieldname": "sr_followup_status","label": "Followup Status","fieldtype": "Select","options": "\nPending\nDone","insert_after": "user_id"},
-
-            # --- INVOICES TAB ---
-            {"fieldname": "sr_invoices_tab","label": "Invoices","fieldtype": "Tab Break","insert_after": "other_risk_factors"},
-            {"fieldname": "sr_sales_invoice_list","label": "Sales Invoices","fieldtype": "Table","options": "SR Patient Invoice View","read_only": 1,"insert_after": "sr_invoices_tab"},
-
-            # --- PAYMENTS TAB ---
-            {"fieldname": "sr_payments_tab","label": "Payments","fieldtype": "Tab Break","insert_after": "sr_sales_invoice_list"},
-            {"fieldname": "sr_payment_entry_list","label": "Payment Entries","fieldtype": "Table","options": "SR Patient Payment View", "read_only": 1,"insert_after": "sr_payments_tab"},
-
-            # --- PEX TAB (Patient Encounters) ---
-            {"fieldname": "sr_pex_tab","label": "Patient Encounters","fieldtype": "Tab Break","insert_after": "sr_payment_entry_list"},
-            {"fieldname": "sr_pex_launcher_html","label": "PE Launcher","fieldtype": "HTML","read_only": 1,"insert_after": "sr_pex_tab"},
-            {"fieldname": "sr_last_created_pe","label": "Last Created Patient Encounter","fieldtype": "Link","options": "Patient Encounter","insert_after": "sr_pex_launcher_html"},
-
-            # --- FOLLOWUP MARKER TAB ---
-            {"fieldname": "sr_followup_marker_tab","label": "Follow-up Marker","fieldtype": "Tab Break","insert_after": "sr_last_created_pe"},
-            {"fieldname": "sr_followup_day","label": "Follow-up Day","fieldtype": "Select","options": "\nMon\nTue\nWed\nThu\nFri\nSat","insert_after": "sr_followup_marker_tab"},
-            {"fieldname": "sr_followup_id","label": "Follow-up ID","fieldtype": "Select","options": "\n0\n1\n2\n3\n4\n5\n6\n7\n8\n9","insert_after": "sr_followup_day"},
-        ]
-    }
-    create_custom_fields(patient_custom_fields, ignore_validate=True)
-
-def _make_customer_fields():
-    # 1) Customer custom field
-    customer_custom_fields = {
-        "Customer": [{
-            "fieldname": "sr_customer_id",
-            "label": "Customer ID",
-            "fieldtype": "Data",
-            "insert_after": "salutation",
-            "in_list_view": 1,
-            "in_standard_filter": 1,
-            "unique": 1,
-        }]
-    }
-    create_custom_fields(customer_custom_fields, ignore_validate=True)
-
-def _make_address_fields():
-    _upsert_property_setter("Address", "is_primary_address", "default", "1", "Text")
-    _upsert_property_setter("Address", "is_shipping_address", "default", "1", "Text")
-
-def _make_practitioner_fields():
-    practitioner_custom_fields = {
-        "Healthcare Practitioner": [
-            {"fieldname": "sr_reg_no", "label": "Registration No", "fieldtype": "Data", "insert_after": "office_phone"},
-            {"fieldname": "sr_qualification", "label": "Qualification", "fieldtype": "Data", "reqd": 1, "insert_after": "sr_reg_no"},
-            {"fieldname": "sr_college_university", "label": "College/University", "fieldtype": "Data", "insert_after": "sr_qualification"},
-            {"fieldname": "sr_pathy", "label": "Pathy", "fieldtype": "Select",
-             "options": "\nAyurveda\nHomeopathy\nAllopathy", "in_list_view": 1, "in_standard_filter": 1,
-             "insert_after": "practitioner_type"},
-        ]
-    }
-    create_custom_fields(practitioner_custom_fields, ignore_validate=True)
-
-def _make_encounter_fields():
-    lead_source_dt = "CRM Lead Source" if frappe.db.exists("DocType","CRM Lead Source") else "Lead Source"
-
-    encounter_custom_fields = {
-        "Patient Encounter": [
-            {"fieldname":"sr_encounter_type","label":"Encounter Type","fieldtype":"Select",
-             "options":"\nFollowup\nOrder","reqd":1,"in_list_view":1,"in_standard_filter":1,"allow_on_submit":1,
-             "insert_after":"naming_series"},
-
-            {"fieldname":"sr_encounter_place","label":"Encounter Place","fieldtype":"Select",
-             "options":"\nOnline\nOPD","reqd":1,"in_list_view":1,"in_standard_filter":1,
-             "insert_after":"sr_encounter_type"},
-
-            {"fieldname":"sr_sales_type","label":"Sales Type","fieldtype":"Link","options":"SR Sales Type",
-             "insert_after":"sr_encounter_place","depends_on": 'eval:doc.sr_encounter_type=="Order"',"mandatory_depends_on": 'eval:doc.sr_encounter_type=="Order"'},
-
-            {"fieldname":"sr_pe_mobile","label":"Patient Mobile","fieldtype":"Data","read_only":1,
-             "depends_on":"eval:doc.patient","fetch_from":"patient.mobile","in_list_view":1,"in_standard_filter":1,
-             "insert_after":"inpatient_status"},
-
-            {"fieldname":"sr_pe_id","label":"Patient ID","fieldtype":"Data","read_only":1,
-             "depends_on":"eval:doc.patient","fetch_from":"patient.sr_patient_id","in_list_view":1,"in_standard_filter":1,
-             "insert_after":"sr_pe_mobile"},
-
-            {"fieldname":"sr_pe_deptt","label":"Patient Department","fieldtype":"Data","read_only":1,
-             "depends_on":"eval:doc.patient","fetch_from":"patient.sr_medical_department","in_list_view":1,"in_standard_filter":1,
-             "insert_after":"sr_pe_id"},
-
-            {"fieldname":"sr_pe_age","label":"Patient Age","fieldtype":"Data","read_only":1,
-             "depends_on":"eval:doc.patient","fetch_from":"patient.sr_patient_age","in_list_view":1,"in_standard_filter":1,
-             "insert_after":"sr_pe_deptt"},
-
-            {"fieldname":"sr_encounter_source","label":"Encounter Source","fieldtype":"Link",
-             "options": lead_source_dt, "reqd":1, "insert_after":"google_meet_link"},
-
-            {"fieldname":"sr_encounter_status","label":"Encounter Status","fieldtype":"Link",
-             "options":"SR Encounter Status","in_list_view":1,"in_standard_filter":1,"allow_on_submit":1,
-             "insert_after":"sr_encounter_source"},
-        ]
-    }
-    create_custom_fields(encounter_custom_fields, ignore_validate=True)
-
-def _make_clinical_notes_fields():
-    create_custom_fields({
-        "Patient Encounter": [
-            {"fieldname":"sr_clinical_notes_sb","label":"Clinical Notes","fieldtype":"Section Break","collapsible":1,"insert_after":"submit_orders_on_save"},
-            {"fieldname":"sr_complaints","label":"Complaints","fieldtype":"Small Text","insert_after":"sr_clinical_notes_sb"},
-            {"fieldname":"sr_observations","label":"Observations","fieldtype":"Small Text","insert_after":"sr_complaints"},
-            {"fieldname":"sr_investigations","label":"Investigations","fieldtype":"Small Text","insert_after":"sr_observations"},
-            {"fieldname":"sr_notes","label":"Notes","fieldtype":"Small Text","insert_after":"sr_investigations"},
-        ]
-    }, ignore_validate=True)
-
-def _setup_ayurvedic_section():
-    dt = "Patient Encounter"
-    _ps(dt, "sb_drug_prescription", "label", "Ayurvedic Medications", "Data")
-    _ps(dt, "sb_drug_prescription", "collapsible", "1", "Check")
-    _ps(dt, "drug_prescription", "label", "Ayurvedic Drug Prescription", "Data")
-
-    hp_meta = frappe.get_meta("Healthcare Practitioner")
-    name_field = "practitioner_name" if hp_meta.get_field("practitioner_name") else (
-        "full_name" if hp_meta.get_field("full_name") else "practitioner_name"
-    )
-
-    create_custom_fields({
-        dt: [
-            {"fieldname":"sr_medication_template","label":"Medication Template","fieldtype":"Link","options":"SR Medication Template","insert_after":"sb_drug_prescription"},
-            {"fieldname":"sr_ayurvedic_practitioner","label":"Ayurvedic Practitioner","fieldtype":"Link","options":"Healthcare Practitioner","insert_after":"sr_medication_template"},
-            {"fieldname":"sr_ayurvedic_practitioner_name","label":"Ayurvedic Practitioner Name","fieldtype":"Data","read_only":1,"fetch_from":f"sr_ayurvedic_practitioner.{name_field}","insert_after":"sr_ayurvedic_practitioner"},
-        ]
-    }, ignore_validate=True)
-
-def _setup_homeopathy_section():
-    dt = "Patient Encounter"
-    hp_meta = frappe.get_meta("Healthcare Practitioner")
-    name_field = "practitioner_name" if hp_meta.get_field("practitioner_name") else (
-        "full_name" if hp_meta.get_field("full_name") else "practitioner_name"
-    )
-
-    create_custom_fields({
-        dt: [
-            {
-                "fieldname": "sr_homeopathy_medications_sb",
-                "label": "Homeopathy Medications",
-                "fieldtype": "Section Break",
-                "collapsible": 1,
-                "insert_after": "drug_prescription",
-            },
-            {
-                "fieldname": "sr_homeopathy_practitioner",
-                "label": "Homeopathy Practitioner",
-                "fieldtype": "Link",
-                "options": "Healthcare Practitioner",
-                "insert_after": "sr_homeopathy_medications_sb",
-            },
-            {
-                "fieldname": "sr_homeopathy_practitioner_name",
-                "label": "Homeopathy Practitioner Name",
-                "fieldtype": "Data",
-                "read_only": 1,
-                "fetch_from": f"sr_homeopathy_practitioner.{name_field}",
-                "insert_after": "sr_homeopathy_practitioner",
-            },
-            {
-                "fieldname": "sr_homeopathy_drug_prescription",
-                "label": "Homeopathy Drug Prescription",
-                "fieldtype": "Table",
-                "options": "Drug Prescription",
-                "allow_on_submit": 1,
-                "insert_after": "sr_homeopathy_practitioner_name",
-            },
-        ]
-    }, ignore_validate=True)
-
-def _setup_allopathy_section():
-    dt = "Patient Encounter"
-    hp_meta = frappe.get_meta("Healthcare Practitioner")
-    name_field = "practitioner_name" if hp_meta.get_field("practitioner_name") else (
-        "full_name" if hp_meta.get_field("full_name") else "practitioner_name"
-    )
-
-    create_custom_fields({
-        dt: [
-            {
-                "fieldname": "sr_allopathy_medications_sb",
-                "label": "Allopathy Medications",
-                "fieldtype": "Section Break",
-                "collapsible": 1,
-                "insert_after": "sr_homeopathy_drug_prescription",
-            },
-            {
-                "fieldname": "sr_allopathy_practitioner",
-                "label": "Allopathy Practitioner",
-                "fieldtype": "Link",
-                "options": "Healthcare Practitioner",
-                "insert_after": "sr_allopathy_medications_sb",
-            },
-            {
-                "fieldname": "sr_allopathy_practitioner_name",
-                "label": "Allopathy Practitioner Name",
-                "fieldtype": "Data",
-                "read_only": 1,
-                "fetch_from": f"sr_allopathy_practitioner.{name_field}",
-                "insert_after": "sr_allopathy_practitioner",
-            },
-            {
-                "fieldname": "sr_allopathy_drug_prescription",
-                "label": "Allopathy Drug Prescription",
-                "fieldtype": "Table",
-                "options": "Drug Prescription",
-                "allow_on_submit": 1,
-                "insert_after": "sr_allopathy_practitioner_name",
-            },
-        ]
-    }, ignore_validate=True)
-
-def _setup_instructions_section():
-    dt = "Patient Encounter"
-    create_custom_fields({
-        dt: [
-            {
-                "fieldname": "sr_instructions_sb",
-                "label": "Instructions",
-                "fieldtype": "Section Break",
-                "collapsible": 1,
-                "insert_after": "sr_allopathy_drug_prescription",
-            },
-            {
-                "fieldname": "sr_instructions_item",
-                "label": "Instructions",
-                "fieldtype": "Small Text",
-                "insert_after": "sr_instructions_sb",
-            },
-        ]
-    }, ignore_validate=True)
-
-def _setup_draft_invoice_tab():
-    dt = "Patient Encounter"
-
-    create_custom_fields({
-        dt: [
-            # Tab visible only for Encounter Type = Order
-            {"fieldname": "sr_draft_invoice_tab", "label": "Draft Invoice","fieldtype": "Tab Break", "insert_after": "clinical_notes","depends_on": 'eval:doc.sr_encounter_type=="Order"'},
-
-            # Delivery Type (required only in Order context)
-            {"fieldname": "sr_delivery_type", "label": "Delivery Type","fieldtype": "Link", "options": "SR Delivery Type","insert_after": "sr_draft_invoice_tab","depends_on": 'eval:doc.sr_encounter_type=="Order"',"mandatory_depends_on": 'eval:doc.sr_encounter_type=="Order"'},
-
-            # --- Items List ---
-            {"fieldname": "sr_items_list_sb", "label": "Items List","fieldtype": "Section Break", "collapsible": 0,"insert_after": "sr_delivery_type"},
-            {"fieldname": "sr_pe_order_items", "label": "Order Items","fieldtype": "Table", "options": "SR Order Item","insert_after": "sr_items_list_sb"},
-
-            # --- Advance Payment ---
-            {"fieldname": "sr_advance_payment_sb", "label": "Advance Payment","fieldtype": "Section Break", "collapsible": 0,"insert_after": "sr_pe_order_items"},
-            {"fieldname": "sr_pe_mode_of_payment", "label": "Mode of Payment","fieldtype": "Link", "options": "Mode of Payment","insert_after": "sr_advance_payment_sb"},
-            {"fieldname": "sr_pe_paid_amount", "label": "Paid Amount","fieldtype": "Currency","insert_after": "sr_pe_mode_of_payment"},
-
-            # --- Payment Receipt ---
-            {"fieldname": "sr_payment_receipt_sb", "label": "Payment Receipt","fieldtype": "Section Break", "collapsible": 1,"insert_after": "sr_pe_paid_amount"},
-            {"fieldname": "sr_pe_payment_reference_no", "label": "Payment Reference No","fieldtype": "Data", "insert_after": "sr_payment_receipt_sb"},
-            {"fieldname": "sr_pe_payment_reference_date", "label": "Payment Reference Date","fieldtype": "Date", "insert_after": "sr_pe_payment_reference_no"},
-            {"fieldname": "sr_pe_payment_proof", "label": "Payment Proof","fieldtype": "Attach Image", "insert_after": "sr_pe_payment_reference_date"},
-        ]
-    }, ignore_validate=True)
-
-def _apply_encounter_ui_customizations():
-    dt = "Patient Encounter"
-
-    # Collapse these sections
-    for f in ["sb_symptoms", "sb_test_prescription", "sb_procedures","rehabilitation_section", "section_break_33"]:
-        collapse_field(dt, f, True)
-
-    # Rename section_break_33 → "Review"
-    set_field_label(dt, "section_break_33", "Review")
-
-def _hide_encounter_flags():
-    """Hide core Patient Encounter fields: invoiced, submit_orders_on_save, codification_table, symptoms, diagnosis."""
-    targets = ("invoiced", "submit_orders_on_save","codification_table", "symptoms", "diagnosis","procedure_prescription","therapy_plan","therapies","naming_series","appointment")
-    for f in targets:
-        # If someone made it a Custom Field, update that; else use Property Setter
-        cfname = frappe.db.get_value("Custom Field", {"dt":"Patient Encounter","fieldname":f}, "name")
-        if cfname:
-            cf = frappe.get_doc("Custom Field", cfname)
-            cf.hidden = 1
-            cf.in_list_view = 0
-            cf.in_standard_filter = 0
-            cf.save(ignore_permissions=True)
-        else:
-            _ps("Patient Encounter", f, "hidden", "1", "Check")
-            _ps("Patient Encounter", f, "in_list_view", "0", "Check")
-            _ps("Patient Encounter", f, "in_standard_filter", "0", "Check")
+	"""Patient custom fields only (requires the SR child/master doctypes to exist)."""
+	_apply_custom_fields({"Patient": schema.PATIENT_FIELDS})
+
 
 def _make_status_editable():
-    """Make core Patient.status editable (remove read-only)."""
-    _upsert_property_setter(
-        doctype="Patient",
-        fieldname="status",
-        prop="read_only",
-        value="0",
-        property_type="Check",
-    )
-
-    # In case the doctype had a dependency making it read-only, clear it
-    _upsert_property_setter(
-        doctype="Patient",
-        fieldname="status",
-        prop="read_only_depends_on",
-        value="",
-        property_type="Text",
-    )
+	"""Make core Patient.status editable (remove read-only)."""
+	upsert_property_setters([ps for ps in schema.PROPERTY_SETTERS if ps[:2] == ("Patient", "status")])
@@ -0,0 +1,110 @@
+"""Versioned cache of the small SR masters the encounter forms link to.
+
+The masters go into the desk boot payload as {"version", "data"}, and the client
+resolves Link values from there instead of asking the server (see
+public/js/sriaas_booking.bundle.js). The version lives in Redis and is bumped by any
+master update. Each worker keeps a copy in process memory and reloads it only
+when the version has moved. A bump is also published over realtime, so open
+desks fetch the new copy once, and only when their version is stale.
+"""
+
+import threading
+
+import frappe
+from frappe import _
+
+VERSION_KEY = "sriaas_booking:masters_version"
+REALTIME_EVENT = "sr_masters_version"
+
+# master → field that marks a record as active (None: every record is usable)
+MASTERS = {
+	"SR Sales Type": None,
+	"SR Encounter Status": None,
+	"SR Delivery Type": None,
+	"SR Instructions": None,
+	"SR Patient Disable Reason": "is_active",
+}
+
+_local: dict[str, tuple[str, dict]] = {}  # site → (version, data)
+_lock = threading.Lock()
+
+
+def current_version() -> str:
+	version = frappe.cache.get_value(VERSION_KEY)
+	if not version:
+		version = frappe.generate_hash(length=10)
+		frappe.cache.set_value(VERSION_KEY, version)
+	return version
+
+
+def get_masters() -> tuple[str, dict]:
+	"""(version, {master: [names]}) served from process memory while the version holds."""
+	version = current_version()
+	cached = _local.get(frappe.local.site)
+	if cached and cached[0] == version:
+		return cached
+	with _lock:
+		cached = (version, _load())
+		_local[frappe.local.site] = cached
+	return cached
+
+
+def _load() -> dict:
+	data = {}
+	for master, active_field in MASTERS.items():
+		filters = {active_field: 1} if active_field else {}
+		data[master] = frappe.get_all(master, filters=filters, pluck="name", order_by="name asc")
+	return data
+
+
+def is_valid(master: str, value: str) -> bool:
+	return value in get_masters()[1].get(master, ())
+
+
+# ----------------- boot / client -----------------
+
+
+def boot_session(bootinfo):
+	"""boot_session hook: ship the masters with their version."""
+	if frappe.session.user == "Guest":
+		return
+	version, data = get_masters()
+	bootinfo.sr_masters = {"version": version, "data": data}
+
+
+@frappe.whitelist()
+def get_client_masters(version=None) -> dict:
+	"""The current masters, or just {"version"} when the caller already holds it."""
+	current, data = get_masters()
+	if version == current:
+		return {"version": current}
+	return {"version": current, "data": data}
+
+
+# ----------------- doc_events -----------------
+
+
+def invalidate(doc=None, method=None):
+	"""on_update / on_trash / after_rename of any master: new version once committed, tell open desks."""
+	frappe.db.after_commit.add(_bump_version)
+
+
+def _bump_version():
+	version = frappe.generate_hash(length=10)
+	frappe.cache.set_value(VERSION_KEY, version)
+	_local.pop(frappe.local.site, None)
+	frappe.publish_realtime(REALTIME_EVENT, {"version": version})
+
+
+def validate_master_links(doc, method=None):
+	"""Patient Encounter validate: check master links against the cache, one message for all."""
+	bad = []
+	for df in doc.meta.get_link_fields():
+		if (
+			df.options in MASTERS
+			and doc.get(df.fieldname)
+			and not is_valid(df.options, doc.get(df.fieldname))
+		):
+			bad.append(f"{_(df.label)}: {doc.get(df.fieldname)}")
+	if bad:
+		frappe.throw(_("Unknown or inactive values: {0}").format(", ".join(bad)), frappe.LinkValidationError)
@@ -0,0 +1,151 @@
+"""Expand an SR Medication Template into one of the Encounter prescription tables.
+
+A template is compiled once into ready-to-append Drug Prescription rows (all
+linked Medication / Item / Dosage / Duration / Instruction records resolved with
+one query per doctype) and kept in Redis until the template or a master it
+reads from changes.
+"""
+
+import frappe
+from frappe import _
+
+CACHE_KEY = "sriaas_booking:medication_template"
+PRESCRIPTION_TABLES = (
+	"drug_prescription",
+	"sr_homeopathy_drug_prescription",
+	"sr_allopathy_drug_prescription",
+)
+
+
+def compile_template(template: str) -> list[dict]:
+	"""Drug Prescription rows for `template`, from cache when possible."""
+	rows = frappe.cache.hget(CACHE_KEY, template)
+	if rows is None:
+		rows = _compile(template)
+		frappe.cache.hset(CACHE_KEY, template, rows)
+	return rows
+
+
+def _compile(template: str) -> list[dict]:
+	items = frappe.get_all(
+		"SR Medication Template Item",
+		filters={"parent": template, "parenttype": "SR Medication Template"},
+		fields=[
+			"sr_medication",
+			"sr_drug_code",
+			"sr_dosage",
+			"sr_period",
+			"sr_dosage_form",
+			"sr_instruction",
+		],
+		order_by="idx asc",
+	)
+	if not items:
+		return []
+
+	def _names(field):
+		return list({i[field] for i in items if i[field]})
+
+	meds = {
+		m.name: m
+		for m in frappe.get_all(
+			"Medication",
+			filters={"name": ["in", _names("sr_medication")]},
+			fields=["name", "medication_name", "strength", "strength_uom"],
+		)
+	}
+	# first linked Item per Medication, for rows without an explicit drug code
+	med_items = {}
+	for r in frappe.get_all(
+		"Medication Linked Item",
+		filters={"parenttype": "Medication", "parent": ["in", list(meds)]},
+		fields=["parent", "item_code"],
+		order_by="idx asc",
+	):
+		med_items.setdefault(r.parent, r.item_code)
+
+	item_codes = list(set(_names("sr_drug_code")) | set(med_items.values()))
+	item_names = (
+		dict(
+			frappe.get_all(
+				"Item", filters={"name": ["in", item_codes]}, fields=["name", "item_name"], as_list=True
+			)
+		)
+		if item_codes
+		else {}
+	)
+	dosages = set(
+		frappe.get_all("Prescription Dosage", filters={"name": ["in", _names("sr_dosage")]}, pluck="name")
+	)
+	periods = set(
+		frappe.get_all("Prescription Duration", filters={"name": ["in", _names("sr_period")]}, pluck="name")
+	)
+	instructions = dict(
+		frappe.get_all(
+			"SR Instructions",
+			filters={"name": ["in", _names("sr_instruction")]},
+			fields=["name", "sr_description"],
+			as_list=True,
+		)
+	)
+
+	rows = []
+	for i in items:
+		med = meds.get(i.sr_medication)
+		if not med:
+			continue
+		drug_code = i.sr_drug_code or med_items.get(med.name)
+		rows.append(
+			{
+				"medication": med.name,
+				"drug_code": drug_code,
+				"drug_name": item_names.get(drug_code) or med.medication_name,
+				"strength": med.strength,
+				"strength_uom": med.strength_uom,
+				"dosage_form": i.sr_dosage_form,
+				"dosage": i.sr_dosage if i.sr_dosage in dosages else None,
+				"period": i.sr_period if i.sr_period in periods else None,
+				"comment": instructions.get(i.sr_instruction) or i.sr_instruction,
+			}
+		)
+	return rows
+
+
+@frappe.whitelist()
+def expand_template(template, table="drug_prescription"):
+	"""Rows for the Encounter form to append to `table`."""
+	if table not in PRESCRIPTION_TABLES:
+		frappe.throw(_("Unknown prescription table {0}").format(table))
+	frappe.has_permission("SR Medication Template", "read", template, throw=True)
+	return {
+		"table": table,
+		"rows": compile_template(template),
+		"instructions": frappe.db.get_value("SR Medication Template", template, "sr_instructions"),
+	}
+
+
+def apply_template(encounter, template: str, table: str = "drug_prescription", replace: bool = True):
+	"""Server-side fill of an Encounter doc (imports, API); caller saves."""
+	if table not in PRESCRIPTION_TABLES:
+		frappe.throw(_("Unknown prescription table {0}").format(table))
+	if replace:
+		encounter.set(table, [])
+	for row in compile_template(template):
+		encounter.append(table, row)
+
+
+# ----------------- cache invalidation -----------------
+
+
+def invalidate_template(doc, method=None):
+	"""SR Medication Template on_update / on_trash."""
+	frappe.cache.hdel(CACHE_KEY, doc.name)
+
+
+def invalidate_all(doc=None, method=None):
+	"""Medication / Item / SR Instructions on_update, SR Medication Template after_rename.
+
+	Master changes can touch any compiled template; a renamed template leaves its
+	old name cached, which doc.name no longer gives us.
+	"""
+	frappe.cache.delete_value(CACHE_KEY)
@@ -0,0 +1,68 @@
+"""Nightly recompute of Patient `sr_patient_age` from `dob`.
+
+Reads patients in large keyset chunks, computes the age strings in Python for the
+whole chunk, and writes back only the rows whose string changed, with batched
+UPDATEs that bypass document hooks and leave `modified` alone. The string stops at
+months, so a patient's value changes once a month (on the month-anniversary of the
+dob) and a nightly run rewrites roughly 1/30 of the table, not all of it.
+"""
+
+import time
+
+import frappe
+from dateutil.relativedelta import relativedelta
+from frappe.utils import getdate
+
+READ_CHUNK = 20000
+
+
+def age_string(dob, today) -> str:
+	"""Healthcare's Patient.get_age shape without the days: "X Year(s) Y Month(s)"."""
+	age = relativedelta(today, dob)
+	return f"{age.years} Year(s) {age.months} Month(s)"
+
+
+def recompute_patient_ages(chunk_size: int = READ_CHUNK) -> dict:
+	"""Scheduler entry (daily_long); also runnable via bench execute."""
+	today = getdate()
+	started = time.monotonic()
+	scanned = changed = 0
+	last = ""
+	memo = {}  # dob → age string; many patients share a birth date
+
+	while True:
+		rows = frappe.get_all(
+			"Patient",
+			filters={"name": [">", last], "dob": ["is", "set"]},
+			fields=["name", "dob", "sr_patient_age"],
+			order_by="name asc",
+			limit=chunk_size,
+		)
+		if not rows:
+			break
+
+		updates = {}
+		for r in rows:
+			if r.dob not in memo:
+				memo[r.dob] = age_string(getdate(r.dob), today)
+			if r.sr_patient_age != memo[r.dob]:
+				updates[r.name] = {"sr_patient_age": memo[r.dob]}
+
+		if updates:
+			frappe.db.bulk_update("Patient", updates, chunk_size=1000, update_modified=False)
+			frappe.db.commit()
+
+		scanned += len(rows)
+		changed += len(updates)
+		last = rows[-1].name
+
+	seconds = max(time.monotonic() - started, 1e-6)
+	stats = {
+		"scanned": scanned,
+		"changed": changed,
+		"seconds": round(seconds, 3),
+		"scanned_per_sec": round(scanned / seconds),
+		"changed_per_sec": round(changed / seconds),
+	}
+	frappe.logger("sriaas_booking").info({"patient_age_recompute": stats})
+	return stats
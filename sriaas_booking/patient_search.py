@@ -0,0 +1,165 @@
+"""Typeahead search over Patient mobile, `sr_patient_id` and `sr_practo_id`.
+
+Every suffix (of at least MIN_QUERY characters) of each normalized value is stored
+in `SR Patient Search Index`, so "contains" becomes an indexed prefix lookup:
+`sr_token LIKE 'q%'`. Rows are rewritten from Patient on_update / on_trash.
+"""
+
+import re
+
+import frappe
+from frappe.query_builder import Case
+from frappe.utils import now
+
+INDEX_DT = "SR Patient Search Index"
+MIN_QUERY = 3
+MAX_RESULTS = 50
+REBUILD_CHUNK = 1000
+
+# Patient field → rank weight when it is the matched field (lower ranks first)
+SEARCH_FIELDS = {"sr_patient_id": 0, "sr_practo_id": 1, "mobile": 2}
+
+RESULT_FIELDS = [
+	"name",
+	"patient_name",
+	"mobile",
+	"sr_patient_id",
+	"sr_practo_id",
+	"sr_medical_department",
+	"sr_followup_status",
+	"status",
+]
+
+
+def _normalize(value) -> str:
+	return re.sub(r"[^0-9a-z]", "", str(value or "").lower())
+
+
+def _tokens(patient: dict) -> list[tuple]:
+	"""(token, field, position) for every indexed suffix of the patient's values."""
+	out = []
+	for field in SEARCH_FIELDS:
+		value = _normalize(patient.get(field))
+		for pos in range(len(value) - MIN_QUERY + 1):
+			out.append((value[pos:], field, pos))
+	return out
+
+
+# ----------------- maintenance -----------------
+
+
+def on_patient_update(doc, method=None):
+	"""Patient on_update: reindex only when a searchable value changed."""
+	before = doc.get_doc_before_save()
+	if before and all(before.get(f) == doc.get(f) for f in SEARCH_FIELDS):
+		return
+	reindex([doc])
+
+
+def on_patient_trash(doc, method=None):
+	frappe.db.delete(INDEX_DT, {"sr_patient": doc.name})
+
+
+def reindex(patients: list[dict]):
+	"""Replace the index rows of `patients` (docs or dicts with name + search fields)."""
+	if not patients:
+		return
+	frappe.db.delete(INDEX_DT, {"sr_patient": ["in", [p.get("name") for p in patients]]})
+
+	ts, user = now(), frappe.session.user
+	values = [
+		(frappe.generate_hash(length=12), ts, ts, user, user, token, p.get("name"), field, pos)
+		for p in patients
+		for token, field, pos in _tokens(p)
+	]
+	if values:
+		frappe.db.bulk_insert(
+			INDEX_DT,
+			fields=[
+				"name",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+				"sr_token",
+				"sr_patient",
+				"sr_field",
+				"sr_position",
+			],
+			values=values,
+		)
+
+
+def rebuild_search_index(chunk_size: int = REBUILD_CHUNK, after: str | None = None):
+	"""Reindex every Patient in keyset chunks, committing per chunk.
+
+	bench --site <site> execute sriaas_booking.patient_search.rebuild_search_index
+	"""
+	last = after or ""
+	while True:
+		patients = frappe.get_all(
+			"Patient",
+			filters={"name": [">", last]},
+			fields=["name", *SEARCH_FIELDS],
+			order_by="name asc",
+			limit=chunk_size,
+		)
+		if not patients:
+			break
+		reindex(patients)
+		frappe.db.commit()
+		last = patients[-1].name
+
+
+# ----------------- typeahead -----------------
+
+
+@frappe.whitelist()
+def search_patients(txt: str, limit: int = 20) -> list[dict]:
+	"""Ranked patients whose mobile / Patient ID / Practo ID contains `txt`.
+
+	Exact values first, then values starting with `txt`, then other matches;
+	ties break on Patient ID before Practo ID before mobile. Results carry the
+	department and follow-up status, so the caller needs no second fetch.
+	"""
+	frappe.has_permission("Patient", "read", throw=True)
+	q = _normalize(txt)
+	if len(q) < MIN_QUERY:
+		return []
+	limit = min(int(limit), MAX_RESULTS)
+
+	idx = frappe.qb.DocType(INDEX_DT)
+	# rank in SQL too, so the candidate cap never drops an exact or prefix hit
+	quality = (
+		Case().when((idx.sr_position == 0) & (idx.sr_token == q), 0).when(idx.sr_position == 0, 1).else_(2)
+	)
+	hits = (
+		frappe.qb.from_(idx)
+		.select(idx.sr_patient, idx.sr_field, idx.sr_position, idx.sr_token)
+		.where(idx.sr_token.like(f"{q}%"))
+		.orderby(quality)
+		.orderby(idx.sr_position)
+		.limit(limit * 5)
+		.run(as_dict=True)
+	)
+
+	best = {}
+	for h in hits:
+		rank = (
+			0 if h.sr_position == 0 and h.sr_token == q else 1 if h.sr_position == 0 else 2,
+			SEARCH_FIELDS.get(h.sr_field, 9),
+			h.sr_position,
+		)
+		if h.sr_patient not in best or rank < best[h.sr_patient][0]:
+			best[h.sr_patient] = (rank, h.sr_field)
+	if not best:
+		return []
+
+	rows = {
+		r.name: r
+		for r in frappe.get_list(
+			"Patient", filters={"name": ["in", list(best)]}, fields=RESULT_FIELDS, limit_page_length=0
+		)
+	}
+	ranked = sorted((n for n in best if n in rows), key=lambda n: best[n][0])[:limit]
+	return [{**rows[n], "matched_on": best[n][1]} for n in ranked]
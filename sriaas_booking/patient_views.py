@@ -0,0 +1,378 @@
+"""Patient-side projections of Sales Invoices and Payment Entries.
+
+The read-only Patient tables `sr_sales_invoice_list` (SR Patient Invoice View) and
+`sr_payment_entry_list` (SR Patient Payment View) are kept current by doc_events
+that apply one-row deltas, so a Patient form load only reads its own child rows
+instead of joining against Sales Invoice / Payment Entry.
+"""
+
+import frappe
+from frappe.utils import get_datetime, now
+
+BACKFILL_CHUNK = 500
+RECONCILE_CHUNK = 2000
+PAYMENT_CHECKPOINT_KEY = "sriaas_booking_payment_view_checkpoint"
+
+INVOICE_VIEW = frappe._dict(
+	doctype="SR Patient Invoice View",
+	parentfield="sr_sales_invoice_list",
+	key="sr_invoice_no",
+	fields=("sr_posting_date", "sr_grand_total", "sr_outstanding"),
+)
+
+PAYMENT_VIEW = frappe._dict(
+	doctype="SR Patient Payment View",
+	parentfield="sr_payment_entry_list",
+	key="sr_payment_entry",
+	fields=("sr_posting_date", "sr_paid_amount", "sr_mode_of_payment"),
+)
+
+PAYMENT_FIELDS = [
+	"name",
+	"docstatus",
+	"payment_type",
+	"party_type",
+	"party",
+	"posting_date",
+	"paid_amount",
+	"mode_of_payment",
+]
+
+# ----------------- doc_events -----------------
+
+
+def on_sales_invoice_change(doc, method=None):
+	"""Sales Invoice on_submit / on_cancel / on_update_after_submit.
+
+	A return (credit note) also changes the outstanding of the invoice it is
+	against, so that one is refreshed too.
+	"""
+	if doc.get("patient"):
+		_sync_invoices([n for n in (doc.name, doc.get("return_against")) if n])
+
+
+def on_payment_entry_change(doc, method=None):
+	"""Payment Entry on_submit / on_cancel / on_update_after_submit (reconciliation).
+
+	Applies the entry's own row in the payment view and refreshes the outstanding
+	of the invoices it references.
+	"""
+	_sync_payments([doc.name])
+	_sync_invoices(_referenced(doc.get("references"), "reference_doctype", "reference_name"))
+
+
+def on_journal_entry_change(doc, method=None):
+	"""Journal Entry on_submit / on_cancel / on_update_after_submit (reconciliation saves a submitted JE).
+
+	Credit notes, write-offs and reconciliation can settle invoices too.
+	"""
+	_sync_invoices(_referenced(doc.get("accounts"), "reference_type", "reference_name"))
+
+
+def _referenced(rows, type_field, name_field) -> list[str]:
+	return list(
+		{r.get(name_field) for r in rows or [] if r.get(type_field) == "Sales Invoice" and r.get(name_field)}
+	)
+
+
+# ----------------- Sales Invoice → SR Patient Invoice View -----------------
+
+
+def _sync_invoices(names: list[str]):
+	if not names:
+		return
+	invoices = frappe.get_all(
+		"Sales Invoice",
+		filters={"name": ["in", names]},
+		fields=[
+			"name",
+			"patient",
+			"docstatus",
+			"posting_date",
+			"posting_time",
+			"grand_total",
+			"outstanding_amount",
+		],
+	)
+	_apply_invoice_rows(names, invoices)
+
+
+def _apply_invoice_rows(names: list[str], invoices: list[dict]):
+	rows = [
+		frappe._dict(
+			parent=si.patient,
+			sr_invoice_no=si.name,
+			sr_posting_date=get_datetime(f"{si.posting_date} {si.posting_time or '00:00:00'}"),
+			sr_grand_total=si.grand_total,
+			sr_outstanding=si.outstanding_amount,
+		)
+		for si in invoices
+		if si.docstatus == 1 and si.patient
+	]
+	_apply_view(INVOICE_VIEW, names, rows)
+
+
+def backfill_invoice_views(chunk_size: int = BACKFILL_CHUNK, after: str | None = None) -> dict:
+	"""Project every patient Sales Invoice, committing per chunk; returns {"invoices", "last"}.
+
+	Keyset-paginated on name, so a failed run resumes with `after=<last name logged>`:
+	    bench --site <site> execute sriaas_booking.patient_views.backfill_invoice_views
+	"""
+	last, total = after or "", 0
+	logger = frappe.logger("sriaas_booking")
+	while True:
+		invoices = frappe.get_all(
+			"Sales Invoice",
+			filters={"name": [">", last], "patient": ["is", "set"], "docstatus": ["!=", 0]},
+			fields=[
+				"name",
+				"patient",
+				"docstatus",
+				"posting_date",
+				"posting_time",
+				"grand_total",
+				"outstanding_amount",
+			],
+			order_by="name asc",
+			limit=chunk_size,
+		)
+		if not invoices:
+			break
+		names = [si.name for si in invoices]
+		_apply_invoice_rows(names, invoices)
+		frappe.db.commit()
+		last, total = names[-1], total + len(names)
+		logger.info({"invoice_view_backfill": {"invoices": total, "last": last}})
+	return {"invoices": total, "last": last}
+
+
+# ----------------- Payment Entry → SR Patient Payment View -----------------
+
+
+def _sync_payments(names: list[str]):
+	if not names:
+		return
+	_apply_payment_rows(
+		names, frappe.get_all("Payment Entry", filters={"name": ["in", names]}, fields=PAYMENT_FIELDS)
+	)
+
+
+def _apply_payment_rows(names: list[str], entries: list[dict]):
+	entries = [pe for pe in entries if pe.docstatus == 1 and pe.payment_type == "Receive"]
+	patients = _payment_patients(entries)
+	rows = [
+		frappe._dict(
+			parent=patients[pe.name],
+			sr_payment_entry=pe.name,
+			sr_posting_date=get_datetime(pe.posting_date),
+			sr_paid_amount=pe.paid_amount,
+			sr_mode_of_payment=pe.mode_of_payment,
+		)
+		for pe in entries
+		if patients.get(pe.name)
+	]
+	_apply_view(PAYMENT_VIEW, names, rows)
+
+
+def _payment_patients(entries: list[dict]) -> dict[str, str]:
+	"""Payment Entry → Patient, set-based: a referenced patient invoice wins, else the Customer's Patient."""
+	if not entries:
+		return {}
+
+	refs = frappe.get_all(
+		"Payment Entry Reference",
+		filters={
+			"parenttype": "Payment Entry",
+			"parent": ["in", [pe.name for pe in entries]],
+			"reference_doctype": "Sales Invoice",
+		},
+		fields=["parent", "reference_name"],
+	)
+	si_patient = (
+		dict(
+			frappe.get_all(
+				"Sales Invoice",
+				filters={"name": ["in", list({r.reference_name for r in refs})], "patient": ["is", "set"]},
+				fields=["name", "patient"],
+				as_list=True,
+			)
+		)
+		if refs
+		else {}
+	)
+
+	out = {}
+	for r in refs:
+		if si_patient.get(r.reference_name):
+			out.setdefault(r.parent, si_patient[r.reference_name])
+
+	customers = {
+		pe.party for pe in entries if pe.name not in out and pe.party_type == "Customer" and pe.party
+	}
+	if customers:
+		cust_patient = dict(
+			frappe.get_all(
+				"Patient",
+				filters={"customer": ["in", list(customers)]},
+				fields=["customer", "name"],
+				as_list=True,
+			)
+		)
+		for pe in entries:
+			if pe.name not in out and cust_patient.get(pe.party):
+				out[pe.name] = cust_patient[pe.party]
+	return out
+
+
+def reconcile_payment_views(chunk_size: int = RECONCILE_CHUNK, restart: bool = False):
+	"""Find and repair drift between Payment Entries and the Patient payment view.
+
+	Walks non-draft Payment Entries in keyset chunks (one read + bulk writes per
+	chunk, committed each time) and records a checkpoint after every chunk, so an
+	interrupted run resumes where it stopped. Finally drops view rows whose entry
+	is gone or no longer submitted. Runs from the `daily_long` scheduler or:
+	    bench --site <site> execute sriaas_booking.patient_views.reconcile_payment_views
+	"""
+	last = "" if restart else (frappe.db.get_global(PAYMENT_CHECKPOINT_KEY) or "")
+	while True:
+		entries = frappe.get_all(
+			"Payment Entry",
+			filters={"name": [">", last], "docstatus": ["!=", 0]},
+			fields=PAYMENT_FIELDS,
+			order_by="name asc",
+			limit=chunk_size,
+		)
+		if not entries:
+			break
+		names = [pe.name for pe in entries]
+		_apply_payment_rows(names, entries)
+		last = names[-1]
+		frappe.db.set_global(PAYMENT_CHECKPOINT_KEY, last)
+		frappe.db.commit()
+
+	_drop_orphan_payment_rows(chunk_size)
+	frappe.db.set_global(PAYMENT_CHECKPOINT_KEY, "")
+	frappe.db.commit()
+
+
+def _drop_orphan_payment_rows(chunk_size: int):
+	view = frappe.qb.DocType(PAYMENT_VIEW.doctype)
+	pe = frappe.qb.DocType("Payment Entry")
+	while True:
+		orphans = (
+			frappe.qb.from_(view)
+			.left_join(pe)
+			.on(pe.name == view.sr_payment_entry)
+			.select(view.name, view.parent)
+			.where(view.parentfield == PAYMENT_VIEW.parentfield)
+			.where(pe.name.isnull() | (pe.docstatus != 1))
+			.limit(chunk_size)
+			.run(as_dict=True)
+		)
+		if not orphans:
+			break
+		frappe.db.delete(PAYMENT_VIEW.doctype, {"name": ["in", [r.name for r in orphans]]})
+		_touch_patients({r.parent for r in orphans})
+		frappe.db.commit()
+
+
+# ----------------- generic view engine -----------------
+
+
+def _apply_view(view: frappe._dict, keys: list[str], rows: list[dict]):
+	"""Make the view rows for `keys` match `rows`; a key without a row is removed.
+
+	One read for the live rows, then one bulk DELETE / UPDATE / INSERT each as needed.
+	Parents are never re-saved; their `modified` is bumped so open forms reload.
+	"""
+	if not keys:
+		return
+	wanted = {r[view.key]: r for r in rows}
+	live = frappe.get_all(
+		view.doctype,
+		filters={view.key: ["in", list(keys)], "parenttype": "Patient", "parentfield": view.parentfield},
+		fields=["name", "parent", view.key, *view.fields],
+	)
+
+	deletes, updates, seen, touched = [], {}, set(), set()
+	for row in live:
+		want = wanted.get(row[view.key])
+		if not want or want.parent != row.parent or row[view.key] in seen:
+			deletes.append(row.name)
+			touched.add(row.parent)
+			continue
+		seen.add(row[view.key])
+		changes = {f: want[f] for f in view.fields if row[f] != want[f]}
+		if changes:
+			updates[row.name] = changes
+			touched.add(row.parent)
+
+	inserts = [w for k, w in wanted.items() if k not in seen]
+	touched.update(w.parent for w in inserts)
+
+	if deletes:
+		frappe.db.delete(view.doctype, {"name": ["in", deletes]})
+	if updates:
+		frappe.db.bulk_update(view.doctype, updates)
+	if inserts:
+		_insert_view_rows(view, inserts)
+	_touch_patients(touched)
+
+
+def _insert_view_rows(view: frappe._dict, rows: list[dict]):
+	parents = list({r.parent for r in rows})
+	next_idx = {
+		r.parent: r.idx or 0
+		for r in frappe.get_all(
+			view.doctype,
+			filters={"parent": ["in", parents], "parenttype": "Patient", "parentfield": view.parentfield},
+			fields=["parent", "max(idx) as idx"],
+			group_by="parent",
+		)
+	}
+
+	ts, user = now(), frappe.session.user
+	values = []
+	for r in rows:
+		next_idx[r.parent] = next_idx.get(r.parent, 0) + 1
+		values.append(
+			(
+				frappe.generate_hash(length=10),
+				ts,
+				ts,
+				user,
+				user,
+				r.parent,
+				"Patient",
+				view.parentfield,
+				next_idx[r.parent],
+				r[view.key],
+				*(r[f] for f in view.fields),
+			)
+		)
+
+	frappe.db.bulk_insert(
+		view.doctype,
+		fields=[
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"parent",
+			"parenttype",
+			"parentfield",
+			"idx",
+			view.key,
+			*view.fields,
+		],
+		values=values,
+	)
+
+
+def _touch_patients(names):
+	"""Bump Patient.modified so a form opened before the sync cannot save stale child rows back."""
+	if names:
+		frappe.db.set_value(
+			"Patient", {"name": ["in", list(names)]}, "modified", now(), update_modified=False
+		)
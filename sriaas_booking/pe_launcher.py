@@ -0,0 +1,124 @@
+"""Server-rendered Patient Encounter launcher for the Patient `sr_pex_tab`.
+
+The fragment lists a patient's latest encounters, newest first, with keyset
+pagination on (creation, name). Rendered pages are cached per patient (and per
+user, since rows are permission-filtered) in Redis and dropped whenever an
+encounter of that patient is inserted or changed.
+"""
+
+import frappe
+from frappe.utils import get_datetime
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+TEMPLATE = "templates/includes/pe_launcher.html"
+ENCOUNTER_FIELDS = (
+	"name",
+	"creation",
+	"encounter_date",
+	"practitioner_name",
+	"sr_encounter_type",
+	"sr_encounter_status",
+	"docstatus",
+)
+
+
+def _cache_key(patient: str) -> str:
+	return f"sriaas_booking:pe_launcher:{patient}"
+
+
+@frappe.whitelist()
+def get_launcher(patient, cursor=None, limit=PAGE_SIZE) -> dict:
+	"""{"html": ..., "next_cursor": ...} for one page; pass next_cursor back for older encounters.
+
+	Rows come through frappe.get_list, so role and User Permission restrictions
+	apply; cached pages are therefore per user.
+	"""
+	frappe.has_permission("Patient", "read", patient, throw=True)
+	frappe.has_permission("Patient Encounter", "read", throw=True)
+	limit = min(int(limit or PAGE_SIZE), MAX_PAGE_SIZE)
+	field = f"{frappe.session.user}:{cursor or ''}:{limit}"
+
+	page = frappe.cache.hget(_cache_key(patient), field)
+	if page is None:
+		page = _render(patient, cursor, limit)
+		frappe.cache.hset(_cache_key(patient), field, page)
+	return page
+
+
+def _render(patient: str, cursor: str | None, limit: int) -> dict:
+	filters, or_filters = [["patient", "=", patient]], None
+	if cursor:
+		# creation <= c AND (creation < c OR name < n)  ==  (creation, name) < (c, n)
+		creation, name = cursor.split("|", 1)
+		creation = get_datetime(creation)
+		filters.append(["creation", "<=", creation])
+		or_filters = [["creation", "<", creation], ["name", "<", name]]
+
+	rows = frappe.get_list(
+		"Patient Encounter",
+		filters=filters,
+		or_filters=or_filters,
+		fields=list(ENCOUNTER_FIELDS),
+		order_by="creation desc, name desc",
+		limit_page_length=limit + 1,
+	)
+	next_cursor = None
+	if len(rows) > limit:
+		rows = rows[:limit]
+		next_cursor = f"{rows[-1].creation}|{rows[-1].name}"
+
+	html = frappe.render_template(
+		TEMPLATE, {"patient": patient, "encounters": rows, "next_cursor": next_cursor}
+	)
+	return {"html": html, "next_cursor": next_cursor}
+
+
+# ----------------- doc_events -----------------
+
+
+def on_patient_load(doc, method=None):
+	"""Patient onload: ship the first page with the form (cached, so usually one Redis read)."""
+	if doc.has_permission("read") and frappe.has_permission("Patient Encounter", "read"):
+		doc.set_onload("sr_pex_launcher", get_launcher(doc.name))
+
+
+def on_encounter_insert(doc, method=None):
+	"""Patient Encounter after_insert: remember it as the patient's latest."""
+	if doc.patient:
+		frappe.db.set_value("Patient", doc.patient, "sr_last_created_pe", doc.name, update_modified=False)
+
+
+def on_encounter_trash(doc, method=None):
+	"""Patient Encounter on_trash: move sr_last_created_pe to the previous encounter.
+
+	Runs before delete_doc's link check, which would otherwise find the Patient
+	still pointing at this encounter and refuse the delete.
+	"""
+	if not doc.patient or frappe.db.get_value("Patient", doc.patient, "sr_last_created_pe") != doc.name:
+		return
+	previous = frappe.get_all(
+		"Patient Encounter",
+		filters={"patient": doc.patient, "name": ["!=", doc.name]},
+		order_by="creation desc, name desc",
+		limit=1,
+		pluck="name",
+	)
+	frappe.db.set_value(
+		"Patient", doc.patient, "sr_last_created_pe", previous[0] if previous else None, update_modified=False
+	)
+
+
+def invalidate(doc, method=None):
+	"""Patient Encounter after_insert / on_update / on_update_after_submit / on_cancel / on_trash."""
+	patients = {doc.get("patient")}
+	before = doc.get_doc_before_save() if method != "after_insert" else None
+	if before:
+		patients.add(before.get("patient"))
+	invalidate_patients(patients)
+
+
+def invalidate_patients(patients):
+	"""Drop the cached launcher pages of `patients` (also used by archive.py's raw moves)."""
+	for patient in set(patients) - {None, ""}:
+		frappe.cache.delete_value(_cache_key(patient))
@@ -0,0 +1,365 @@
+"""Streaming Patient / Customer importer for Practo and legacy exports (CSV or XLSX).
+
+Rows are read lazily and handled in chunks. Each chunk costs one Patient lookup
+(on `sr_practo_id` / `sr_patient_id`) and one Customer lookup (on
+`sr_customer_id`). Changed patients are written with batched UPDATEs, and only
+new patients go through a full document insert. Each chunk is committed together
+with a checkpoint, so a failed run resumes after the last committed row.
+
+    bench --site <site> execute sriaas_booking.practo_import.import_file --kwargs "{'path': '/path/export.xlsx'}"
+"""
+
+import csv
+import hashlib
+import os
+import time
+
+import frappe
+from frappe import _
+from frappe.utils import getdate
+
+from sriaas_booking import patient_age, patient_search
+
+CHUNK_SIZE = 500
+CHECKPOINT_PREFIX = "sriaas_booking_practo_import:"
+MAX_REPORTED_ERRORS = 100
+EXTRA_KEY = "__extra__"
+
+# export header (lower-cased) → Patient field; Patient fieldnames are accepted as-is too
+COLUMN_MAP = {
+	"patient number": "sr_practo_id",
+	"practo id": "sr_practo_id",
+	"patient id": "sr_patient_id",
+	"customer id": "sr_customer_id",
+	"patient name": "patient_name",
+	"first name": "first_name",
+	"last name": "last_name",
+	"mobile number": "mobile",
+	"mobile": "mobile",
+	"email address": "email",
+	"email": "email",
+	"gender": "sex",
+	"date of birth": "dob",
+	"department": "sr_medical_department",
+}
+PATIENT_IMPORT_FIELDS = (
+	"first_name",
+	"last_name",
+	"sex",
+	"dob",
+	"mobile",
+	"email",
+	"sr_practo_id",
+	"sr_patient_id",
+	"sr_medical_department",
+)
+
+# ----------------- reading -----------------
+
+
+def _iter_rows(path: str):
+	"""Yield one {header: value} dict per data row without loading the file."""
+	if path.lower().endswith(".xlsx"):
+		from openpyxl import load_workbook
+
+		wb = load_workbook(path, read_only=True, data_only=True)
+		try:
+			rows = wb.active.iter_rows(values_only=True)
+			header = [str(h or "").strip() for h in next(rows, [])]
+			for values in rows:
+				values = list(values)
+				extra = values[len(header) :]
+				values = values[: len(header)] + [None] * (len(header) - len(values))  # short rows: blanks
+				row = dict(zip(header, values, strict=True))
+				if extra:
+					row[EXTRA_KEY] = extra
+				yield row
+		finally:
+			wb.close()
+	else:
+		with open(path, newline="", encoding="utf-8-sig") as f:
+			# short rows get None for the missing cells, long rows keep the surplus under EXTRA_KEY
+			yield from csv.DictReader(f, restkey=EXTRA_KEY)
+
+
+def _map_row(raw: dict) -> dict:
+	"""Patient fields of one raw row; raises ValueError for rows that cannot be imported."""
+	extra = [v for v in raw.pop(EXTRA_KEY, None) or [] if v not in (None, "")]
+	if extra:
+		raise ValueError(_("Row has {0} value(s) beyond the header columns").format(len(extra)))
+	row = {}
+	for header, value in raw.items():
+		field = COLUMN_MAP.get(str(header or "").strip().lower(), header)
+		if value in (None, ""):
+			continue
+		row[field] = value.strip() if isinstance(value, str) else value
+	if row.get("dob"):
+		try:
+			row["dob"] = str(getdate(row["dob"]))
+		except Exception:
+			raise ValueError(_("Invalid date of birth {0}").format(row["dob"])) from None
+	if not row.get("first_name") and row.get("patient_name"):
+		row["first_name"], _sep, last = row["patient_name"].partition(" ")
+		if last and not row.get("last_name"):
+			row["last_name"] = last
+	return row
+
+
+def _chunks(rows, size: int):
+	chunk = []
+	for row in rows:
+		chunk.append(row)
+		if len(chunk) == size:
+			yield chunk
+			chunk = []
+	if chunk:
+		yield chunk
+
+
+# ----------------- entry points -----------------
+
+
+@frappe.whitelist(methods=["POST"])
+def enqueue_import(file_url: str, restart: bool = False):
+	"""Queue an import of an uploaded File (by file_url) on the long queue."""
+	frappe.only_for("System Manager")
+	path = frappe.get_doc("File", {"file_url": file_url}).get_full_path()
+	frappe.enqueue(
+		"sriaas_booking.practo_import.import_file",
+		queue="long",
+		timeout=4 * 3600,
+		job_id=f"sr_practo_import::{frappe.local.site}::{file_url}",
+		deduplicate=True,
+		path=path,
+		restart=frappe.utils.cint(restart),
+	)
+
+
+def import_file(path: str, chunk_size: int = CHUNK_SIZE, restart: bool = False) -> dict:
+	"""Import `path`, resuming from its checkpoint unless `restart`; returns the throughput report."""
+	key = _checkpoint_key(path)
+	state = {} if restart else (frappe.parse_json(frappe.db.get_global(key) or "{}") or {})
+	done = state.get("rows", 0)
+	stats = {k: state.get(k, 0) for k in ("created", "updated", "unchanged", "failed")}
+	errors = state.get("errors", [])
+
+	started = time.monotonic()
+	processed = 0
+	for index, chunk in enumerate(_chunks(_iter_rows(path), chunk_size)):
+		first = index * chunk_size
+		if first + len(chunk) <= done:
+			continue  # committed in an earlier run
+		chunk = chunk[max(done - first, 0) :]
+		first = max(first, done)
+
+		result = _import_chunk(chunk, first)
+		for k in stats:
+			stats[k] += result[k]
+		errors = (errors + result["errors"])[:MAX_REPORTED_ERRORS]
+		done = first + len(chunk)
+		processed += len(chunk)
+		frappe.db.set_global(key, frappe.as_json({"rows": done, **stats, "errors": errors}))
+		frappe.db.commit()
+
+	seconds = max(time.monotonic() - started, 1e-6)
+	report = {
+		"path": path,
+		"rows": done,
+		"processed_this_run": processed,
+		**stats,
+		"seconds": round(seconds, 3),
+		"rows_per_sec": round(processed / seconds),
+		"errors": errors,
+	}
+	frappe.logger("sriaas_booking").info(
+		{"practo_import": {k: v for k, v in report.items() if k != "errors"}}
+	)
+	return report
+
+
+def _checkpoint_key(path: str) -> str:
+	st = os.stat(path)
+	return (
+		CHECKPOINT_PREFIX
+		+ hashlib.sha1(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest()[:16]
+	)
+
+
+# ----------------- one chunk -----------------
+
+
+def _import_chunk(chunk: list[dict], first: int) -> dict:
+	result = {"created": 0, "updated": 0, "unchanged": 0, "failed": 0, "errors": []}
+
+	rows = []  # (line, mapped row)
+	for offset, raw in enumerate(chunk):
+		line = first + offset + 2  # 1-based, after the header row
+		try:
+			row = _map_row(raw)
+		except Exception as e:
+			_fail(result, line, str(e) or e.__class__.__name__)
+			continue
+		if not (row.get("sr_practo_id") or row.get("sr_patient_id")):
+			_fail(result, line, _("Row has neither Practo ID nor Patient ID"))
+			continue
+		rows.append((line, row))
+
+	existing = _existing_patients([r for _line, r in rows])
+	customers = _existing_customers([r for _line, r in rows])
+
+	updates, lines, reindex, customer_ids = {}, {}, [], {}  # updates/lines keyed by Patient name
+	for line, row in rows:
+		current = existing.get(("sr_practo_id", row.get("sr_practo_id"))) or existing.get(
+			("sr_patient_id", row.get("sr_patient_id"))
+		)
+		if current:
+			changed = {
+				f: row[f]
+				for f in PATIENT_IMPORT_FIELDS
+				if f in row and str(row[f]) != str(current.get(f) or "")
+			}
+			if row.get("sr_customer_id") and customers.get(row["sr_customer_id"]) not in (
+				None,
+				current.customer,
+			):
+				changed["customer"] = customers[row["sr_customer_id"]]
+			elif row.get("sr_customer_id") and current.customer and row["sr_customer_id"] not in customers:
+				customer_ids[current.customer] = {"sr_customer_id": row["sr_customer_id"]}
+			if changed:
+				updates[current.name] = {**updates.get(current.name, {}), **_derived(current, changed)}
+				lines[current.name] = line
+				current.update(changed)
+			else:
+				result["unchanged"] += 1
+			continue
+
+		name = _insert_patient(row, customers, result, line)
+		if name:
+			# later rows of the same chunk with the same IDs update this one
+			created = frappe._dict(
+				{**row, "name": name, "customer": customers.get(row.get("sr_customer_id"))}
+			)
+			for key in ("sr_practo_id", "sr_patient_id"):
+				if row.get(key):
+					existing[(key, row[key])] = created
+
+	# bulk_update skips validate and hooks: links are checked here, derived fields were set by _derived
+	for name, message in _invalid_links(updates).items():
+		_fail(result, lines[name], message)
+		del updates[name]
+	if updates:
+		frappe.db.bulk_update("Patient", updates, chunk_size=CHUNK_SIZE)
+		result["updated"] += len(updates)
+		patients = {r.name: r for r in existing.values()}  # rows already carry the changed values
+		reindex = [
+			patients[name] for name, u in updates.items() if any(f in u for f in patient_search.SEARCH_FIELDS)
+		]
+	if customer_ids:
+		frappe.db.bulk_update("Customer", customer_ids, chunk_size=CHUNK_SIZE)
+	patient_search.reindex(reindex)
+	return result
+
+
+def _derived(current: dict, changed: dict) -> dict:
+	"""`changed` plus the fields Patient.validate would recompute from it."""
+	out = dict(changed)
+	if "first_name" in changed or "last_name" in changed:
+		parts = [changed.get(f, current.get(f)) for f in ("first_name", "middle_name", "last_name")]
+		out["patient_name"] = " ".join(p for p in parts if p)
+	if "dob" in changed:
+		out["sr_patient_age"] = patient_age.age_string(getdate(changed["dob"]), getdate())
+	return out
+
+
+def _invalid_links(updates: dict[str, dict]) -> dict[str, str]:
+	"""{patient: message} for updates whose Link values do not exist; one query per linked doctype."""
+	errors = {}
+	for df in frappe.get_meta("Patient").get_link_fields():
+		values = {u[df.fieldname] for u in updates.values() if u.get(df.fieldname)}
+		if not values:
+			continue
+		found = set(frappe.get_all(df.options, filters={"name": ["in", list(values)]}, pluck="name"))
+		for name, u in updates.items():
+			value = u.get(df.fieldname)
+			if value and value not in found and name not in errors:
+				errors[name] = _("{0} {1} not found").format(df.options, value)
+	return errors
+
+
+def _existing_patients(chunk: list[dict]) -> dict[tuple, dict]:
+	"""{(key field, value): patient row} for every ID in the chunk, in one query."""
+	ids = {k: [r[k] for r in chunk if r.get(k)] for k in ("sr_practo_id", "sr_patient_id")}
+	or_filters = {k: ["in", v] for k, v in ids.items() if v}
+	if not or_filters:
+		return {}
+	rows = frappe.get_all(
+		"Patient", or_filters=or_filters, fields=["name", "customer", "middle_name", *PATIENT_IMPORT_FIELDS]
+	)
+	found = {}
+	for r in rows:
+		if r.dob:
+			r.dob = str(r.dob)
+		for key in ids:
+			if r.get(key):
+				found[(key, r[key])] = r
+	return found
+
+
+def _existing_customers(chunk: list[dict]) -> dict[str, str]:
+	"""{sr_customer_id: Customer name} for the chunk, in one query."""
+	ids = list({r["sr_customer_id"] for r in chunk if r.get("sr_customer_id")})
+	if not ids:
+		return {}
+	return dict(
+		frappe.get_all(
+			"Customer",
+			filters={"sr_customer_id": ["in", ids]},
+			fields=["sr_customer_id", "name"],
+			as_list=True,
+		)
+	)
+
+
+def _insert_patient(row: dict, customers: dict, result: dict, line: int) -> str | None:
+	savepoint = f"sr_practo_{line}"
+	frappe.db.savepoint(savepoint)
+	try:
+		customer_id = row.get("sr_customer_id")
+		doc = frappe.get_doc(
+			{
+				"doctype": "Patient",
+				**{f: row[f] for f in PATIENT_IMPORT_FIELDS if f in row},
+				"customer": customers.get(customer_id),
+			}
+		)
+		doc.insert(ignore_permissions=True)
+
+		if customer_id and customer_id not in customers:
+			if doc.customer:  # Healthcare created one (link_customer_to_patient)
+				frappe.db.set_value(
+					"Customer", doc.customer, "sr_customer_id", customer_id, update_modified=False
+				)
+			else:
+				customer = frappe.get_doc(
+					{
+						"doctype": "Customer",
+						"customer_name": doc.patient_name,
+						"customer_type": "Individual",
+						"sr_customer_id": customer_id,
+					}
+				).insert(ignore_permissions=True)
+				frappe.db.set_value("Patient", doc.name, "customer", customer.name, update_modified=False)
+				doc.customer = customer.name
+			customers[customer_id] = doc.customer
+
+		result["created"] += 1
+		return doc.name
+	except Exception as e:
+		frappe.db.rollback(save_point=savepoint)
+		frappe.clear_messages()
+		_fail(result, line, str(e) or e.__class__.__name__)
+
+
+def _fail(result: dict, line: int, message: str):
+	result["failed"] += 1
+	result["errors"].append({"row": line, "error": message})
@@ -0,0 +1,100 @@
+"""Per-step profiling for install/migrate hooks.
+
+    profiler = StepProfiler("after_migrate")
+    with profiler.step("custom_fields"):
+        ...
+    profiler.finish()
+
+Each step records wall time, SQL queries, rows written (INSERT/UPDATE/DELETE
+rowcount) and `frappe.clear_cache` calls. `finish` prints a summary, logs it and
+keeps the last HISTORY_SIZE summaries per site, tagged with the app version
+(unless the profiler was created with `keep_history=False`, as benchmarks.py does).
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe.utils import now
+
+import sriaas_booking
+
+HISTORY_KEY = "sriaas_booking_migrate_profile"
+HISTORY_SIZE = 20
+WRITE_VERBS = ("insert", "update", "delete", "replace")
+
+
+class StepProfiler:
+	def __init__(self, hook: str, keep_history: bool = True):
+		self.hook = hook
+		self.keep_history = keep_history
+		self.steps = []
+		self.started = time.perf_counter()
+
+	@contextmanager
+	def step(self, name: str):
+		stats = {"step": name, "seconds": 0.0, "queries": 0, "rows_written": 0, "cache_clears": 0}
+		orig_sql, orig_clear_cache = frappe.db.sql, frappe.clear_cache
+
+		def sql(query, *args, **kwargs):
+			stats["queries"] += 1
+			result = orig_sql(query, *args, **kwargs)
+			if str(query).lstrip()[:7].lower().startswith(WRITE_VERBS):
+				stats["rows_written"] += max(getattr(frappe.db._cursor, "rowcount", 0) or 0, 0)
+			return result
+
+		def clear_cache(*args, **kwargs):
+			stats["cache_clears"] += 1
+			return orig_clear_cache(*args, **kwargs)
+
+		frappe.db.sql, frappe.clear_cache = sql, clear_cache
+		start = time.perf_counter()
+		try:
+			yield stats
+		finally:
+			stats["seconds"] = round(time.perf_counter() - start, 4)
+			frappe.db.sql, frappe.clear_cache = orig_sql, orig_clear_cache
+			self.steps.append(stats)
+
+	def summary(self, **extra) -> dict:
+		totals = {k: sum(s[k] for s in self.steps) for k in ("queries", "rows_written", "cache_clears")}
+		return {
+			"hook": self.hook,
+			"app_version": sriaas_booking.__version__,
+			"site": frappe.local.site,
+			"at": now(),
+			"seconds": round(time.perf_counter() - self.started, 4),
+			**totals,
+			**extra,
+			"steps": self.steps,
+		}
+
+	def finish(self, **extra) -> dict:
+		summary = self.summary(**extra)
+		print(_format(summary))
+		frappe.logger("sriaas_booking").info({"migrate_profile": summary})
+
+		if self.keep_history:
+			history = get_history()
+			history.append(summary)
+			frappe.db.set_global(HISTORY_KEY, json.dumps(history[-HISTORY_SIZE:]))
+		return summary
+
+
+def get_history() -> list[dict]:
+	"""Stored summaries for this site, oldest first."""
+	raw = frappe.db.get_global(HISTORY_KEY)
+	return json.loads(raw) if raw else []
+
+
+def _format(summary: dict) -> str:
+	lines = [
+		f"sriaas_booking {summary['hook']} ({summary['app_version']}): {summary['seconds']}s, "
+		f"{summary['queries']} queries, {summary['rows_written']} rows written, {summary['cache_clears']} cache clears"
+	]
+	for s in summary["steps"]:
+		lines.append(
+			f"  {s['step']:<24} {s['seconds']:>8.3f}s {s['queries']:>6} q {s['rows_written']:>6} w {s['cache_clears']:>4} cc"
+		)
+	return "\n".join(lines)
@@ -0,0 +1,24 @@
+// Patient form: SR styles (hashed bundle, loaded on first open) and the PE launcher
+// (pe_launcher.py ships its first page in __onload.sr_pex_launcher).
+frappe.ui.form.on("Patient", {
+	setup() {
+		frappe.require("sr_patient.bundle.css");
+	},
+
+	refresh(frm) {
+		const field = frm.fields_dict.sr_pex_launcher_html;
+		const launcher = frm.doc.__onload && frm.doc.__onload.sr_pex_launcher;
+		if (!field || frm.is_new() || !launcher) return;
+
+		field.$wrapper.html(launcher.html);
+		field.$wrapper.off("click.sr_pe").on("click.sr_pe", ".sr-pe-launcher-more", function () {
+			const $btn = $(this);
+			frappe
+				.xcall("sriaas_booking.pe_launcher.get_launcher", {
+					patient: frm.doc.name,
+					cursor: $btn.attr("data-cursor"),
+				})
+				.then((page) => $btn.replaceWith(page.html));
+		});
+	},
+});
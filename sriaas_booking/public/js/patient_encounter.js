@@ -0,0 +1,26 @@
+// Patient Encounter form: the header copies that used to come from fetch_from (see encounter_header.py).
+const SR_HEADER_LINKS = [
+	"patient",
+	"sr_ayurvedic_practitioner",
+	"sr_homeopathy_practitioner",
+	"sr_allopathy_practitioner",
+];
+
+function sr_refresh_header(frm) {
+	const encounter = {};
+	SR_HEADER_LINKS.forEach((field) => (encounter[field] = frm.doc[field]));
+	frappe
+		.xcall("sriaas_booking.encounter_header.get_header", { encounter })
+		.then((header) => {
+			Object.entries(header).forEach(([field, value]) => {
+				if (frm.fields_dict[field] && frm.doc[field] !== value) {
+					frm.set_value(field, value);
+				}
+			});
+		});
+}
+
+const sr_header_handlers = {};
+SR_HEADER_LINKS.forEach((field) => (sr_header_handlers[field] = sr_refresh_header));
+
+frappe.ui.form.on("Patient Encounter", sr_header_handlers);
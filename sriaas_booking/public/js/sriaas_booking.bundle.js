@@ -0,0 +1,38 @@
+// SR masters from the boot payload (see sriaas_booking/masters.py): Link values of
+// these doctypes are resolved locally, and the copy is refreshed only when the
+// server announces a new version.
+frappe.provide("sriaas_booking.masters");
+
+sriaas_booking.masters.names = function (doctype) {
+	const masters = frappe.boot.sr_masters;
+	return masters && masters.data && masters.data[doctype];
+};
+
+sriaas_booking.masters.refresh = function (version) {
+	const masters = frappe.boot.sr_masters || {};
+	if (version && version === masters.version) return;
+	frappe
+		.xcall("sriaas_booking.masters.get_client_masters", { version: masters.version })
+		.then((r) => {
+			if (r.data) frappe.boot.sr_masters = r;
+		});
+};
+
+$(document).on("app_ready", function () {
+	frappe.realtime.on("sr_masters_version", (data) => sriaas_booking.masters.refresh(data.version));
+});
+
+frappe.after_ajax(() => {
+	const ControlLink = frappe.ui.form.ControlLink;
+	const validate = ControlLink.prototype.validate_link_and_fetch;
+	ControlLink.prototype.validate_link_and_fetch = function (value) {
+		const names = sriaas_booking.masters.names(this.get_options());
+		if (value && names && !Object.keys(this.fetch_map || {}).length && names.includes(value)) {
+			return value;
+		}
+		// not in the local copy: it may be newer than our version (missed realtime push),
+		// so ask the server as usual and catch up on the masters
+		if (value && names && !names.includes(value)) sriaas_booking.masters.refresh();
+		return validate.apply(this, arguments);
+	};
+});
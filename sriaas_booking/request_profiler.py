@@ -0,0 +1,247 @@
+"""Opt-in SQL profiling of Patient / Patient Encounter form loads and saves.
+
+When profiling is on, each `getdoc` / `savedocs` request for a PROFILED_DOCTYPES
+document records its query count, total SQL time, time per table and the slowest
+statements. Profiling is on for everyone when the site config sets
+`sr_sql_profiling: 1`. It can also be on for listed users (`sr_sql_profiling:
+["a@x.com"]`), or for a user for a while via `enable_profiling`.
+
+Requests push one small JSON sample to a Redis list, so a request never writes to
+the database. The hourly `flush_profiles` job folds the samples into
+`SR SQL Profile`, one row per day x doctype x action.
+"""
+
+import hashlib
+import json
+import re
+import time
+
+import frappe
+from frappe.utils import getdate, now
+
+PROFILE_DT = "SR SQL Profile"
+PROFILED_DOCTYPES = ("Patient", "Patient Encounter")
+ACTIONS = {
+	"frappe.desk.form.load.getdoc": "getdoc",
+	"frappe.desk.form.save.savedocs": "savedocs",
+}
+SAMPLES_KEY = "sriaas_booking:sql_profile_samples"
+USER_FLAG_KEY = "sriaas_booking:sql_profile_user:"
+MAX_PENDING = 10000  # samples kept between flushes
+SLOWEST = 5
+QUERY_CHARS = 500
+TABLE_RE = re.compile(r"`tab([^`]+)`")
+
+# ----------------- switches -----------------
+
+
+def is_enabled(user: str | None = None) -> bool:
+	user = user or frappe.session.user
+	setting = frappe.conf.get("sr_sql_profiling")
+	if setting == 1 or setting is True or (isinstance(setting, list) and user in setting):
+		return True
+	return bool(frappe.cache.get_value(USER_FLAG_KEY + user))
+
+
+@frappe.whitelist(methods=["POST"])
+def enable_profiling(user=None, minutes=60):
+	"""Profile `user` (default: the caller) for `minutes`."""
+	frappe.only_for("System Manager")
+	frappe.cache.set_value(USER_FLAG_KEY + (user or frappe.session.user), 1, expires_in_sec=int(minutes) * 60)
+
+
+@frappe.whitelist(methods=["POST"])
+def disable_profiling(user=None):
+	frappe.only_for("System Manager")
+	frappe.cache.delete_value(USER_FLAG_KEY + (user or frappe.session.user))
+
+
+# ----------------- request hooks -----------------
+
+
+def _target() -> tuple[str, str] | None:
+	"""(doctype, action) when this request is a profiled form load/save."""
+	cmd = frappe.form_dict.get("cmd")
+	path = getattr(getattr(frappe.local, "request", None), "path", "") or ""
+	if not cmd and path.startswith("/api/method/"):
+		cmd = path[len("/api/method/") :].split("/")[0]  # set on form_dict only later, by the API handler
+	action = ACTIONS.get(cmd)
+	if not action:
+		return None
+	if action == "getdoc":
+		doctype = frappe.form_dict.get("doctype")
+	else:
+		doc = frappe.form_dict.get("doc")
+		doctype = (frappe.parse_json(doc) or {}).get("doctype") if doc else None
+	return (doctype, action) if doctype in PROFILED_DOCTYPES else None
+
+
+def before_request():
+	"""before_request hook: wrap frappe.db.sql for a profiled request."""
+	target = _target()
+	if not target or not is_enabled():
+		return
+
+	sample = {
+		"doctype": target[0],
+		"action": target[1],
+		"queries": 0,
+		"sql_ms": 0.0,
+		"tables": {},
+		"slowest": [],
+	}
+	orig_sql = frappe.db.sql
+
+	def sql(query, *args, **kwargs):
+		start = time.perf_counter()
+		try:
+			return orig_sql(query, *args, **kwargs)
+		finally:
+			_record(sample, str(query), (time.perf_counter() - start) * 1000)
+
+	frappe.db.sql = sql
+	frappe.local.sr_sql_profile = (sample, orig_sql, time.perf_counter())
+
+
+def _record(sample: dict, query: str, ms: float):
+	sample["queries"] += 1
+	sample["sql_ms"] += ms
+	for table in set(TABLE_RE.findall(query)) or {"(other)"}:
+		t = sample["tables"].setdefault(table, [0, 0.0])
+		t[0] += 1
+		t[1] += ms
+	slowest = sample["slowest"]
+	if len(slowest) < SLOWEST or ms > slowest[-1][0]:
+		slowest.append((round(ms, 3), " ".join(query.split())[:QUERY_CHARS]))
+		slowest.sort(reverse=True)
+		del slowest[SLOWEST:]
+
+
+def after_request(response=None, request=None):
+	"""after_request hook: unwrap and queue the sample."""
+	state = getattr(frappe.local, "sr_sql_profile", None)
+	if not state:
+		return
+	sample, orig_sql, started = state
+	frappe.db.sql = orig_sql
+	frappe.local.sr_sql_profile = None
+
+	sample.update({"date": str(getdate()), "request_ms": round((time.perf_counter() - started) * 1000, 3)})
+	frappe.cache.lpush(SAMPLES_KEY, json.dumps(sample))
+	frappe.cache.ltrim(SAMPLES_KEY, 0, MAX_PENDING - 1)
+
+
+# ----------------- aggregation -----------------
+
+
+def _row_name(key: tuple) -> str:
+	return hashlib.md5("|".join(key).encode()).hexdigest()
+
+
+def flush_profiles() -> int:
+	"""Scheduler entry (hourly): fold queued samples into SR SQL Profile; returns samples folded."""
+	count = frappe.cache.llen(SAMPLES_KEY)
+	if not count:
+		return 0
+	# lpush adds at the head: the oldest `count` entries are the tail, new ones keep arriving at the head
+	raw = frappe.cache.lrange(SAMPLES_KEY, -count, -1)
+	frappe.cache.ltrim(SAMPLES_KEY, 0, -count - 1)
+
+	groups = {}
+	for item in raw:
+		s = json.loads(item)
+		key = (s["date"], s["doctype"], s["action"])
+		g = groups.setdefault(
+			key, {"requests": 0, "queries": 0, "sql_ms": 0.0, "max_ms": 0.0, "tables": {}, "slowest": []}
+		)
+		g["requests"] += 1
+		g["queries"] += s["queries"]
+		g["sql_ms"] += s["sql_ms"]
+		g["max_ms"] = max(g["max_ms"], s["sql_ms"])
+		_merge_tables(g["tables"], s["tables"])
+		g["slowest"] = _merge_slowest(g["slowest"], s["slowest"])
+
+	names = {_row_name(k): k for k in groups}
+	existing = {
+		r.name: r
+		for r in frappe.get_all(
+			PROFILE_DT,
+			filters={"name": ["in", list(names)]},
+			fields=[
+				"name",
+				"sr_requests",
+				"sr_queries",
+				"sr_sql_ms",
+				"sr_max_sql_ms",
+				"sr_tables",
+				"sr_slowest",
+			],
+		)
+	}
+
+	ts, user = now(), frappe.session.user
+	inserts, updates = [], {}
+	for name, key in names.items():
+		g = groups[key]
+		row = existing.get(name)
+		if row:
+			_merge_tables(g["tables"], json.loads(row.sr_tables or "{}"))
+			g["slowest"] = _merge_slowest(g["slowest"], json.loads(row.sr_slowest or "[]"))
+			g["requests"] += row.sr_requests or 0
+			g["queries"] += row.sr_queries or 0
+			g["sql_ms"] += row.sr_sql_ms or 0
+			g["max_ms"] = max(g["max_ms"], row.sr_max_sql_ms or 0)
+		values = {
+			"sr_requests": g["requests"],
+			"sr_queries": g["queries"],
+			"sr_sql_ms": round(g["sql_ms"], 3),
+			"sr_avg_queries": round(g["queries"] / g["requests"], 2),
+			"sr_avg_sql_ms": round(g["sql_ms"] / g["requests"], 3),
+			"sr_max_sql_ms": round(g["max_ms"], 3),
+			"sr_tables": json.dumps(dict(sorted(g["tables"].items(), key=lambda t: -t[1][1])), indent=1),
+			"sr_slowest": json.dumps(g["slowest"], indent=1),
+		}
+		if row:
+			updates[name] = values
+		else:
+			inserts.append((name, ts, ts, user, user, *key, *values.values()))
+
+	if inserts:
+		frappe.db.bulk_insert(
+			PROFILE_DT,
+			fields=[
+				"name",
+				"creation",
+				"modified",
+				"owner",
+				"modified_by",
+				"sr_date",
+				"sr_doctype",
+				"sr_action",
+				"sr_requests",
+				"sr_queries",
+				"sr_sql_ms",
+				"sr_avg_queries",
+				"sr_avg_sql_ms",
+				"sr_max_sql_ms",
+				"sr_tables",
+				"sr_slowest",
+			],
+			values=inserts,
+		)
+	if updates:
+		frappe.db.bulk_update(PROFILE_DT, updates)
+	frappe.db.commit()
+	return len(raw)
+
+
+def _merge_tables(into: dict, other: dict):
+	"""{table: [queries, ms]} summed in place."""
+	for table, (queries, ms) in other.items():
+		t = into.setdefault(table, [0, 0.0])
+		t[0] += queries
+		t[1] = round(t[1] + ms, 3)
+
+
+def _merge_slowest(a: list, b: list) -> list:
+	return sorted((tuple(x) for x in (*a, *b)), reverse=True)[:SLOWEST]
@@ -0,0 +1,1186 @@
+"""Declarative schema manifest for sriaas_booking.
+
+Everything the app adds to a site (SR doctypes, Custom Fields, Property Setters,
+indexes) is described here as plain data. `install.py` fingerprints the manifest and
+applies only what differs from the live site.
+"""
+
+import hashlib
+import json
+
+import frappe
+
+MODULE_DEF_NAME = "Sriaas Booking"  # the Module Def shown in Desk
+
+_SM_PERMS = {
+	"role": "System Manager",
+	"read": 1,
+	"write": 1,
+	"create": 1,
+	"delete": 1,
+	"print": 1,
+	"email": 1,
+	"export": 1,
+}
+
+# ----------------- SR doctypes (dependency order: masters/child tables first) -----------------
+
+SR_DOCTYPES = [
+	{
+		"doctype": "DocType",
+		"name": "SR Patient Disable Reason",
+		"module": MODULE_DEF_NAME,
+		"custom": 0,
+		"istable": 0,
+		"issingle": 0,
+		"editable_grid": 0,
+		"track_changes": 1,
+		"allow_rename": 0,
+		"allow_import": 1,
+		"naming_rule": "By fieldname",
+		"autoname": "field:sr_reason_name",
+		"title_field": "sr_reason_name",
+		"field_order": ["sr_reason_name", "is_active", "description"],
+		"fields": [
+			{
+				"fieldname": "sr_reason_name",
+				"label": "Reason Name",
+				"fieldtype": "Data",
+				"reqd": 1,
+				"in_list_view": 1,
+				"in_standard_filter": 1,
+				"unique": 1,
+			},
+			{
+				"fieldname": "is_active",
+				"label": "Is Active",
+				"fieldtype": "Check",
+				"default": "1",
+			},
+			{
+				"fieldname": "description",
+				"label": "Description",
+				"fieldtype": "Small Text",
+			},
+		],
+		"permissions": [
+			_SM_PERMS,
+			{
+				"role": "Healthcare Administrator",
+				"read": 1,
+				"write": 1,
+				"create": 1,
+				"delete": 1,
+			},
+		],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Patient Invoice View",
+		"module": MODULE_DEF_NAME,
+		"custom": 0,
+		"istable": 1,
+		"editable_grid": 1,
+		"issingle": 0,
+		"track_changes": 0,
+		"field_order": [
+			"sr_invoice_no",
+			"sr_posting_date",
+			"sr_grand_total",
+			"sr_outstanding",
+		],
+		"fields": [
+			{
+				"fieldname": "sr_invoice_no",
+				"label": "Sales Invoice",
+				"fieldtype": "Link",
+				"options": "Sales Invoice",
+				"in_list_view": 1,
+				"reqd": 0,
+			},
+			{
+				"fieldname": "sr_posting_date",
+				"label": "Posting Date",
+				"fieldtype": "Datetime",
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_grand_total",
+				"label": "Grand Total",
+				"fieldtype": "Currency",
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_outstanding",
+				"label": "Outstanding",
+				"fieldtype": "Currency",
+				"in_list_view": 1,
+			},
+		],
+		"permissions": [],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Patient Payment View",
+		"module": MODULE_DEF_NAME,
+		"custom": 0,
+		"istable": 1,
+		"editable_grid": 1,
+		"issingle": 0,
+		"track_changes": 0,
+		"field_order": [
+			"sr_payment_entry",
+			"sr_posting_date",
+			"sr_paid_amount",
+			"sr_mode_of_payment",
+		],
+		"fields": [
+			{
+				"fieldname": "sr_payment_entry",
+				"label": "Payment Entry",
+				"fieldtype": "Link",
+				"options": "Payment Entry",
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_posting_date",
+				"label": "Posting Date",
+				"fieldtype": "Datetime",
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_paid_amount",
+				"label": "Paid Amount",
+				"fieldtype": "Currency",
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_mode_of_payment",
+				"label": "Mode of Payment",
+				"fieldtype": "Data",
+				"in_list_view": 1,
+			},
+		],
+		"permissions": [],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Sales Type",
+		"module": MODULE_DEF_NAME,
+		"naming_rule": "By fieldname",
+		"autoname": "field:sr_sales_type_name",
+		"title_field": "sr_sales_type_name",
+		"field_order": ["sr_sales_type_name"],
+		"fields": [
+			{
+				"fieldname": "sr_sales_type_name",
+				"label": "Sales Type",
+				"fieldtype": "Data",
+				"reqd": 1,
+				"in_list_view": 1,
+				"unique": 1,
+			}
+		],
+		"permissions": [_SM_PERMS],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Encounter Status",
+		"module": MODULE_DEF_NAME,
+		"naming_rule": "By fieldname",
+		"autoname": "field:sr_status_name",
+		"title_field": "sr_status_name",
+		"field_order": ["sr_status_name"],
+		"fields": [{"fieldname": "sr_status_name", "label": "Status Name", "fieldtype": "Data", "unique": 1}],
+		"permissions": [_SM_PERMS],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Instructions",
+		"module": MODULE_DEF_NAME,
+		"naming_rule": "By fieldname",
+		"autoname": "field:sr_title",
+		"title_field": "sr_title",
+		"track_changes": 1,
+		"field_order": ["sr_title", "sr_description"],
+		"fields": [
+			{
+				"fieldname": "sr_title",
+				"label": "Title",
+				"fieldtype": "Data",
+				"reqd": 1,
+				"in_list_view": 1,
+				"unique": 1,
+			},
+			{"fieldname": "sr_description", "label": "Description", "fieldtype": "Small Text"},
+		],
+		"permissions": [_SM_PERMS],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Medication Template Item",
+		"module": MODULE_DEF_NAME,
+		"istable": 1,
+		"track_changes": 1,
+		"field_order": [
+			"sr_medication",
+			"sr_drug_code",
+			"sr_dosage",
+			"sr_period",
+			"sr_dosage_form",
+			"sr_instruction",
+		],
+		"fields": [
+			{
+				"fieldname": "sr_medication",
+				"label": "Medication",
+				"fieldtype": "Link",
+				"options": "Medication",
+				"reqd": 1,
+				"in_list_view": 1,
+			},
+			{"fieldname": "sr_drug_code", "label": "Drug Code", "fieldtype": "Link", "options": "Item"},
+			{
+				"fieldname": "sr_dosage",
+				"label": "Dosage",
+				"fieldtype": "Link",
+				"options": "Prescription Dosage",
+				"reqd": 1,
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_period",
+				"label": "Period",
+				"fieldtype": "Link",
+				"options": "Prescription Duration",
+				"reqd": 1,
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_dosage_form",
+				"label": "Dosage Form",
+				"fieldtype": "Link",
+				"options": "Dosage Form",
+				"reqd": 1,
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_instruction",
+				"label": "Instruction",
+				"fieldtype": "Link",
+				"options": "SR Instructions",
+				"reqd": 1,
+				"in_list_view": 1,
+			},
+		],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Medication Template",
+		"module": MODULE_DEF_NAME,
+		"naming_rule": "By fieldname",
+		"autoname": "field:sr_template_name",
+		"title_field": "sr_template_name",
+		"track_changes": 1,
+		"field_order": ["sr_template_name", "sr_instructions", "sr_medications"],
+		"fields": [
+			{
+				"fieldname": "sr_template_name",
+				"label": "Template Name",
+				"fieldtype": "Data",
+				"reqd": 1,
+				"in_list_view": 1,
+				"unique": 1,
+			},
+			{"fieldname": "sr_instructions", "label": "Instructions", "fieldtype": "Small Text"},
+			{
+				"fieldname": "sr_medications",
+				"label": "Medications",
+				"fieldtype": "Table",
+				"options": "SR Medication Template Item",
+			},
+		],
+		"permissions": [_SM_PERMS],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Delivery Type",
+		"module": MODULE_DEF_NAME,
+		"naming_rule": "By fieldname",
+		"autoname": "field:sr_delivery_type_name",
+		"title_field": "sr_delivery_type_name",
+		"track_changes": 1,
+		"field_order": ["sr_delivery_type_name"],
+		"fields": [
+			{
+				"fieldname": "sr_delivery_type_name",
+				"label": "Delivery / Service Type",
+				"fieldtype": "Data",
+				"reqd": 1,
+				"unique": 1,
+				"in_list_view": 1,
+			},
+		],
+		"permissions": [_SM_PERMS],
+	},
+	{
+		"doctype": "DocType",
+		"name": "SR Order Item",
+		"module": MODULE_DEF_NAME,
+		"custom": 0,
+		"istable": 1,
+		"editable_grid": 1,
+		"issingle": 0,
+		"track_changes": 1,
+		"field_order": [
+			"sr_item_code",
+			"sr_item_name",
+			"sr_item_description",
+			"sr_item_uom",
+			"sr_item_qty",
+			"sr_item_rate",
+			"sr_item_amount",
+		],
+		"fields": [
+			{
+				"fieldname": "sr_item_code",
+				"label": "Item",
+				"fieldtype": "Link",
+				"options": "Item",
+				"reqd": 1,
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_item_name",
+				"label": "Item Name",
+				"fieldtype": "Data",
+				"read_only": 1,
+				"fetch_from": "sr_item_code.item_name",
+			},
+			{"fieldname": "sr_item_description", "label": "Description", "fieldtype": "Small Text"},
+			{
+				"fieldname": "sr_item_uom",
+				"label": "UOM",
+				"fieldtype": "Link",
+				"options": "UOM",
+				"in_list_view": 1,
+			},
+			{
+				"fieldname": "sr_item_qty",
+				"label": "Qty",
+				"fieldtype": "Float",
+				"in_list_view": 1,
+				"default": 1,
+			},
+			{"fieldname": "sr_item_rate", "label": "Rate", "fieldtype": "Currency", "in_list_view": 1},
+			{
+				"fieldname": "sr_item_amount",
+				"label": "Amount",
+				"fieldtype": "Currency",
+				"in_list_view": 1,
+				"read_only": 1,
+			},
+		],
+		"permissions": [],
+	},
+	{
+		# Suffix tokens of Patient mobile / sr_patient_id / sr_practo_id (maintained by patient_search.py)
+		"doctype": "DocType",
+		"name": "SR Patient Search Index",
+		"module": MODULE_DEF_NAME,
+		"custom": 0,
+		"istable": 0,
+		"issingle": 0,
+		"track_changes": 0,
+		"in_create": 1,
+		"read_only": 1,
+		"autoname": "hash",
+		"field_order": ["sr_token", "sr_patient", "sr_field", "sr_position"],
+		"fields": [
+			{"fieldname": "sr_token", "label": "Token", "fieldtype": "Data", "in_list_view": 1},
+			{
+				"fieldname": "sr_patient",
+				"label": "Patient",
+				"fieldtype": "Link",
+				"options": "Patient",
+				"in_list_view": 1,
+			},
+			{"fieldname": "sr_field", "label": "Field", "fieldtype": "Data"},
+			{"fieldname": "sr_position", "label": "Position", "fieldtype": "Int"},
+		],
+		"permissions": [{"role": "System Manager", "read": 1}],
+	},
+	{
+		# Encounter counts per day x dimensions (maintained by encounter_rollup.py); name = md5 of the key
+		"doctype": "DocType",
+		"name": "SR Encounter Rollup",
+		"module": MODULE_DEF_NAME,
+		"custom": 0,
+		"istable": 0,
+		"issingle": 0,
+		"track_changes": 0,
+		"in_create": 1,
+		"read_only": 1,
+		"autoname": "hash",
+		"field_order": [
+			"sr_date",
+			"sr_encounter_type",
+			"sr_encounter_place",
+			"sr_encounter_status",
+			"sr_encounter_source",
+			"sr_sales_type",
+			"sr_count",
+		],
+		"fields": [
+			{"fieldname": "sr_date", "label": "Date", "fieldtype": "Date", "in_list_view": 1},
+			{
+				"fieldname": "sr_encounter_type",
+				"label": "Encounter Type",
+				"fieldtype": "Data",
+				"in_list_view": 1,
+			},
+			{"fieldname": "sr_encounter_place", "label": "Encounter Place", "fieldtype": "Data"},
+			{
+				"fieldname": "sr_encounter_status",
+				"label": "Encounter Status",
+				"fieldtype": "Data",
+				"in_list_view": 1,
+			},
+			{"fieldname": "sr_encounter_source", "label": "Encounter Source", "fieldtype": "Data"},
+			{"fieldname": "sr_sales_type", "label": "Sales Type", "fieldtype": "Data"},
+			{"fieldname": "sr_count", "label": "Count", "fieldtype": "Int", "in_list_view": 1},
+		],
+		"permissions": [
+			{"role": "System Manager", "read": 1},
+			{"role": "Healthcare Administrator", "read": 1},
+		],
+	},
+	{
+		# Form load/save SQL cost per day x doctype x action (maintained by request_profiler.py); name = md5 of the key
+		"doctype": "DocType",
+		"name": "SR SQL Profile",
+		"module": MODULE_DEF_NAME,
+		"custom": 0,
+		"istable": 0,
+		"issingle": 0,
+		"track_changes": 0,
+		"in_create": 1,
+		"read_only": 1,
+		"autoname": "hash",
+		"sort_field": "sr_date",
+		"field_order": [
+			"sr_date",
+			"sr_doctype",
+			"sr_action",
+			"sr_requests",
+			"sr_queries",
+			"sr_sql_ms",
+			"sr_avg_queries",
+			"sr_avg_sql_ms",
+			"sr_max_sql_ms",
+			"sr_tables",
+			"sr_slowest",
+		],
+		"fields": [
+			{
+				"fieldname": "sr_date",
+				"label": "Date",
+				"fieldtype": "Date",
+				"in_list_view": 1,
+				"in_standard_filter": 1,
+			},
+			{
+				"fieldname": "sr_doctype",
+				"label": "DocType",
+				"fieldtype": "Data",
+				"in_list_view": 1,
+				"in_standard_filter": 1,
+			},
+			{
+				"fieldname": "sr_action",
+				"label": "Action",
+				"fieldtype": "Data",
+				"in_list_view": 1,
+				"in_standard_filter": 1,
+			},
+			{"fieldname": "sr_requests", "label": "Requests", "fieldtype": "Int", "in_list_view": 1},
+			{"fieldname": "sr_queries", "label": "Queries", "fieldtype": "Int"},
+			{"fieldname": "sr_sql_ms", "label": "SQL Time (ms)", "fieldtype": "Float"},
+			{"fieldname": "sr_avg_queries", "label": "Avg Queries", "fieldtype": "Float", "in_list_view": 1},
+			{
+				"fieldname": "sr_avg_sql_ms",
+				"label": "Avg SQL Time (ms)",
+				"fieldtype": "Float",
+				"in_list_view": 1,
+			},
+			{"fieldname": "sr_max_sql_ms", "label": "Max SQL Time (ms)", "fieldtype": "Float"},
+			{"fieldname": "sr_tables", "label": "Cost per Table", "fieldtype": "Code", "options": "JSON"},
+			{
+				"fieldname": "sr_slowest",
+				"label": "Slowest Statements",
+				"fieldtype": "Code",
+				"options": "JSON",
+			},
+		],
+		"permissions": [{"role": "System Manager", "read": 1, "delete": 1}],
+	},
+]
+
+# ----------------- Custom Fields -----------------
+
+PATIENT_FIELDS = [
+	# --- DETAILS TAB ---
+	{
+		"fieldname": "sr_medical_department",
+		"label": "Department",
+		"fieldtype": "Link",
+		"options": "Medical Department",
+		"insert_after": "patient_name",
+	},
+	{
+		"fieldname": "sr_patient_id",
+		"label": "Patient ID",
+		"fieldtype": "Data",
+		"insert_after": "sr_medical_department",
+	},
+	{"fieldname": "sr_practo_id", "label": "Practo ID", "fieldtype": "Data", "insert_after": "sr_patient_id"},
+	{"fieldname": "sr_patient_age", "label": "Patient Age", "fieldtype": "Data", "insert_after": "age_html"},
+	{
+		"fieldname": "sr_followup_disable_reason",
+		"label": "Followup Disable Reason",
+		"fieldtype": "Link",
+		"options": "SR Patient Disable Reason",
+		"insert_after": "status",
+	},
+	{
+		"fieldname": "sr_followup_status",
+		"label": "Followup Status",
+		"fieldtype": "Select",
+		"options": "\nPending\nDone",
+		"insert_after": "user_id",
+	},
+	# --- INVOICES TAB ---
+	{
+		"fieldname": "sr_invoices_tab",
+		"label": "Invoices",
+		"fieldtype": "Tab Break",
+		"insert_after": "other_risk_factors",
+	},
+	{
+		"fieldname": "sr_sales_invoice_list",
+		"label": "Sales Invoices",
+		"fieldtype": "Table",
+		"options": "SR Patient Invoice View",
+		"read_only": 1,
+		"insert_after": "sr_invoices_tab",
+	},
+	# --- PAYMENTS TAB ---
+	{
+		"fieldname": "sr_payments_tab",
+		"label": "Payments",
+		"fieldtype": "Tab Break",
+		"insert_after": "sr_sales_invoice_list",
+	},
+	{
+		"fieldname": "sr_payment_entry_list",
+		"label": "Payment Entries",
+		"fieldtype": "Table",
+		"options": "SR Patient Payment View",
+		"read_only": 1,
+		"insert_after": "sr_payments_tab",
+	},
+	# --- PEX TAB (Patient Encounters) ---
+	{
+		"fieldname": "sr_pex_tab",
+		"label": "Patient Encounters",
+		"fieldtype": "Tab Break",
+		"insert_after": "sr_payment_entry_list",
+	},
+	{
+		"fieldname": "sr_pex_launcher_html",
+		"label": "PE Launcher",
+		"fieldtype": "HTML",
+		"read_only": 1,
+		"insert_after": "sr_pex_tab",
+	},
+	{
+		"fieldname": "sr_last_created_pe",
+		"label": "Last Created Patient Encounter",
+		"fieldtype": "Link",
+		"options": "Patient Encounter",
+		"insert_after": "sr_pex_launcher_html",
+	},
+	# --- FOLLOWUP MARKER TAB ---
+	{
+		"fieldname": "sr_followup_marker_tab",
+		"label": "Follow-up Marker",
+		"fieldtype": "Tab Break",
+		"insert_after": "sr_last_created_pe",
+	},
+	{
+		"fieldname": "sr_followup_day",
+		"label": "Follow-up Day",
+		"fieldtype": "Select",
+		"options": "\nMon\nTue\nWed\nThu\nFri\nSat",
+		"insert_after": "sr_followup_marker_tab",
+	},
+	{
+		"fieldname": "sr_followup_id",
+		"label": "Follow-up ID",
+		"fieldtype": "Select",
+		"options": "\n0\n1\n2\n3\n4\n5\n6\n7\n8\n9",
+		"insert_after": "sr_followup_day",
+	},
+]
+
+CUSTOMER_FIELDS = [
+	{
+		"fieldname": "sr_customer_id",
+		"label": "Customer ID",
+		"fieldtype": "Data",
+		"insert_after": "salutation",
+		"in_list_view": 1,
+		"in_standard_filter": 1,
+		"unique": 1,
+	},
+]
+
+PRACTITIONER_FIELDS = [
+	{
+		"fieldname": "sr_reg_no",
+		"label": "Registration No",
+		"fieldtype": "Data",
+		"insert_after": "office_phone",
+	},
+	{
+		"fieldname": "sr_qualification",
+		"label": "Qualification",
+		"fieldtype": "Data",
+		"reqd": 1,
+		"insert_after": "sr_reg_no",
+	},
+	{
+		"fieldname": "sr_college_university",
+		"label": "College/University",
+		"fieldtype": "Data",
+		"insert_after": "sr_qualification",
+	},
+	{
+		"fieldname": "sr_pathy",
+		"label": "Pathy",
+		"fieldtype": "Select",
+		"options": "\nAyurveda\nHomeopathy\nAllopathy",
+		"in_list_view": 1,
+		"in_standard_filter": 1,
+		"insert_after": "practitioner_type",
+	},
+]
+
+
+def _encounter_fields(lead_source_dt: str) -> list[dict]:
+	"""Patient Encounter custom fields; the lead source doctype is resolved per site.
+
+	Header copies (sr_pe_*, sr_*_practitioner_name) carry an empty fetch_from on
+	purpose: encounter_header.py fills them in batched queries on validate.
+	"""
+	return [
+		# --- header ---
+		{
+			"fieldname": "sr_encounter_type",
+			"label": "Encounter Type",
+			"fieldtype": "Select",
+			"options": "\nFollowup\nOrder",
+			"reqd": 1,
+			"in_list_view": 1,
+			"in_standard_filter": 1,
+			"allow_on_submit": 1,
+			"insert_after": "naming_series",
+		},
+		{
+			"fieldname": "sr_encounter_place",
+			"label": "Encounter Place",
+			"fieldtype": "Select",
+			"options": "\nOnline\nOPD",
+			"reqd": 1,
+			"in_list_view": 1,
+			"in_standard_filter": 1,
+			"insert_after": "sr_encounter_type",
+		},
+		{
+			"fieldname": "sr_sales_type",
+			"label": "Sales Type",
+			"fieldtype": "Link",
+			"options": "SR Sales Type",
+			"insert_after": "sr_encounter_place",
+			"depends_on": 'eval:doc.sr_encounter_type=="Order"',
+			"mandatory_depends_on": 'eval:doc.sr_encounter_type=="Order"',
+		},
+		{
+			"fieldname": "sr_pe_mobile",
+			"label": "Patient Mobile",
+			"fieldtype": "Data",
+			"read_only": 1,
+			"depends_on": "eval:doc.patient",
+			"fetch_from": "",
+			"in_list_view": 1,
+			"in_standard_filter": 1,
+			"insert_after": "inpatient_status",
+		},
+		{
+			"fieldname": "sr_pe_id",
+			"label": "Patient ID",
+			"fieldtype": "Data",
+			"read_only": 1,
+			"depends_on": "eval:doc.patient",
+			"fetch_from": "",
+			"in_list_view": 1,
+			"in_standard_filter": 1,
+			"insert_after": "sr_pe_mobile",
+		},
+		{
+			"fieldname": "sr_pe_deptt",
+			"label": "Patient Department",
+			"fieldtype": "Data",
+			"read_only": 1,
+			"depends_on": "eval:doc.patient",
+			"fetch_from": "",
+			"in_list_view": 1,
+			"in_standard_filter": 1,
+			"insert_after": "sr_pe_id",
+		},
+		{
+			"fieldname": "sr_pe_age",
+			"label": "Patient Age",
+			"fieldtype": "Data",
+			"read_only": 1,
+			"depends_on": "eval:doc.patient",
+			"fetch_from": "",
+			"in_list_view": 1,
+			"in_standard_filter": 1,
+			"insert_after": "sr_pe_deptt",
+		},
+		{
+			"fieldname": "sr_encounter_source",
+			"label": "Encounter Source",
+			"fieldtype": "Link",
+			"options": lead_source_dt,
+			"reqd": 1,
+			"insert_after": "google_meet_link",
+		},
+		{
+			"fieldname": "sr_encounter_status",
+			"label": "Encounter Status",
+			"fieldtype": "Link",
+			"options": "SR Encounter Status",
+			"in_list_view": 1,
+			"in_standard_filter": 1,
+			"allow_on_submit": 1,
+			"insert_after": "sr_encounter_source",
+		},
+		# --- Clinical Notes ---
+		{
+			"fieldname": "sr_clinical_notes_sb",
+			"label": "Clinical Notes",
+			"fieldtype": "Section Break",
+			"collapsible": 1,
+			"insert_after": "submit_orders_on_save",
+		},
+		{
+			"fieldname": "sr_complaints",
+			"label": "Complaints",
+			"fieldtype": "Small Text",
+			"insert_after": "sr_clinical_notes_sb",
+		},
+		{
+			"fieldname": "sr_observations",
+			"label": "Observations",
+			"fieldtype": "Small Text",
+			"insert_after": "sr_complaints",
+		},
+		{
+			"fieldname": "sr_investigations",
+			"label": "Investigations",
+			"fieldtype": "Small Text",
+			"insert_after": "sr_observations",
+		},
+		{
+			"fieldname": "sr_notes",
+			"label": "Notes",
+			"fieldtype": "Small Text",
+			"insert_after": "sr_investigations",
+		},
+		# --- Ayurvedic Medications (standard sb_drug_prescription section) ---
+		{
+			"fieldname": "sr_medication_template",
+			"label": "Medication Template",
+			"fieldtype": "Link",
+			"options": "SR Medication Template",
+			"insert_after": "sb_drug_prescription",
+		},
+		{
+			"fieldname": "sr_ayurvedic_practitioner",
+			"label": "Ayurvedic Practitioner",
+			"fieldtype": "Link",
+			"options": "Healthcare Practitioner",
+			"insert_after": "sr_medication_template",
+		},
+		{
+			"fieldname": "sr_ayurvedic_practitioner_name",
+			"label": "Ayurvedic Practitioner Name",
+			"fieldtype": "Data",
+			"read_only": 1,
+			"fetch_from": "",
+			"insert_after": "sr_ayurvedic_practitioner",
+		},
+		# --- Homeopathy Medications ---
+		{
+			"fieldname": "sr_homeopathy_medications_sb",
+			"label": "Homeopathy Medications",
+			"fieldtype": "Section Break",
+			"collapsible": 1,
+			"insert_after": "drug_prescription",
+		},
+		{
+			"fieldname": "sr_homeopathy_practitioner",
+			"label": "Homeopathy Practitioner",
+			"fieldtype": "Link",
+			"options": "Healthcare Practitioner",
+			"insert_after": "sr_homeopathy_medications_sb",
+		},
+		{
+			"fieldname": "sr_homeopathy_practitioner_name",
+			"label": "Homeopathy Practitioner Name",
+			"fieldtype": "Data",
+			"read_only": 1,
+			"fetch_from": "",
+			"insert_after": "sr_homeopathy_practitioner",
+		},
+		{
+			"fieldname": "sr_homeopathy_drug_prescription",
+			"label": "Homeopathy Drug Prescription",
+			"fieldtype": "Table",
+			"options": "Drug Prescription",
+			"allow_on_submit": 1,
+			"insert_after": "sr_homeopathy_practitioner_name",
+		},
+		# --- Allopathy Medications ---
+		{
+			"fieldname": "sr_allopathy_medications_sb",
+			"label": "Allopathy Medications",
+			"fieldtype": "Section Break",
+			"collapsible": 1,
+			"insert_after": "sr_homeopathy_drug_prescription",
+		},
+		{
+			"fieldname": "sr_allopathy_practitioner",
+			"label": "Allopathy Practitioner",
+			"fieldtype": "Link",
+			"options": "Healthcare Practitioner",
+			"insert_after": "sr_allopathy_medications_sb",
+		},
+		{
+			"fieldname": "sr_allopathy_practitioner_name",
+			"label": "Allopathy Practitioner Name",
+			"fieldtype": "Data",
+			"read_only": 1,
+			"fetch_from": "",
+			"insert_after": "sr_allopathy_practitioner",
+		},
+		{
+			"fieldname": "sr_allopathy_drug_prescription",
+			"label": "Allopathy Drug Prescription",
+			"fieldtype": "Table",
+			"options": "Drug Prescription",
+			"allow_on_submit": 1,
+			"insert_after": "sr_allopathy_practitioner_name",
+		},
+		# --- Instructions ---
+		{
+			"fieldname": "sr_instructions_sb",
+			"label": "Instructions",
+			"fieldtype": "Section Break",
+			"collapsible": 1,
+			"insert_after": "sr_allopathy_drug_prescription",
+		},
+		{
+			"fieldname": "sr_instructions_item",
+			"label": "Instructions",
+			"fieldtype": "Small Text",
+			"insert_after": "sr_instructions_sb",
+		},
+		# --- Draft Invoice tab (visible only for Encounter Type = Order) ---
+		{
+			"fieldname": "sr_draft_invoice_tab",
+			"label": "Draft Invoice",
+			"fieldtype": "Tab Break",
+			"insert_after": "clinical_notes",
+			"depends_on": 'eval:doc.sr_encounter_type=="Order"',
+		},
+		{
+			"fieldname": "sr_delivery_type",
+			"label": "Delivery Type",
+			"fieldtype": "Link",
+			"options": "SR Delivery Type",
+			"insert_after": "sr_draft_invoice_tab",
+			"depends_on": 'eval:doc.sr_encounter_type=="Order"',
+			"mandatory_depends_on": 'eval:doc.sr_encounter_type=="Order"',
+		},
+		{
+			"fieldname": "sr_items_list_sb",
+			"label": "Items List",
+			"fieldtype": "Section Break",
+			"collapsible": 0,
+			"insert_after": "sr_delivery_type",
+		},
+		{
+			"fieldname": "sr_pe_order_items",
+			"label": "Order Items",
+			"fieldtype": "Table",
+			"options": "SR Order Item",
+			"insert_after": "sr_items_list_sb",
+		},
+		{
+			"fieldname": "sr_advance_payment_sb",
+			"label": "Advance Payment",
+			"fieldtype": "Section Break",
+			"collapsible": 0,
+			"insert_after": "sr_pe_order_items",
+		},
+		{
+			"fieldname": "sr_pe_mode_of_payment",
+			"label": "Mode of Payment",
+			"fieldtype": "Link",
+			"options": "Mode of Payment",
+			"insert_after": "sr_advance_payment_sb",
+		},
+		{
+			"fieldname": "sr_pe_paid_amount",
+			"label": "Paid Amount",
+			"fieldtype": "Currency",
+			"insert_after": "sr_pe_mode_of_payment",
+		},
+		{
+			"fieldname": "sr_payment_receipt_sb",
+			"label": "Payment Receipt",
+			"fieldtype": "Section Break",
+			"collapsible": 1,
+			"insert_after": "sr_pe_paid_amount",
+		},
+		{
+			"fieldname": "sr_pe_payment_reference_no",
+			"label": "Payment Reference No",
+			"fieldtype": "Data",
+			"insert_after": "sr_payment_receipt_sb",
+		},
+		{
+			"fieldname": "sr_pe_payment_reference_date",
+			"label": "Payment Reference Date",
+			"fieldtype": "Date",
+			"insert_after": "sr_pe_payment_reference_no",
+		},
+		{
+			"fieldname": "sr_pe_payment_proof",
+			"label": "Payment Proof",
+			"fieldtype": "Attach Image",
+			"insert_after": "sr_pe_payment_reference_date",
+		},
+	]
+
+
+# ----------------- Property Setters -----------------
+
+# (doc_type, fieldname, property, value, property_type) — applied unconditionally
+PROPERTY_SETTERS = [
+	# Address defaults
+	("Address", "is_primary_address", "default", "1", "Text"),
+	("Address", "is_shipping_address", "default", "1", "Text"),
+	# Patient.status editable (and clear any read-only dependency)
+	("Patient", "status", "read_only", "0", "Check"),
+	("Patient", "status", "read_only_depends_on", "", "Text"),
+	# Ayurvedic section = renamed standard drug prescription section
+	("Patient Encounter", "sb_drug_prescription", "label", "Ayurvedic Medications", "Data"),
+	("Patient Encounter", "sb_drug_prescription", "collapsible", "1", "Check"),
+	("Patient Encounter", "drug_prescription", "label", "Ayurvedic Drug Prescription", "Data"),
+]
+
+# Standard Encounter sections to collapse / relabel (skipped if the field is missing)
+ENCOUNTER_COLLAPSED_SECTIONS = [
+	"sb_symptoms",
+	"sb_test_prescription",
+	"sb_procedures",
+	"rehabilitation_section",
+	"section_break_33",
+]
+ENCOUNTER_LABELS = {"section_break_33": "Review"}
+
+# Core Encounter fields to hide
+ENCOUNTER_HIDDEN_FIELDS = (
+	"invoiced",
+	"submit_orders_on_save",
+	"codification_table",
+	"symptoms",
+	"diagnosis",
+	"procedure_prescription",
+	"therapy_plan",
+	"therapies",
+	"naming_series",
+	"appointment",
+)
+HIDDEN_FIELD_PROPS = {"hidden": 1, "in_list_view": 0, "in_standard_filter": 0}
+
+# ----------------- Indexes -----------------
+
+# Lookup/filter columns added by this app; each tuple is one (possibly composite) index
+INDEXES = {
+	"Patient": [
+		("sr_patient_id",),
+		("sr_practo_id",),
+		("sr_followup_day", "sr_followup_id"),
+	],
+	"Customer": [
+		("sr_customer_id",),  # normally already covered by the unique key
+	],
+	"Patient Encounter": [
+		("sr_encounter_type",),
+		("sr_encounter_status",),
+		("sr_sales_type",),
+		("patient", "creation"),  # PE launcher keyset pagination
+	],
+	"SR Patient Search Index": [
+		("sr_token", "sr_position"),
+		("sr_patient",),
+	],
+	"SR Encounter Rollup": [
+		("sr_date", "sr_encounter_type"),
+	],
+	"SR SQL Profile": [
+		("sr_date", "sr_doctype"),
+	],
+}
+
+# ----------------- manifest -----------------
+
+
+class SetupContext:
+	"""One in-memory view of the doctypes a setup run touches.
+
+	Each doctype's meta is loaded once; fields the run is about to add are tracked
+	as pending, so field-existence checks never force a meta rebuild between
+	writes. Writers record the doctypes they changed in `touched`, and `flush`
+	clears their meta cache once at the end.
+	"""
+
+	def __init__(self):
+		self._meta = {}
+		self._pending = {}
+		self.touched = set()
+
+	def meta(self, dt: str):
+		if dt not in self._meta:
+			self._meta[dt] = frappe.get_meta(dt)
+		return self._meta[dt]
+
+	def add_fields(self, dt: str, fields: list[dict]):
+		self._pending.setdefault(dt, {}).update({df["fieldname"]: df for df in fields})
+
+	def get_field(self, dt: str, fieldname: str):
+		return self._pending.get(dt, {}).get(fieldname) or self.meta(dt).get_field(fieldname)
+
+	def has_field(self, dt: str, fieldname: str) -> bool:
+		return bool(self.get_field(dt, fieldname))
+
+	def is_custom_field(self, dt: str, fieldname: str) -> bool:
+		if fieldname in self._pending.get(dt, {}):
+			return True
+		df = self.meta(dt).get_field(fieldname)
+		return bool(df and df.get("is_custom_field"))
+
+	def flush(self):
+		for dt in sorted(self.touched):
+			frappe.clear_cache(doctype=dt)
+		self.touched.clear()
+		self._meta.clear()
+
+
+def practitioner_name_field() -> str:
+	hp_meta = frappe.get_meta("Healthcare Practitioner")
+	return (
+		"practitioner_name"
+		if hp_meta.get_field("practitioner_name")
+		else ("full_name" if hp_meta.get_field("full_name") else "practitioner_name")
+	)
+
+
+def build_manifest(ctx: SetupContext | None = None) -> dict:
+	"""Resolve the manifest against the current site.
+
+	Only two things depend on the site: the lead source doctype, and whether a
+	hidden core Encounter field was turned into a Custom Field. Field checks are
+	answered from `ctx` (one meta load per doctype), which also learns about the
+	custom fields the manifest is going to add.
+	"""
+	ctx = ctx or SetupContext()
+	dt = "Patient Encounter"
+	lead_source_dt = "CRM Lead Source" if frappe.db.exists("DocType", "CRM Lead Source") else "Lead Source"
+
+	custom_fields = {
+		"Patient": PATIENT_FIELDS,
+		"Customer": CUSTOMER_FIELDS,
+		"Healthcare Practitioner": PRACTITIONER_FIELDS,
+		dt: _encounter_fields(lead_source_dt),
+	}
+	for target, fields in custom_fields.items():
+		ctx.add_fields(target, fields)
+
+	property_setters = list(PROPERTY_SETTERS)
+
+	for f in ENCOUNTER_COLLAPSED_SECTIONS:
+		if ctx.has_field(dt, f):
+			property_setters.append((dt, f, "collapsible", "1", "Check"))
+	for f, label in ENCOUNTER_LABELS.items():
+		if ctx.has_field(dt, f):
+			property_setters.append((dt, f, "label", label, "Data"))
+
+	# If someone made a hidden field a Custom Field, patch that; else use Property Setters
+	field_patches = []
+	for f in ENCOUNTER_HIDDEN_FIELDS:
+		if ctx.is_custom_field(dt, f):
+			field_patches.append((dt, f, HIDDEN_FIELD_PROPS))
+		else:
+			for prop, value in HIDDEN_FIELD_PROPS.items():
+				property_setters.append((dt, f, prop, str(value), "Check"))
+
+	return {
+		"doctypes": SR_DOCTYPES,
+		"custom_fields": custom_fields,
+		"field_patches": field_patches,
+		"property_setters": property_setters,
+		"indexes": INDEXES,
+	}
+
+
+def site_signature() -> dict:
+	"""The site inputs build_manifest depends on, read without loading any meta.
+
+	Two sites with equal signatures resolve to the same manifest, so a fleet
+	rollout can build it once and ship it to every matching site.
+	"""
+	return {
+		"apps": frappe.get_installed_apps(),
+		"lead_source_dt": "CRM Lead Source"
+		if frappe.db.exists("DocType", "CRM Lead Source")
+		else "Lead Source",
+		"custom_hidden": sorted(
+			frappe.get_all(
+				"Custom Field",
+				filters={"dt": "Patient Encounter", "fieldname": ["in", list(ENCOUNTER_HIDDEN_FIELDS)]},
+				pluck="fieldname",
+			)
+		),
+	}
+
+
+def fingerprint(manifest: dict) -> str:
+	"""Stable sha256 of the manifest (key order independent)."""
+	raw = json.dumps(manifest, sort_keys=True, separators=(",", ":"), default=str)
+	return hashlib.sha256(raw.encode()).hexdigest()
@@ -1,73 +1,123 @@
 import frappe
 
+from sriaas_booking import archive, id_allocator, schema
+from sriaas_booking.install import SCHEMA_HASH_KEY
+
 FIELD_PREFIX = "sr_"  # all your fields use this prefix
 TARGET_DTS = [
-    "Patient",
-    "Customer",
-    "Address",
-    "Healthcare Practitioner",
-    "Patient Encounter",
+	"Patient",
+	"Customer",
+	"Address",
+	"Healthcare Practitioner",
+	"Patient Encounter",
 ]
+DELETE_CHUNK = 500
 
 # Property Setters that changed *standard* fields we should revert
 PS_EXTRAS = [
-    # Patient
-    ("Patient", "status", "read_only"),
-    ("Patient", "status", "read_only_depends_on"),
-
-    # Address defaults you set
-    ("Address", "is_primary_address", "default"),
-    ("Address", "is_shipping_address", "default"),
-
-    # Patient Encounter — various label/visibility/collapsible tweaks
-    ("Patient Encounter", "drug_prescription", "label"),
-    ("Patient Encounter", "sb_drug_prescription", "label"),
-    ("Patient Encounter", "codification_table", "hidden"),
-    ("Patient Encounter", "symptoms", "hidden"),
-    ("Patient Encounter", "diagnosis", "hidden"),
-    ("Patient Encounter", "sb_symptoms", "collapsible"),
-    ("Patient Encounter", "sb_test_prescription", "collapsible"),
-    ("Patient Encounter", "sb_procedures", "collapsible"),
-    ("Patient Encounter", "rehabilitation_section", "collapsible"),
-    ("Patient Encounter", "section_break_33", "collapsible"),
-    ("Patient Encounter", "section_break_33", "label"),  # "Review"
+	# Patient
+	("Patient", "status", "read_only"),
+	("Patient", "status", "read_only_depends_on"),
+	# Address defaults you set
+	("Address", "is_primary_address", "default"),
+	("Address", "is_shipping_address", "default"),
+	# Patient Encounter — various label/visibility/collapsible tweaks
+	("Patient Encounter", "drug_prescription", "label"),
+	("Patient Encounter", "sb_drug_prescription", "label"),
+	("Patient Encounter", "codification_table", "hidden"),
+	("Patient Encounter", "symptoms", "hidden"),
+	("Patient Encounter", "diagnosis", "hidden"),
+	("Patient Encounter", "sb_symptoms", "collapsible"),
+	("Patient Encounter", "sb_test_prescription", "collapsible"),
+	("Patient Encounter", "sb_procedures", "collapsible"),
+	("Patient Encounter", "rehabilitation_section", "collapsible"),
+	("Patient Encounter", "section_break_33", "collapsible"),
+	("Patient Encounter", "section_break_33", "label"),  # "Review"
 ]
 
+
 def before_uninstall():
-    """Remove Custom Fields & Property Setters introduced by this app."""
-    _remove_custom_fields()
-    _remove_property_setters()
-    frappe.clear_cache()
-
-def _remove_custom_fields():
-    # Delete all Custom Fields that start with your prefix on the target doctypes
-    for dt in TARGET_DTS:
-        names = frappe.get_all(
-            "Custom Field",
-            filters={"dt": dt, "fieldname": ["like", f"{FIELD_PREFIX}%"]},
-            pluck="name",
-        )
-        for name in names:
-            try:
-                frappe.delete_doc("Custom Field", name, ignore_permissions=True, force=1)
-            except Exception as e:
-                frappe.log_error(f"Uninstall: failed deleting Custom Field {name}: {e}")
-
-def _remove_property_setters():
-    # 1) Any PS tied to your prefixed fields
-    ps_names = frappe.get_all(
-        "Property Setter",
-        filters={"field_name": ["like", f"{FIELD_PREFIX}%"]},
-        pluck="name",
-    )
-    # 2) Specific PS that touch standard fields (labels/hidden/collapsible/etc.)
-    for dt, fn, prop in PS_EXTRAS:
-        name = f"{dt}-{fn}-{prop}"
-        if frappe.db.exists("Property Setter", name):
-            ps_names.append(name)
-
-    for name in set(ps_names):
-        try:
-            frappe.delete_doc("Property Setter", name, ignore_permissions=True, force=1)
-        except Exception as e:
-            frappe.log_error(f"Uninstall: failed deleting Property Setter {name}: {e}")
+	"""Remove Custom Fields, Property Setters and SR doctypes introduced by this app.
+
+	Targets are collected in two queries and deleted with batched statements in a
+	single transaction; SR doctypes are then dropped in reverse dependency order.
+
+	The encounter archive tables (`_sr_archive_*`, see archive.py) are kept on
+	purpose: they hold the only copy of archived clinical records. Reinstalling the
+	app makes them readable again (archive.get_encounter / restore_encounter); drop
+	them by hand once they are no longer needed.
+	"""
+	cf_rows = _custom_field_targets()
+	ps_rows = _property_setter_targets()
+
+	try:
+		_bulk_delete("Custom Field", [r.name for r in cf_rows])
+		_bulk_delete("Property Setter", [r.name for r in ps_rows])
+		frappe.db.set_global(SCHEMA_HASH_KEY, "")  # a reinstall must re-apply everything
+		frappe.db.commit()
+	except Exception:
+		frappe.db.rollback()
+		raise
+
+	_drop_sr_doctypes()
+	id_allocator.drop_sequences()
+
+	for dt in sorted({r.dt for r in cf_rows} | {r.doc_type for r in ps_rows}):
+		frappe.clear_cache(doctype=dt)
+
+	kept = frappe.db.sql_list("SHOW TABLES LIKE %s", (archive.archive_table("").replace("_", "\\_") + "%",))
+	if kept:
+		frappe.logger("sriaas_booking").info({"uninstall_kept_archive_tables": kept})
+
+
+def _ps_extras() -> set[str]:
+	"""Names of Property Setters on standard fields: the legacy list plus everything the manifest sets."""
+	extras = {(dt, fn, prop) for dt, fn, prop in PS_EXTRAS}
+	extras |= {ps[:3] for ps in schema.PROPERTY_SETTERS}
+	extras |= {("Patient Encounter", f, "collapsible") for f in schema.ENCOUNTER_COLLAPSED_SECTIONS}
+	extras |= {("Patient Encounter", f, "label") for f in schema.ENCOUNTER_LABELS}
+	extras |= {
+		("Patient Encounter", f, prop)
+		for f in schema.ENCOUNTER_HIDDEN_FIELDS
+		for prop in schema.HIDDEN_FIELD_PROPS
+	}
+	return {f"{dt}-{fn}-{prop}" for dt, fn, prop in extras}
+
+
+def _custom_field_targets():
+	# All Custom Fields that start with your prefix on the target doctypes
+	return frappe.get_all(
+		"Custom Field",
+		filters={"dt": ["in", TARGET_DTS], "fieldname": ["like", f"{FIELD_PREFIX}%"]},
+		fields=["name", "dt"],
+	)
+
+
+def _property_setter_targets():
+	# 1) Any PS tied to your prefixed fields, 2) specific PS that touch standard fields
+	return frappe.get_all(
+		"Property Setter",
+		or_filters={"field_name": ["like", f"{FIELD_PREFIX}%"], "name": ["in", list(_ps_extras())]},
+		fields=["name", "doc_type"],
+	)
+
+
+def _bulk_delete(doctype: str, names: list[str]):
+	for i in range(0, len(names), DELETE_CHUNK):
+		frappe.db.delete(doctype, {"name": ["in", names[i : i + DELETE_CHUNK]]})
+
+
+def _drop_sr_doctypes():
+	# Created masters/child tables first, so drop in reverse (parents before their child tables)
+	existing = set(
+		frappe.get_all(
+			"DocType", filters={"name": ["in", [d["name"] for d in schema.SR_DOCTYPES]]}, pluck="name"
+		)
+	)
+	for d in reversed(schema.SR_DOCTYPES):
+		if d["name"] not in existing:
+			continue
+		try:
+			frappe.delete_doc("DocType", d["name"], ignore_permissions=True, force=1)
+		except Exception as e:
+			frappe.log_error(f"Uninstall: failed deleting DocType {d['name']}: {e}")